@@ -0,0 +1,163 @@
+"""partition_logs_by_month
+
+Revision ID: a8d3e5f1b702
+Revises: f4a7c2d9e811
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from datetime import date, datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d3e5f1b702'
+down_revision = 'f4a7c2d9e811'
+branch_labels = None
+depends_on = None
+
+
+# Сколько месяцев вперед создавать партиции при миграции
+MONTHS_AHEAD = 3
+
+
+def _add_months(value: date, months: int) -> date:
+    month_index = value.month - 1 + months
+    return date(value.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def _is_partitioned(bind) -> bool:
+    return bool(bind.execute(sa.text(
+        "SELECT 1 FROM pg_class WHERE relname = 'logs' AND relkind = 'p'"
+    )).scalar())
+
+
+def _create_indexes(bind) -> None:
+    # Индексы под фильтры read_logs / read_my_logs / export_logs
+    op.create_index('ix_logs_id', 'logs', ['id'], unique=False)
+    op.create_index('ix_logs_created_at', 'logs', ['created_at'], unique=False)
+    op.create_index('ix_logs_action_created_at', 'logs', ['action', 'created_at'], unique=False)
+    op.create_index(
+        'ix_logs_entity_type_entity_id_created_at', 'logs',
+        ['entity_type', 'entity_id', 'created_at'], unique=False
+    )
+
+    # Поиск по IP через ILIKE '%...%' возможен только с триграммным индексом
+    has_trgm = bind.execute(sa.text(
+        "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+    )).scalar()
+    if has_trgm:
+        op.create_index(
+            'ix_logs_ip_address_trgm', 'logs', ['ip_address'], unique=False,
+            postgresql_using='gin', postgresql_ops={'ip_address': 'gin_trgm_ops'}
+        )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    # Партиционирование поддерживается только PostgreSQL
+    if bind.dialect.name != 'postgresql':
+        op.create_index('ix_logs_created_at', 'logs', ['created_at'], unique=False)
+        op.create_index('ix_logs_action_created_at', 'logs', ['action', 'created_at'], unique=False)
+        op.create_index(
+            'ix_logs_entity_type_entity_id_created_at', 'logs',
+            ['entity_type', 'entity_id', 'created_at'], unique=False
+        )
+        return
+
+    # Таблица уже создана партиционированной (create_all по новой модели)
+    if _is_partitioned(bind):
+        return
+
+    # 1. Переименовываем старую таблицу вместе с ее индексами
+    op.execute("ALTER TABLE logs RENAME TO logs_legacy")
+    op.execute("ALTER INDEX logs_pkey RENAME TO logs_legacy_pkey")
+    op.execute("DROP INDEX IF EXISTS ix_logs_id")
+    op.execute("DROP INDEX IF EXISTS ix_logs_user_id")
+
+    # 2. Новая партиционированная таблица (ключ партиционирования входит в PK)
+    op.execute("""
+        CREATE TABLE logs (
+            id INTEGER NOT NULL DEFAULT nextval('logs_id_seq'),
+            user_id INTEGER REFERENCES users (id),
+            action VARCHAR(100) NOT NULL,
+            entity_type VARCHAR(50) NOT NULL,
+            entity_id INTEGER,
+            details JSON,
+            ip_address VARCHAR(45),
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE logs_id_seq OWNED BY logs.id")
+
+    # 3. Месячные партиции от самой старой записи до MONTHS_AHEAD месяцев вперед
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM logs_legacy")).scalar()
+    today = datetime.now(timezone.utc).date()
+    month = date((oldest or today).year, (oldest or today).month, 1)
+    last_month = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    while month <= last_month:
+        next_month = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE logs_p{month.year:04d}_{month.month:02d} PARTITION OF logs "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+        )
+        month = next_month
+    # Страховочная партиция для записей вне созданных диапазонов
+    op.execute("CREATE TABLE logs_default PARTITION OF logs DEFAULT")
+
+    # 4. Переносим данные и удаляем старую таблицу
+    op.execute("""
+        INSERT INTO logs (id, user_id, action, entity_type, entity_id, details, ip_address, created_at, updated_at)
+        SELECT id, user_id, action, entity_type, entity_id, details, ip_address,
+               COALESCE(created_at, now()), updated_at
+        FROM logs_legacy
+    """)
+    op.execute("DROP TABLE logs_legacy")
+
+    # 5. Индексы создаются на родительской таблице и наследуются партициями
+    _create_indexes(bind)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+
+    if bind.dialect.name != 'postgresql':
+        op.drop_index('ix_logs_entity_type_entity_id_created_at', table_name='logs')
+        op.drop_index('ix_logs_action_created_at', table_name='logs')
+        op.drop_index('ix_logs_created_at', table_name='logs')
+        return
+
+    if not _is_partitioned(bind):
+        return
+
+    # Возвращаем обычную таблицу (данные из отсоединенных архивных партиций не переносятся)
+    op.execute("ALTER TABLE logs RENAME TO logs_partitioned")
+    op.execute("ALTER INDEX logs_pkey RENAME TO logs_partitioned_pkey")
+    op.execute("DROP INDEX IF EXISTS ix_logs_id")
+    op.execute("DROP INDEX IF EXISTS ix_logs_user_id")
+    op.execute("DROP INDEX IF EXISTS ix_logs_created_at")
+    op.execute("DROP INDEX IF EXISTS ix_logs_action_created_at")
+    op.execute("DROP INDEX IF EXISTS ix_logs_entity_type_entity_id_created_at")
+    op.execute("DROP INDEX IF EXISTS ix_logs_ip_address_trgm")
+    op.execute("""
+        CREATE TABLE logs (
+            id INTEGER NOT NULL DEFAULT nextval('logs_id_seq') PRIMARY KEY,
+            user_id INTEGER REFERENCES users (id),
+            action VARCHAR(100) NOT NULL,
+            entity_type VARCHAR(50) NOT NULL,
+            entity_id INTEGER,
+            details JSON,
+            ip_address VARCHAR(45),
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+        )
+    """)
+    op.execute("ALTER SEQUENCE logs_id_seq OWNED BY logs.id")
+    op.execute("INSERT INTO logs SELECT id, user_id, action, entity_type, entity_id, details, ip_address, created_at, updated_at FROM logs_partitioned")
+    op.execute("DROP TABLE logs_partitioned CASCADE")
+    op.create_index('ix_logs_id', 'logs', ['id'], unique=False)
+    op.create_index('ix_logs_user_id', 'logs', ['user_id'], unique=False)
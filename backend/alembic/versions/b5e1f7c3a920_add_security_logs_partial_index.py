@@ -0,0 +1,36 @@
+"""add_security_logs_partial_index
+
+Revision ID: b5e1f7c3a920
+Revises: a8d3e5f1b702
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e1f7c3a920'
+down_revision = 'a8d3e5f1b702'
+branch_labels = None
+depends_on = None
+
+
+# Список зафиксирован на момент миграции (см. SECURITY_ACTIONS в app/models/log.py)
+SECURITY_ACTIONS = (
+    "LOGIN", "LOGOUT", "LOGIN_FAILED", "LOGIN_BLOCKED",
+    "TOKEN_CHECK", "SECURITY_EVENT", "ROLE_CHANGED",
+    "EMERGENCY_STATUS_CHANGE", "DEACTIVATE", "ACTIVATE"
+)
+
+
+def upgrade() -> None:
+    # Частичный индекс для ленты безопасности: WHERE action IN (...) ORDER BY created_at DESC, id DESC
+    op.create_index(
+        'ix_logs_security_created_at', 'logs', ['created_at', 'id'], unique=False,
+        postgresql_where=sa.text("action IN ({})".format(", ".join(f"'{a}'" for a in SECURITY_ACTIONS)))
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_logs_security_created_at', table_name='logs')
@@ -0,0 +1,51 @@
+"""add_log_catalog
+
+Revision ID: c2d8a4e6f013
+Revises: b5e1f7c3a920
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2d8a4e6f013'
+down_revision = 'b5e1f7c3a920'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # Таблица могла быть создана create_all при старте приложения
+    if 'log_catalog' not in inspector.get_table_names():
+        op.create_table(
+            'log_catalog',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('action', sa.String(length=100), nullable=False),
+            sa.Column('entity_type', sa.String(length=50), nullable=False),
+            sa.Column('first_seen', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('action', 'entity_type', name='uq_log_catalog_action_entity_type')
+        )
+        op.create_index('ix_log_catalog_id', 'log_catalog', ['id'], unique=False)
+
+    # Заполняем справочник по уже накопленным логам (однократный полный проход)
+    op.execute("""
+        INSERT INTO log_catalog (action, entity_type, first_seen)
+        SELECT action, entity_type, min(created_at)
+        FROM logs
+        GROUP BY action, entity_type
+        ON CONFLICT (action, entity_type) DO UPDATE
+        SET first_seen = LEAST(log_catalog.first_seen, EXCLUDED.first_seen)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_log_catalog_id', table_name='log_catalog')
+    op.drop_table('log_catalog')
@@ -0,0 +1,28 @@
+"""add_logs_user_created_at_index
+
+Revision ID: d7f2b9c4e158
+Revises: c2d8a4e6f013
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7f2b9c4e158'
+down_revision = 'c2d8a4e6f013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # GET /logs/my и фильтр по пользователю: WHERE user_id = ? ORDER BY created_at DESC
+    op.create_index(
+        'ix_logs_user_id_created_at', 'logs',
+        ['user_id', sa.text('created_at DESC')], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_logs_user_id_created_at', table_name='logs')
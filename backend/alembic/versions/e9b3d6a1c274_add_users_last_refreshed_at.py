@@ -0,0 +1,25 @@
+"""add_users_last_refreshed_at
+
+Revision ID: e9b3d6a1c274
+Revises: d7f2b9c4e158
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9b3d6a1c274'
+down_revision = 'd7f2b9c4e158'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Время последнего POST /auth/refresh (только этот путь пишет колонку)
+    op.add_column('users', sa.Column('last_refreshed_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'last_refreshed_at')
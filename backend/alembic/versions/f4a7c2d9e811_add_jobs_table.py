@@ -0,0 +1,61 @@
+"""add_jobs_table
+
+Revision ID: f4a7c2d9e811
+Revises: 26a996733fe0, e3g6h9d5c567
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4a7c2d9e811'
+down_revision = ('26a996733fe0', 'e3g6h9d5c567')
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Очередь фоновых задач (массовая проверка ролей, пересчеты)
+    # Миграция также объединяет две ветки истории миграций
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_type', sa.String(length=50), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+        sa.Column('dedup_key', sa.String(length=100), nullable=True),
+        sa.Column('params', sa.JSON(), nullable=True),
+        sa.Column('progress_current', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('progress_total', sa.Integer(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('cancel_requested', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('worker_id', sa.String(length=100), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_by_user_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['created_by_user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_jobs_id', 'jobs', ['id'], unique=False)
+    op.create_index('ix_jobs_job_type', 'jobs', ['job_type'], unique=False)
+    op.create_index('ix_jobs_status', 'jobs', ['status'], unique=False)
+    op.create_index('ix_jobs_created_by_user_id', 'jobs', ['created_by_user_id'], unique=False)
+    # Не больше одной активной задачи на ключ идемпотентности
+    op.create_index(
+        'ix_jobs_dedup_key_active', 'jobs', ['dedup_key'], unique=True,
+        postgresql_where=sa.text("status IN ('pending', 'running')")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_jobs_dedup_key_active', table_name='jobs')
+    op.drop_index('ix_jobs_created_by_user_id', table_name='jobs')
+    op.drop_index('ix_jobs_status', table_name='jobs')
+    op.drop_index('ix_jobs_job_type', table_name='jobs')
+    op.drop_index('ix_jobs_id', table_name='jobs')
+    op.drop_table('jobs')
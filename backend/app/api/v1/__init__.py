@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1 import auth, users, passports, fines, payments, logs, events, roles
+from app.api.v1 import auth, users, passports, fines, payments, logs, events, roles, jobs
 
 api_router = APIRouter()
 
@@ -11,4 +11,5 @@ api_router.include_router(fines.router, prefix="/fines", tags=["fines"])
 api_router.include_router(payments.router, prefix="/payments", tags=["payments"])
 api_router.include_router(logs.router, prefix="/logs", tags=["logs"])
 api_router.include_router(events.router, prefix="/events", tags=["events"])
-api_router.include_router(roles.router, prefix="/roles", tags=["roles"])
\ No newline at end of file
+api_router.include_router(roles.router, prefix="/roles", tags=["roles"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
\ No newline at end of file
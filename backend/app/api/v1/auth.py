@@ -1,13 +1,17 @@
+import asyncio
+import time
 from datetime import timedelta, datetime, timezone
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 import secrets
 import uuid
-from typing import Optional
+from typing import Any, Awaitable, Dict, Optional, Tuple, TypeVar
 
 from app.core.database import get_db
 from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.core.metrics import LOGIN_STEP_DURATION
 from app.core.security import create_access_token
 from app.core.deps import get_current_user, get_current_user_for_refresh
 from app.crud.user import user_crud
@@ -16,9 +20,95 @@ from app.models.user import User
 from app.clients.discord import discord_client
 from app.clients.spworlds import spworlds_client
 from app.utils.logger import ActionLogger
+from app.utils.http_cache import conditional_response
+from app.services.role_checker import role_checker_service
+from app.services.token_refresher import token_refresh_service
+
+logger = get_logger(__name__)
 
 router = APIRouter()
 
+T = TypeVar("T")
+
+
+async def _timed_step(step: str, awaitable: Awaitable[T], timings: Dict[str, float]) -> T:
+    """
+    Выполнить шаг входа и записать его длительность (мс) в timings и метрики
+    """
+    started = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        elapsed = time.perf_counter() - started
+        timings[step] = round(elapsed * 1000, 1)
+        LOGIN_STEP_DURATION.labels(step).observe(elapsed)
+
+
+async def _lookup_member_by_bot(discord_id: int, timings: Dict[str, float]) -> Tuple[Optional[dict], Optional[str]]:
+    """
+    Участник сервера через Bot API: (данные, текст ошибки)
+    """
+    try:
+        member_info = await _timed_step(
+            "guild_member",
+            discord_client.get_guild_member_by_bot(settings.DISCORD_BOT_TOKEN, settings.DISCORD_GUILD_ID, discord_id),
+            timings
+        )
+        return member_info, None
+    except Exception as e:
+        return None, str(e)
+
+
+async def _fetch_login_profile(access_token: str, timings: Dict[str, float]) -> Dict[str, Any]:
+    """
+    Данные для входа из Discord и SP-Worlds, независимые запросы параллельно
+
+    После обмена кода на токен:
+      user_info ──┬── guild_member (Bot API, после guilds)
+                  └── spworlds (нужен только ID)
+      guilds (параллельно со всей веткой user_info)
+
+    Участник сервера запрашивается через Bot API только для пользователей из нужного
+    сервера: лишние вызовы Bot API расходуют его rate limit на каждом входе.
+    """
+    guilds_lookup = asyncio.ensure_future(
+        _timed_step("guilds", discord_client.get_user_guilds(access_token), timings)
+    )
+
+    async def member_lookup(discord_id: int) -> Tuple[Optional[dict], Optional[str]]:
+        if not settings.DISCORD_BOT_TOKEN:
+            # Без токена бота участник сервера не запрашивается
+            return None, None
+        guilds = await guilds_lookup
+        if not any(guild["id"] == settings.DISCORD_GUILD_ID for guild in guilds or ()):
+            return None, None
+        return await _lookup_member_by_bot(discord_id, timings)
+
+    async def identity() -> Dict[str, Any]:
+        user_info = await _timed_step("user_info", discord_client.get_user_info(access_token), timings)
+        if not user_info:
+            return {"user_info": None}
+
+        discord_id = int(user_info["id"])
+        (member_info, member_error), spworlds_data = await asyncio.gather(
+            member_lookup(discord_id),
+            _timed_step("spworlds", spworlds_client.find_user(str(discord_id)), timings)
+        )
+        return {
+            "user_info": user_info,
+            "member_info": member_info,
+            "member_error": member_error,
+            "spworlds_data": spworlds_data
+        }
+
+    try:
+        profile, guilds = await asyncio.gather(identity(), guilds_lookup)
+    finally:
+        if not guilds_lookup.done():
+            guilds_lookup.cancel()
+    profile["guilds"] = guilds
+    return profile
+
 
 @router.get("/discord/login")
 async def discord_login(request: Request):
@@ -56,9 +146,12 @@ async def discord_callback(
             detail="Код авторизации не получен"
         )
 
+    timings: Dict[str, float] = {}
+    login_started = time.perf_counter()
+
     try:
         # Обмениваем код на токен
-        token_data = await discord_client.exchange_code(code)
+        token_data = await _timed_step("exchange_code", discord_client.exchange_code(code), timings)
         if not token_data:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -69,8 +162,10 @@ async def discord_callback(
         refresh_token = token_data["refresh_token"]
         expires_in = token_data["expires_in"]
 
-        # Получаем информацию о пользователе
-        user_info = await discord_client.get_user_info(access_token)
+        # Информация о пользователе, серверы, участник сервера и SP-Worlds — параллельно
+        profile = await _fetch_login_profile(access_token, timings)
+
+        user_info = profile["user_info"]
         if not user_info:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -83,7 +178,7 @@ async def discord_callback(
         discord_avatar = user_info.get("avatar")
 
         # Проверяем, что пользователь состоит в нужном сервере
-        guilds = await discord_client.get_user_guilds(access_token)
+        guilds = profile["guilds"]
         if not guilds:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -99,61 +194,45 @@ async def discord_callback(
 
         # Если пользователь не в сервере, назначаем роль "citizen" (житель)
         if not target_guild:
-            print(f"DEBUG: User {discord_username} is not in the Discord server, assigning citizen role")
+            logger.debug("discord_user_not_in_guild", user=discord_username, role="citizen")
+            user_role = "citizen"
+            user_roles = []
+        elif not settings.DISCORD_BOT_TOKEN:
+            logger.debug("discord_bot_token_missing", role="citizen")
+            user_role = "citizen"
+            user_roles = []
+        elif profile["member_error"]:
+            # При ошибке Bot API назначаем роль citizen
+            logger.warning(
+                "discord_bot_api_error", user=discord_username, error=profile["member_error"], role="citizen"
+            )
+            user_role = "citizen"
+            user_roles = []
+        elif not profile["member_info"]:
+            # Если пользователь состоит в сервере, но бот не видит его, назначаем citizen
+            logger.debug("discord_member_not_visible", user=discord_username, role="citizen")
             user_role = "citizen"
             user_roles = []
         else:
-            # Пользователь в сервере, проверяем его роли через Bot API
-            if settings.DISCORD_BOT_TOKEN:
-                # Используем Bot API для получения информации о члене сервера
-                try:
-                    member_info = await discord_client.get_guild_member_by_bot(
-                        settings.DISCORD_BOT_TOKEN, 
-                        settings.DISCORD_GUILD_ID, 
-                        discord_id
-                    )
-                    if not member_info:
-                        # Если пользователь состоит в сервере, но бот не видит его, назначаем citizen
-                        print(f"DEBUG: User {discord_username} is in server but bot can't access member info, assigning citizen role")
-                        user_role = "citizen"
-                        user_roles = []
-                    else:
-                        user_roles = member_info.get("roles", [])
-                        print(f"DEBUG: User roles from Discord Bot API: {user_roles}")
-                        print(f"DEBUG: Admin role ID from settings: {settings.DISCORD_ADMIN_ROLE_ID}")
-                        print(f"DEBUG: Police role ID from settings: {settings.DISCORD_POLICE_ROLE_ID}")
-
-                        # Определяем роль пользователя на основе Discord ролей
-                        user_role = discord_client.determine_user_role(member_info)
-                        print(f"DEBUG: Determined user role: {user_role}")
-                        
-                        # Если нет admin/police ролей, назначаем citizen
-                        if user_role is None:
-                            user_role = "citizen"
-                            print(f"DEBUG: User {discord_username} has no admin/police roles, assigned citizen role")
-                    
-                except Exception as e:
-                    print(f"DEBUG: Bot API error: {e}")
-                    # При ошибке Bot API назначаем роль citizen
-                    user_role = "citizen"
-                    user_roles = []
-                    print(f"DEBUG: Bot API error, assigning citizen role to {discord_username}")
-            else:
-                print("DEBUG: No bot token configured, assigning citizen role")
+            member_info = profile["member_info"]
+            user_roles = member_info.get("roles", [])
+
+            # Определяем роль пользователя на основе Discord ролей
+            user_role = discord_client.determine_user_role(member_info)
+
+            # Если нет admin/police ролей, назначаем citizen
+            if user_role is None:
                 user_role = "citizen"
-                user_roles = []
+            logger.debug("discord_role_determined", user=discord_username, discord_roles=user_roles, role=user_role)
 
-        # Получаем данные из SP-Worlds API
-        print(f"DEBUG: Fetching SP-Worlds data for Discord ID: {discord_id}")
-        spworlds_data = await spworlds_client.find_user(str(discord_id))
-        print(f"DEBUG: SP-Worlds response: {spworlds_data}")
+        # Данные из SP-Worlds API
+        spworlds_data = profile["spworlds_data"]
         minecraft_username = spworlds_data.get("username") if spworlds_data else None
         minecraft_uuid = spworlds_data.get("uuid") if spworlds_data else None
-        print(f"DEBUG: Extracted minecraft_username: {minecraft_username}, minecraft_uuid: {minecraft_uuid}")
+        logger.debug("spworlds_user_resolved", discord_id=discord_id, minecraft_username=minecraft_username)
 
         # Проверяем, есть ли пользователь в базе
         user = user_crud.get_by_discord_id(db, discord_id=discord_id)
-        print(f"DEBUG: Existing user found: {user.discord_username if user else 'None'}")
 
         expires_at = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
 
@@ -173,10 +252,9 @@ async def discord_callback(
                 discord_refresh_token=refresh_token,
                 discord_expires_at=expires_at
             )
-            print(f"DEBUG: Updated existing user: {user.discord_username}, role: {user.role}")
+            logger.debug("login_user_updated", user=user.discord_username, role=user.role)
         else:
             # Создаем нового пользователя
-            print(f"DEBUG: Creating new user with role: {user_role}")
             user = user_crud.create_from_discord(
                 db,
                 discord_id=discord_id,
@@ -191,19 +269,24 @@ async def discord_callback(
                 discord_refresh_token=refresh_token,
                 discord_expires_at=expires_at
             )
-            print(f"DEBUG: Created new user: {user.discord_username}, role: {user.role}, active: {user.is_active}")
+            logger.info("login_user_created", user=user.discord_username, role=user.role, active=user.is_active)
 
         # Логируем успешный вход
         ActionLogger.log_user_login(db=db, user=user, request=request)
 
         # Создаем JWT токен для нашего приложения
-        print(f"DEBUG: Creating JWT token for user: {user.discord_username}, role: {user.role}, discord_id: {user.discord_id}")
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         app_access_token = create_access_token(
             data={"sub": str(user.discord_id)},
             expires_delta=access_token_expires
         )
-        print(f"DEBUG: JWT token created: {app_access_token[:50]}...")
+
+        logger.info(
+            "login_timing",
+            user=user.discord_username,
+            total_ms=round((time.perf_counter() - login_started) * 1000, 1),
+            steps=timings
+        )
 
         # Перенаправляем на фронтенд с токеном
         redirect_url = f"{settings.FRONTEND_URL}/auth/callback?token={app_access_token}"
@@ -230,7 +313,7 @@ async def discord_callback(
 
 
 @router.post("/logout")
-async def logout(
+def logout(
         request: Request,
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_user),
@@ -257,16 +340,16 @@ async def logout(
 
 
 @router.get("/me")
-async def get_current_user_info(
+def get_current_user_info(
         request: Request,
+        response: Response,
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_user),
 ):
     """
     Получить информацию о текущем авторизованном пользователе
     """
-    print(f"DEBUG /me endpoint: Called for user {current_user.discord_username if current_user else 'None'}")
-    # Логируем проверку токена
+    # Проверка токена логируется и для ответов 304: запись аудита не зависит от кеша клиента
     ActionLogger.log_action(
         db=db,
         user=current_user,
@@ -281,116 +364,136 @@ async def get_current_user_info(
         request=request
     )
 
+    # Фронтенд периодически опрашивает /auth/me — при неизменном пользователе отвечаем 304
+    not_modified = conditional_response(request, response, "auth/me", current_user.id, current_user.updated_at)
+    if not_modified:
+        return not_modified
+
     return {
         "user": UserSchema.model_validate(current_user),
         "message": "Токен действителен"
     }
 
 
+def _is_recently_refreshed(user: User) -> bool:
+    """
+    Прошлый /auth/refresh был в пределах AUTH_REFRESH_FRESHNESS
+
+    Учитывается только last_refreshed_at: вход и фоновая проверка ролей его не меняют,
+    поэтому первый /auth/refresh после них всегда обращается к Discord и SP-Worlds.
+    """
+    if settings.AUTH_REFRESH_FRESHNESS <= 0:
+        return False
+    refreshed_at = user.last_refreshed_at
+    if refreshed_at is None:
+        return False
+    if refreshed_at.tzinfo is None:
+        refreshed_at = refreshed_at.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - refreshed_at < timedelta(seconds=settings.AUTH_REFRESH_FRESHNESS)
+
+
+async def _lookup_member_for_refresh(
+        user: User,
+        db: Session,
+        token_refresh: Optional[Awaitable[Optional[str]]]
+) -> Tuple[Optional[dict], Optional[str]]:
+    """
+    Участник сервера для /auth/refresh: через Bot API, без токена бота — через OAuth
+    (тогда сначала дожидается обновления Discord токена). Возвращает (данные, текст ошибки).
+    """
+    try:
+        if settings.DISCORD_BOT_TOKEN:
+            member_info = await discord_client.get_guild_member_by_bot(
+                settings.DISCORD_BOT_TOKEN,
+                settings.DISCORD_GUILD_ID,
+                user.discord_id
+            )
+        else:
+            if token_refresh is not None and await token_refresh:
+                db.refresh(user)
+            member_info = await discord_client.get_guild_member(
+                user.discord_access_token,
+                settings.DISCORD_GUILD_ID
+            )
+        return member_info, None
+    except Exception as e:
+        return None, str(e)
+
+
 @router.post("/refresh")
 async def refresh_user_data(
         request: Request,
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_user),
+        force: bool = Query(False, description="Обновить, даже если данные свежие"),
 ):
     """
     Обновить данные пользователя из Discord и SP-Worlds
+
+    Если прошлый вызов был недавно (AUTH_REFRESH_FRESHNESS), возвращаются сохраненные данные.
     """
+    if not force and _is_recently_refreshed(current_user):
+        return {
+            "user": UserSchema.model_validate(current_user),
+            "message": "Данные актуальны",
+            "refreshed": False
+        }
+
     try:
         # Проверяем, не истек ли Discord токен
-        if current_user.discord_expires_at and current_user.discord_expires_at < datetime.now(timezone.utc):
-            if current_user.discord_refresh_token:
-                # Обновляем токен
-                token_data = await discord_client.refresh_token(current_user.discord_refresh_token)
-                if token_data:
-                    access_token = token_data["access_token"]
-                    refresh_token = token_data["refresh_token"]
-                    expires_in = token_data["expires_in"]
-                    expires_at = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
-
-                    user_crud.update_discord_data(
-                        db,
-                        user=current_user,
-                        discord_access_token=access_token,
-                        discord_refresh_token=refresh_token,
-                        discord_expires_at=expires_at
-                    )
-                    current_user.discord_access_token = access_token
-                else:
-                    raise HTTPException(
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                        detail="Не удалось обновить Discord токен"
-                    )
-            else:
+        token_refresh = None
+        if token_refresh_service.needs_refresh(current_user.discord_expires_at):
+            if not current_user.discord_refresh_token:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Discord токен истек, требуется повторная авторизация"
                 )
+            # Обновляем токен; параллельное обновление для пользователя (проверка ролей) переиспользуется
+            token_refresh = asyncio.ensure_future(token_refresh_service.refresh_user_token(current_user.id))
+
+        # Обновление токена, участник сервера и SP-Worlds — параллельно
+        # (участник через OAuth ждет обновленный токен внутри своей ветки)
+        lookups = [
+            _lookup_member_for_refresh(current_user, db, token_refresh),
+            spworlds_client.find_user(str(current_user.discord_id)),
+            role_checker_service.get_guild_roles()
+        ]
+        if token_refresh is not None:
+            lookups.append(token_refresh)
+        try:
+            results = await asyncio.gather(*lookups)
+        finally:
+            # Само обновление (single-flight под shield) доводит сервис токенов, без ожидающих
+            if token_refresh is not None and not token_refresh.done():
+                token_refresh.cancel()
+        (member_info, member_error), spworlds_data, guild_roles = results[:3]
+
+        if token_refresh is not None:
+            if not results[3]:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Не удалось обновить Discord токен"
+                )
+            db.refresh(current_user)
 
-        # Получаем обновленные данные из SP-Worlds
-        print(f"DEBUG REFRESH: Fetching SP-Worlds data for Discord ID: {current_user.discord_id}")
-        spworlds_data = await spworlds_client.find_user(str(current_user.discord_id))
-        print(f"DEBUG REFRESH: SP-Worlds response: {spworlds_data}")
         minecraft_username = spworlds_data.get("username") if spworlds_data else None
         minecraft_uuid = spworlds_data.get("uuid") if spworlds_data else None
-        print(f"DEBUG REFRESH: Extracted minecraft_username: {minecraft_username}, minecraft_uuid: {minecraft_uuid}")
+        logger.debug("spworlds_user_resolved", discord_id=current_user.discord_id, minecraft_username=minecraft_username)
 
-        # Получаем обновленную информацию о ролях через Bot API
-        if settings.DISCORD_BOT_TOKEN:
-            try:
-                member_info = await discord_client.get_guild_member_by_bot(
-                    settings.DISCORD_BOT_TOKEN,
-                    settings.DISCORD_GUILD_ID,
-                    current_user.discord_id
-                )
-                
-                if member_info:
-                    user_roles = member_info.get("roles", [])
-                    # Определяем роль на основе Discord ролей
-                    user_role = discord_client.determine_user_role(member_info)
-                    
-                    # Если нет admin/police ролей, назначаем citizen
-                    if user_role is None:
-                        user_role = "citizen"
-                        print(f"DEBUG REFRESH: User {current_user.discord_username} has no admin/police roles, assigned citizen role")
-                else:
-                    # Пользователь не в сервере или бот не видит его, назначаем citizen
-                    user_role = "citizen"
-                    user_roles = []
-                    print(f"DEBUG REFRESH: User {current_user.discord_username} not in server or bot can't access, assigned citizen role")
-            except Exception as e:
-                print(f"DEBUG: Bot API error during refresh: {e}")
-                # При ошибке Bot API назначаем роль citizen
-                user_role = "citizen"
-                user_roles = []
-                print(f"DEBUG REFRESH: Bot API error, assigning citizen role to {current_user.discord_username}")
+        if member_error:
+            # При ошибке Discord API назначаем роль citizen
+            logger.warning("discord_api_error", user=current_user.discord_username, error=member_error, role="citizen")
+            user_role = "citizen"
+            user_roles = []
+        elif not member_info:
+            # Пользователь не в сервере или бот не видит его, назначаем citizen
+            logger.debug("discord_member_not_visible", user=current_user.discord_username, role="citizen")
+            user_role = "citizen"
+            user_roles = []
         else:
-            # Fallback через обычный OAuth токен (менее надежно)
-            try:
-                member_info = await discord_client.get_guild_member(
-                    current_user.discord_access_token,
-                    settings.DISCORD_GUILD_ID
-                )
-
-                if member_info:
-                    user_roles = member_info.get("roles", [])
-                    user_role = discord_client.determine_user_role(member_info)
-                    
-                    # Если нет admin/police ролей, назначаем citizen
-                    if user_role is None:
-                        user_role = "citizen"
-                        print(f"DEBUG REFRESH: User {current_user.discord_username} has no admin/police roles, assigned citizen role")
-                else:
-                    # Пользователь не в сервере, назначаем citizen
-                    user_role = "citizen"
-                    user_roles = []
-                    print(f"DEBUG REFRESH: User {current_user.discord_username} not in server, assigned citizen role")
-            except Exception as e:
-                print(f"DEBUG: OAuth API error during refresh: {e}")
-                # При ошибке OAuth API назначаем роль citizen
-                user_role = "citizen"
-                user_roles = []
-                print(f"DEBUG REFRESH: OAuth API error, assigning citizen role to {current_user.discord_username}")
+            user_roles = member_info.get("roles", [])
+            # Роль определяется так же, как в фоновой проверке (по ID, затем по именам ролей сервера)
+            user_role = role_checker_service.determine_user_role(member_info, guild_roles)
 
         # Проверяем, изменилась ли роль
         role_changed = current_user.role != user_role
@@ -403,7 +506,8 @@ async def refresh_user_data(
             minecraft_username=minecraft_username,
             minecraft_uuid=minecraft_uuid,
             role=user_role,
-            discord_roles=user_roles
+            discord_roles=user_roles,
+            refreshed_at=datetime.now(timezone.utc)
         )
 
         # Логируем изменение роли отдельно
@@ -438,9 +542,18 @@ async def refresh_user_data(
             request=request
         )
 
+        # Фоновая проверка ролей может переиспользовать этот результат
+        role_checker_service.remember_user_roles(current_user.id, {
+            "role": user_role,
+            "has_access": True,
+            "discord_roles": user_roles,
+            "minecraft_username": minecraft_username
+        })
+
         return {
             "user": UserSchema.model_validate(updated_user),
-            "message": "Данные обновлены успешно"
+            "message": "Данные обновлены успешно",
+            "refreshed": True
         }
 
     except HTTPException:
@@ -454,7 +567,7 @@ async def refresh_user_data(
 
 
 @router.post("/refresh-token")
-async def refresh_token(
+def refresh_token(
         request: Request,
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_user_for_refresh),
@@ -1,5 +1,4 @@
 import asyncio
-import json
 from typing import AsyncGenerator, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
@@ -7,82 +6,64 @@ from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.core.deps import get_current_user, get_current_user_by_token
+from app.core.metrics import SSE_CONNECTIONS
 from app.models.user import User
-from app.services.role_checker import role_checker_service
+from app.services.sse_registry import SSEConnection, sse_registry
+from app.utils.serialization import sse_frame
 
 router = APIRouter()
 
-# Глобальный словарь для хранения подключенных клиентов
-connected_clients = {}
+# Статические кадры кодируются один раз при импорте
+CONNECTED_FRAME = sse_frame({"event": "connected", "data": {"message": "Connected to role updates"}})
+HEARTBEAT_FRAME = sse_frame({"event": "heartbeat", "data": {}})
 
+# Интервал heartbeat в секундах
+HEARTBEAT_INTERVAL = 30.0
 
-class SSEConnection:
-    def __init__(self, user_id: int):
-        self.user_id = user_id
-        self.queue = asyncio.Queue()
-        self.connected = True
-
-    async def send_data(self, data: dict):
-        """Отправляет данные в SSE поток"""
-        if self.connected:
-            await self.queue.put(data)
-
-    async def disconnect(self):
-        """Отключает SSE соединение"""
-        self.connected = False
-        await self.queue.put(None)  # Сигнал для завершения генератора
+SSE_CONNECTIONS.set_function(lambda: len(sse_registry))
 
 
 async def send_role_update_to_user(user_id: int, role_data: dict):
     """Отправляет обновление роли конкретному пользователю"""
-    if user_id in connected_clients:
-        connection = connected_clients[user_id]
-        await connection.send_data({
-            "event": "role_update",
-            "data": role_data
-        })
+    sse_registry.send_to_user(user_id, {
+        "event": "role_update",
+        "data": role_data
+    })
 
 
-async def send_role_update_to_all_admins(role_data: dict):
+async def send_role_update_to_all_admins(role_data: dict, exclude_user_id: Optional[int] = None):
     """Отправляет обновление роли всем администраторам"""
-    admin_connections = {
-        user_id: conn for user_id, conn in connected_clients.items()
-        if conn.user_id in [user_id for user_id, conn in connected_clients.items()]
-    }
-    
-    for connection in admin_connections.values():
-        await connection.send_data({
-            "event": "role_update",
-            "data": role_data
-        })
+    sse_registry.send_to_role("admin", {
+        "event": "role_update",
+        "data": role_data
+    }, exclude_user_id=exclude_user_id)
 
 
-async def event_generator(connection: SSEConnection) -> AsyncGenerator[str, None]:
+async def event_generator(connection: SSEConnection) -> AsyncGenerator[bytes, None]:
     """Генератор SSE событий"""
     try:
         # Отправляем подтверждение подключения
-        yield f"data: {json.dumps({'event': 'connected', 'data': {'message': 'Connected to role updates'}})}\n\n"
+        yield CONNECTED_FRAME
         
         while connection.connected:
             try:
                 # Ждем данные с таймаутом для heartbeat
-                data = await asyncio.wait_for(connection.queue.get(), timeout=30.0)
+                data = await connection.next_event(HEARTBEAT_INTERVAL)
                 
                 if data is None:  # Сигнал отключения
                     break
                     
-                yield f"data: {json.dumps(data)}\n\n"
+                yield sse_frame(data)
                 
             except asyncio.TimeoutError:
                 # Отправляем heartbeat каждые 30 секунд
-                yield f"data: {json.dumps({'event': 'heartbeat', 'data': {'timestamp': asyncio.get_event_loop().time()}})}\n\n"
+                yield HEARTBEAT_FRAME
                 
     except Exception as e:
-        yield f"data: {json.dumps({'event': 'error', 'data': {'message': str(e)}})}\n\n"
+        yield sse_frame({"event": "error", "data": {"message": str(e)}})
     finally:
         # Удаляем соединение при отключении
-        if connection.user_id in connected_clients:
-            del connected_clients[connection.user_id]
+        sse_registry.unregister(connection)
 
 
 @router.get("/role-updates")
@@ -97,8 +78,7 @@ async def role_updates_stream(
     current_user = await get_current_user_by_token(token, db)
     
     # Создаем новое соединение
-    connection = SSEConnection(current_user.id)
-    connected_clients[current_user.id] = connection
+    connection = sse_registry.register(current_user.id, current_user.role)
     
     # Возвращаем SSE поток
     return StreamingResponse(
@@ -124,8 +104,9 @@ async def get_sse_status(
         raise HTTPException(status_code=403, detail="Access denied")
     
     return {
-        "connected_clients": len(connected_clients),
-        "client_ids": list(connected_clients.keys())
+        "connected_clients": len(sse_registry),
+        "client_ids": sse_registry.user_ids(),
+        **sse_registry.status()
     }
 
 
@@ -143,8 +124,11 @@ async def notify_role_change(user_id: int, old_role: str, new_role: str, user_da
         "user_data": user_data
     }
     
+    # Соединения пользователя переходят в индекс новой роли
+    sse_registry.update_role(user_id, new_role)
+
     # Отправляем обновление конкретному пользователю
     await send_role_update_to_user(user_id, role_update_data)
     
-    # Отправляем обновление всем администраторам
-    await send_role_update_to_all_admins(role_update_data)
\ No newline at end of file
+    # Отправляем обновление всем администраторам (сам пользователь уже получил его)
+    await send_role_update_to_all_admins(role_update_data, exclude_user_id=user_id)
\ No newline at end of file
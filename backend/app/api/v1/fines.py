@@ -1,46 +1,77 @@
+from datetime import datetime
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
 from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_
 
 from app.core.database import get_db
 from app.core.deps import get_current_police_or_admin, get_current_user
+from app.core.logging_config import get_logger
 from app.core.decorators import with_role_check
 from app.crud.fine import fine_crud
 from app.crud.passport import passport_crud
+from app.crud.user import user_crud
 from app.schemas.fine import Fine, FineCreate, FineUpdate, FineWithDetails, IssuerInfo
 from app.models.user import User
+from app.models.user import User as UserModel
+from app.models.fine import Fine as FineModel
 from app.utils.logger import ActionLogger
+from app.utils.serialization import fast_json_response
+from app.core.cache import response_cache, CACHE_FINES_STATS
+
+logger = get_logger(__name__)
 
 router = APIRouter()
 
+# Колонки штрафа, выбираемые для списка (порядок совпадает с кортежем строки)
+# Порядок полей совпадает с FineWithDetails: ответ через orjson побайтно равен model_dump_json
+FINE_LIST_FIELDS = (
+    "passport_id", "article", "amount", "description",
+    "id", "created_by_user_id", "is_paid", "created_at", "updated_at"
+)
+
+
+def fine_with_details(row) -> dict:
+    """
+    Словарь FineWithDetails из строки (колонки FINE_LIST_FIELDS, discord_username, minecraft_username)
+    """
+    *fine_row, discord_username, minecraft_username = row
+    fine_dict = dict(zip(FINE_LIST_FIELDS, fine_row))
+    fine_dict["issuer_info"] = {
+        "user_id": fine_dict["created_by_user_id"],
+        "discord_username": discord_username or "Unknown",
+        "minecraft_username": minecraft_username or "Unknown"
+    }
+    return fine_dict
+
 
 @router.get("/debug")
-async def debug_fines(
+def debug_fines(
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_police_or_admin),
 ):
     """
     Отладочный эндпоинт для проверки штрафов
     """
-    from app.models.fine import Fine as FineModel
-    from app.models.user import User as UserModel
-    
-    print(f"DEBUG: User {current_user.discord_username} requesting debug fines")
-    print(f"DEBUG: User role: {current_user.role}")
     
     # Простой запрос всех штрафов
     all_fines = db.query(FineModel).all()
-    print(f"DEBUG: Total fines in DB: {len(all_fines)}")
     
     # Простой запрос всех пользователей
     all_users = db.query(UserModel).all()
-    print(f"DEBUG: Total users in DB: {len(all_users)}")
     
     # Проверка JOIN
     joined_results = db.query(FineModel, UserModel.discord_username).outerjoin(
         UserModel, FineModel.created_by_user_id == UserModel.id
     ).all()
-    print(f"DEBUG: JOIN results: {len(joined_results)}")
+    logger.debug(
+        "fines_debug",
+        user=current_user.discord_username,
+        role=current_user.role,
+        total_fines=len(all_fines),
+        total_users=len(all_users),
+        join_results=len(joined_results)
+    )
     
     return {
         "total_fines": len(all_fines),
@@ -61,7 +92,7 @@ async def debug_fines(
 
 @router.get("/", response_model=List[FineWithDetails])
 @with_role_check("view_fines")
-async def read_fines(
+def read_fines(
         request: Request,
         db: Session = Depends(get_db),
         skip: int = 0,
@@ -79,19 +110,14 @@ async def read_fines(
     """
     Получить список штрафов с фильтрами и информацией о выписавшем
     """
-    from app.models.user import User as UserModel
-    from datetime import datetime
-    from sqlalchemy import and_, or_
     
     # Базовый запрос с LEFT JOIN на пользователя (чтобы не терять штрафы без пользователя)
-    query = db.query(fine_crud.model, UserModel.discord_username, UserModel.minecraft_username).outerjoin(
+    # Выбираем только нужные колонки, без загрузки ORM-сущностей
+    fine_columns = [getattr(fine_crud.model, field) for field in FINE_LIST_FIELDS]
+    query = db.query(*fine_columns, UserModel.discord_username, UserModel.minecraft_username).outerjoin(
         UserModel, fine_crud.model.created_by_user_id == UserModel.id
     )
     
-    # Отладочная информация
-    print(f"DEBUG: Executing fines query for user {current_user.discord_username} with role {current_user.role}")
-    print(f"DEBUG: Applied filters: passport_id={passport_id}, article={article}, issuer_search={issuer_search}")
-    
     # Список фильтров
     filters = []
     
@@ -137,37 +163,19 @@ async def read_fines(
     if filters:
         query = query.filter(and_(*filters))
     
-    # Отладочная информация перед выполнением
-    print(f"DEBUG: Query before pagination: {query}")
-    
     # Применяем пагинацию и получаем результаты
     results = query.offset(skip).limit(limit).all()
+    logger.debug(
+        "fines_query",
+        user=current_user.discord_username,
+        passport_id=passport_id,
+        article=article,
+        issuer_search=issuer_search,
+        results=len(results)
+    )
     
-    print(f"DEBUG: Found {len(results)} results after pagination")
-    
-    # Формируем ответ с информацией о выписавшем
-    fines_with_details = []
-    for fine, discord_username, minecraft_username in results:
-        fine_dict = {
-            "id": fine.id,
-            "passport_id": fine.passport_id,
-            "article": fine.article,
-            "amount": fine.amount,
-            "description": fine.description,
-            "created_by_user_id": fine.created_by_user_id,
-            "is_paid": fine.is_paid,
-            "created_at": fine.created_at,
-            "updated_at": fine.updated_at,
-            "issuer_info": {
-                "user_id": fine.created_by_user_id,
-                "discord_username": discord_username or "Unknown",
-                "minecraft_username": minecraft_username or "Unknown"
-            }
-        }
-        print(f"DEBUG: Processing fine {fine.id} by user {discord_username}")
-        fines_with_details.append(fine_dict)
-
-    print(f"DEBUG: Returning {len(fines_with_details)} fines to client")
+    # Формируем ответ с информацией о выписавшем прямо из кортежей строк
+    fines_with_details = [fine_with_details(row) for row in results]
     
     # Логируем просмотр списка штрафов
     ActionLogger.log_action(
@@ -187,7 +195,8 @@ async def read_fines(
         request=request
     )
 
-    return fines_with_details
+    # Словари уже соответствуют FineWithDetails — сериализуем напрямую через orjson
+    return fast_json_response(fines_with_details)
 
 
 @router.get("/my", response_model=List[Fine])
@@ -222,7 +231,7 @@ def read_my_fines(
 
 
 @router.get("/me", response_model=List[Fine])
-async def read_fines_on_me(
+def read_fines_on_me(
         request: Request,
         db: Session = Depends(get_db),
         skip: int = 0,
@@ -264,7 +273,7 @@ async def read_fines_on_me(
 
 @router.post("/", response_model=Fine)
 @with_role_check("create_fine")
-async def create_fine(
+def create_fine(
         request: Request,
         *,
         db: Session = Depends(get_db),
@@ -344,7 +353,7 @@ def read_fine(
 
 @router.put("/{fine_id}", response_model=Fine)
 @with_role_check("update_fine")
-async def update_fine(
+def update_fine(
         request: Request,
         *,
         db: Session = Depends(get_db),
@@ -403,7 +412,7 @@ async def update_fine(
 
 @router.delete("/{fine_id}", response_model=Fine)
 @with_role_check("delete_fine")
-async def delete_fine(
+def delete_fine(
         request: Request,
         *,
         db: Session = Depends(get_db),
@@ -516,7 +525,6 @@ def get_officer_statistics(
     stats = fine_crud.get_statistics_by_user(db, user_id=user_id)
 
     # Получаем информацию о пользователе
-    from app.crud.user import user_crud
     target_user = user_crud.get(db, id=user_id)
 
     if not target_user:
@@ -552,60 +560,26 @@ def get_officer_statistics(
 def get_fines_overview(
         request: Request,
         db: Session = Depends(get_db),
+        date_from: Optional[str] = Query(None, description="Дата создания с (YYYY-MM-DD)"),
+        date_to: Optional[str] = Query(None, description="Дата создания до (YYYY-MM-DD)"),
         current_user: User = Depends(get_current_police_or_admin),
 ):
     """
-    Получить общую статистику по штрафам
+    Получить общую статистику по штрафам (опционально за период)
     """
-    from sqlalchemy import func
-    from app.models.fine import Fine as FineModel
-
-    # Общая статистика
-    total_fines = db.query(func.count(FineModel.id)).scalar()
-    total_amount = db.query(func.sum(FineModel.amount)).scalar()
-    avg_amount = db.query(func.avg(FineModel.amount)).scalar()
-
-    # Топ статей нарушений
-    top_articles = db.query(
-        FineModel.article,
-        func.count(FineModel.id).label('count'),
-        func.sum(FineModel.amount).label('total_amount')
-    ).group_by(FineModel.article).order_by(func.count(FineModel.id).desc()).limit(10).all()
-
-    # Статистика по сотрудникам
-    officer_stats = db.query(
-        FineModel.created_by_user_id,
-        func.count(FineModel.id).label('count'),
-        func.sum(FineModel.amount).label('total_amount')
-    ).group_by(FineModel.created_by_user_id).order_by(func.count(FineModel.id).desc()).all()
-
-    # Получаем имена сотрудников
-    from app.crud.user import user_crud
-    officer_details = []
-    for user_id, count, amount in officer_stats:
-        user = user_crud.get(db, id=user_id)
-        officer_details.append({
-            "user_id": user_id,
-            "username": user.minecraft_username if user else "Unknown",
-            "discord_username": user.discord_username if user else "Unknown",
-            "fines_count": count,
-            "total_amount": amount or 0
-        })
-
-    stats = {
-        "total_fines": total_fines,
-        "total_amount": total_amount or 0,
-        "average_amount": float(avg_amount) if avg_amount else 0,
-        "top_articles": [
-            {
-                "article": article,
-                "count": count,
-                "total_amount": total_amount or 0
-            }
-            for article, count, total_amount in top_articles
-        ],
-        "officers": officer_details
-    }
+    try:
+        start_date = datetime.strptime(date_from, "%Y-%m-%d") if date_from else None
+        end_date = datetime.strptime(date_to, "%Y-%m-%d") if date_to else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Неверный формат даты, ожидается YYYY-MM-DD"
+        )
+
+    stats = response_cache.get_or_set(
+        response_cache.build_key(CACHE_FINES_STATS, request),
+        lambda: fine_crud.get_overview_statistics(db, date_from=start_date, date_to=end_date)
+    )
 
     # Логируем просмотр общей статистики
     ActionLogger.log_action(
@@ -615,6 +589,8 @@ def get_fines_overview(
         entity_type="fine",
         details={
             "stats": stats,
+            "date_from": date_from,
+            "date_to": date_to,
             "officer": current_user.minecraft_username
         },
         request=request
@@ -0,0 +1,119 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.core.deps import get_current_active_admin
+from app.crud.job import job_crud
+from app.schemas.job import Job
+from app.models.user import User
+from app.utils.logger import ActionLogger
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[Job])
+def read_jobs(
+        db: Session = Depends(get_db),
+        skip: int = 0,
+        limit: int = Query(50, ge=1, le=200),
+        job_type: Optional[str] = Query(None, description="Фильтр по типу задачи"),
+        job_status: Optional[str] = Query(None, alias="status", description="Фильтр по статусу"),
+        current_user: User = Depends(get_current_active_admin),
+):
+    """
+    Получить список последних фоновых задач (только для администраторов)
+    """
+    return job_crud.get_recent(db, job_type=job_type, status=job_status, skip=skip, limit=limit)
+
+
+@router.post("/violations-recount", response_model=Job)
+def enqueue_violations_recount(
+        request: Request,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_active_admin),
+):
+    """
+    Поставить в очередь пересчет нарушений во всех паспортах (только для администраторов)
+    """
+    job, created = job_crud.enqueue(
+        db,
+        job_type="violations_recount",
+        dedup_key="violations_recount",
+        created_by_user_id=current_user.id
+    )
+
+    if created:
+        ActionLogger.log_action(
+            db=db,
+            user=current_user,
+            action="ENQUEUE_VIOLATIONS_RECOUNT",
+            entity_type="job",
+            entity_id=job.id,
+            details={
+                "triggered_by": current_user.discord_username
+            },
+            request=request
+        )
+
+    return job
+
+
+@router.get("/{job_id}", response_model=Job)
+def read_job(
+        job_id: int,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_active_admin),
+):
+    """
+    Получить состояние фоновой задачи с прогрессом (только для администраторов)
+    """
+    job = job_crud.get(db, id=job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Задача не найдена"
+        )
+    return job
+
+
+@router.post("/{job_id}/cancel", response_model=Job)
+def cancel_job(
+        request: Request,
+        job_id: int,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_active_admin),
+):
+    """
+    Отменить фоновую задачу (только для администраторов)
+    """
+    job = job_crud.get(db, id=job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Задача не найдена"
+        )
+
+    if job.status not in ("pending", "running"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Задача уже завершена со статусом {job.status}"
+        )
+
+    job = job_crud.request_cancel(db, job=job)
+
+    # Логируем отмену задачи
+    ActionLogger.log_action(
+        db=db,
+        user=current_user,
+        action="CANCEL_JOB",
+        entity_type="job",
+        entity_id=job.id,
+        details={
+            "job_type": job.job_type,
+            "cancelled_by": current_user.discord_username
+        },
+        request=request
+    )
+
+    return job
@@ -1,21 +1,48 @@
+import csv
+import json
+from io import StringIO
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 from app.core.database import get_db
 from app.core.deps import get_current_active_admin, get_current_police_or_admin
 from app.core.decorators import with_role_check
 from app.crud.log import log_crud
-from app.schemas.log import Log, LogResponse
+from app.crud.log_catalog import log_catalog_crud
+from app.crud.user import user_crud
+from app.schemas.log import Log, LogPagination, LogResponse
 from app.models.user import User
+from app.utils.http_cache import conditional_response, CACHE_PRIVATE_SHORT
+from app.utils.logger import ActionLogger
+from app.core.cache import response_cache, CACHE_LOGS_CATALOG
 
 router = APIRouter()
 
+# Служебные действия, которые не показываются в общем списке логов
+EXCLUDED_ACTIONS = (
+    'GET_SKIN', 'GET_SKIN_BY_DISCORD', 'GET_AVATAR_BY_NICKNAME',
+    'TOKEN_REFRESH', 'VIEW_STATISTICS', 'VIEW_OWN_PASSPORT', 'VIEW_FINES_ON_ME'
+)
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    """
+    Разобрать дату в формате YYYY-MM-DD (некорректное значение игнорируется)
+    """
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        return None
+
 
 @router.get("/", response_model=LogResponse)
 @with_role_check("view_logs")
-async def read_logs(
+def read_logs(
         db: Session = Depends(get_db),
         page: int = Query(0, ge=0, description="Номер страницы (с 0)"),
         page_size: int = Query(20, ge=1, le=500, description="Размер страницы"),
@@ -34,90 +61,35 @@ async def read_logs(
     """
     Получить список логов с пагинацией и расширенными фильтрами (только для администраторов)
     """
-    from sqlalchemy import and_, or_
-    from app.models.log import Log as LogModel
-    from app.models.user import User as UserModel
-    
     # Вычисляем skip на основе page и page_size
     skip = page * page_size
     limit = page_size
-    
-    # Базовый запрос с джойном на пользователя для фильтрации по роли
-    # Администраторы видят все логи, поэтому никаких ограничений по user_id не добавляем
-    query = db.query(LogModel).join(UserModel, LogModel.user_id == UserModel.id, isouter=True)
-    count_query = db.query(LogModel).join(UserModel, LogModel.user_id == UserModel.id, isouter=True)
-    
-    # Список фильтров
-    filters = []
-    
-    # Исключаем нежелательные действия
-    excluded_actions = [
-        'GET_SKIN', 'GET_SKIN_BY_DISCORD', 'GET_AVATAR_BY_NICKNAME',
-        'TOKEN_REFRESH', 'VIEW_STATISTICS', 'VIEW_OWN_PASSPORT', 'VIEW_FINES_ON_ME'
-    ]
-    filters.append(~LogModel.action.in_(excluded_actions))
-    
+
     # Фильтр по дате (days или date_from/date_to)
+    start_date = None
+    end_date = None
     if date_from or date_to:
-        if date_from:
-            try:
-                start_date = datetime.strptime(date_from, "%Y-%m-%d")
-                filters.append(LogModel.created_at >= start_date)
-            except ValueError:
-                pass
-        
-        if date_to:
-            try:
-                end_date = datetime.strptime(date_to, "%Y-%m-%d")
-                filters.append(LogModel.created_at <= end_date)
-            except ValueError:
-                pass
+        start_date = _parse_date(date_from)
+        end_date = _parse_date(date_to)
     elif days:
-        start_date = datetime.now() - timedelta(days=days)
-        filters.append(LogModel.created_at >= start_date)
-    
-    # Остальные фильтры
-    if user_id:
-        filters.append(LogModel.user_id == user_id)
-    
-    if action:
-        filters.append(LogModel.action == action)
-    
-    if entity_type:
-        filters.append(LogModel.entity_type == entity_type)
-    
-    if entity_id:
-        filters.append(LogModel.entity_id == entity_id)
-    
-    if user_role:
-        filters.append(UserModel.role == user_role)
-    
-    if ip_address:
-        filters.append(LogModel.ip_address.ilike(f"%{ip_address}%"))
-    
-    # Поиск по различным полям (новая функциональность)
-    if search:
-        search_term = f"%{search}%"
-        search_filters = [
-            LogModel.action.ilike(search_term),
-            LogModel.entity_type.ilike(search_term),
-            LogModel.ip_address.ilike(search_term),
-            UserModel.discord_username.ilike(search_term),
-            UserModel.minecraft_username.ilike(search_term)
-        ]
-        filters.append(or_(*search_filters))
-    
-    # Применяем все фильтры
-    if filters:
-        query = query.filter(and_(*filters))
-        count_query = count_query.filter(and_(*filters))
-    
-    # Сортировка по времени создания (новые записи сначала)
-    query = query.order_by(LogModel.created_at.desc())
-    
-    # Применяем пагинацию
-    logs = query.offset(skip).limit(limit).all()
-    total_count = count_query.count()
+        start_date = datetime.now(timezone.utc) - timedelta(days=days)
+
+    # Администраторы видят все логи, поэтому никаких ограничений по user_id не добавляем
+    filters = dict(
+        user_id=user_id,
+        action=action,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        date_from=start_date,
+        date_to=end_date,
+        exclude_actions=EXCLUDED_ACTIONS,
+        ip_address=ip_address,
+        user_role=user_role,
+        search=search
+    )
+
+    logs = log_crud.get_filtered(db, skip=skip, limit=limit, **filters)
+    total_count = log_crud.count_filtered(db, **filters)
 
     # Преобразуем SQLAlchemy модели в Pydantic схемы
     log_schemas = [Log.model_validate(log) for log in logs]
@@ -127,7 +99,6 @@ async def read_logs(
     has_prev = page > 0
     total_pages = (total_count + page_size - 1) // page_size
 
-    from app.schemas.log import LogPagination
     
     return LogResponse(
         logs=log_schemas,
@@ -144,10 +115,10 @@ async def read_logs(
 
 @router.get("/my", response_model=List[Log])
 @with_role_check("view_my_logs")
-async def read_my_logs(
+def read_my_logs(
         db: Session = Depends(get_db),
-        skip: int = 0,
-        limit: int = 100,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=500),
         action: Optional[str] = Query(None, description="Фильтр по типу действия"),
         entity_type: Optional[str] = Query(None, description="Фильтр по типу сущности"),
         days: Optional[int] = Query(90, ge=1, le=365, description="Количество дней назад (по умолчанию 90)"),
@@ -156,19 +127,17 @@ async def read_my_logs(
     """
     Получить логи текущего пользователя
     """
-    # Получаем базовые логи пользователя
-    logs = log_crud.get_by_user_id(db, user_id=current_user.id, skip=skip, limit=limit)
-
-    # Применяем дополнительные фильтры
-    if action:
-        logs = [log for log in logs if log.action == action]
-
-    if entity_type:
-        logs = [log for log in logs if log.entity_type == entity_type]
-
-    if days:
-        cutoff_date = datetime.now() - timedelta(days=days)
-        logs = [log for log in logs if log.created_at >= cutoff_date]
+    # Все фильтры применяются в SQL, страница читается по индексу (user_id, created_at DESC)
+    cutoff_date = datetime.now(timezone.utc) - timedelta(days=days) if days else None
+    logs = log_crud.get_filtered(
+        db,
+        skip=skip,
+        limit=limit,
+        user_id=current_user.id,
+        action=action,
+        entity_type=entity_type,
+        date_from=cutoff_date
+    )
 
     # Преобразуем SQLAlchemy модели в Pydantic схемы
     return [Log.model_validate(log) for log in logs]
@@ -185,10 +154,8 @@ def get_user_activity(
     Получить статистику активности пользователя (только для администраторов)
     """
     # Проверяем, что пользователь существует
-    from app.crud.user import user_crud
     target_user = user_crud.get(db, id=user_id)
     if not target_user:
-        from fastapi import HTTPException, status
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Пользователь не найден"
@@ -207,64 +174,66 @@ def get_user_activity(
 
 @router.get("/actions")
 def get_available_actions(
+        request: Request,
+        response: Response,
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_police_or_admin),
 ):
     """
     Получить список доступных типов действий
     """
-    from sqlalchemy import func, distinct
-    from app.models.log import Log as LogModel
+    # Чтение справочника log_catalog вместо DISTINCT по всей таблице logs;
+    # кеш сбрасывается при появлении новой пары (действие, тип сущности)
+    result = response_cache.get_or_set(
+        response_cache.build_key(CACHE_LOGS_CATALOG, request),
+        lambda: log_catalog_crud.get_catalog(db),
+        ttl=300
+    )
 
-    actions = db.query(distinct(LogModel.action)).all()
-    entity_types = db.query(distinct(LogModel.entity_type)).all()
+    not_modified = conditional_response(request, response, "logs/actions", result, cache_control=CACHE_PRIVATE_SHORT)
+    if not_modified:
+        return not_modified
 
-    return {
-        "actions": [action[0] for action in actions if action[0]],
-        "entity_types": [entity_type[0] for entity_type in entity_types if entity_type[0]]
-    }
+    return result
 
 
 @router.get("/security")
 def get_security_logs(
         db: Session = Depends(get_db),
-        skip: int = 0,
-        limit: int = 100,
-        days: int = Query(30, description="Количество дней назад"),
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=500),
+        days: int = Query(30, ge=1, description="Количество дней назад"),
+        cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа)"),
         current_user: User = Depends(get_current_active_admin),
 ):
     """
     Получить логи безопасности (только для администраторов)
     """
-    start_date = datetime.now() - timedelta(days=days)
-
-    # Получаем логи связанные с безопасностью
-    security_actions = [
-        "LOGIN", "LOGOUT", "LOGIN_FAILED", "LOGIN_BLOCKED",
-        "TOKEN_CHECK", "SECURITY_EVENT", "ROLE_CHANGED",
-        "EMERGENCY_STATUS_CHANGE", "DEACTIVATE", "ACTIVATE"
-    ]
-
-    logs = []
-    for action in security_actions:
-        action_logs = log_crud.get_by_action(db, action=action, skip=0, limit=limit)
-        # Фильтруем по дате
-        filtered_logs = [log for log in action_logs if log.created_at >= start_date]
-        logs.extend(filtered_logs)
-
-    # Сортируем по дате (новые сначала)
-    logs.sort(key=lambda x: x.created_at, reverse=True)
-
-    # Применяем пагинацию
-    paginated_logs = logs[skip:skip + limit]
+    start_date = datetime.now(timezone.utc) - timedelta(days=days)
+
+    # Курсор кодирует (created_at, id) последней записи предыдущей страницы
+    before = None
+    if cursor:
+        try:
+            before = log_crud.decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Некорректный курсор"
+            )
+
+    logs = log_crud.get_security_feed(db, since=start_date, before=before, skip=skip, limit=limit)
+    total = log_crud.count_security_events(db, since=start_date)
+
+    next_cursor = None
+    if len(logs) == limit:
+        next_cursor = log_crud.encode_cursor(logs[-1])
 
-    # Преобразуем SQLAlchemy модели в Pydantic схемы
-    paginated_log_schemas = [Log.model_validate(log) for log in paginated_logs]
-    
     return {
-        "logs": paginated_log_schemas,
-        "total_security_events": len(logs),
-        "period_days": days
+        "logs": [Log.model_validate(log) for log in logs],
+        "total_security_events": total,
+        "period_days": days,
+        "next_cursor": next_cursor
     }
 
 
@@ -275,34 +244,26 @@ def export_logs(
         action: Optional[str] = Query(None, description="Тип действия"),
         entity_type: Optional[str] = Query(None, description="Тип сущности"),
         days: int = Query(30, description="Период в днях"),
+        limit: int = Query(1000, ge=1, le=10000, description="Максимальное количество записей"),
         format: str = Query("json", description="Формат экспорта (json/csv)"),
         current_user: User = Depends(get_current_active_admin),
 ):
     """
     Экспорт логов (только для администраторов)
     """
-    from fastapi.responses import JSONResponse, PlainTextResponse
-    import json
-    import csv
-    from io import StringIO
-
-    # Получаем логи по фильтрам
-    start_date = datetime.now() - timedelta(days=days)
-
-    if user_id:
-        logs = log_crud.get_by_user_id(db, user_id=user_id)
-    elif action:
-        logs = log_crud.get_by_action(db, action=action)
-    elif entity_type:
-        logs = log_crud.get_by_entity_type(db, entity_type=entity_type)
-    else:
-        logs = log_crud.get_by_date_range(db, start_date=start_date)
 
-    # Фильтруем по дате
-    filtered_logs = [log for log in logs if log.created_at >= start_date]
+    # Получаем логи по фильтрам (все фильтры применяются одновременно)
+    start_date = datetime.now(timezone.utc) - timedelta(days=days)
+    filtered_logs = log_crud.get_filtered(
+        db,
+        limit=limit,
+        user_id=user_id,
+        action=action,
+        entity_type=entity_type,
+        date_from=start_date
+    )
 
     # Логируем экспорт
-    from app.utils.logger import ActionLogger
     ActionLogger.log_export_action(
         db=db,
         user=current_user,
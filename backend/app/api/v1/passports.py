@@ -1,10 +1,14 @@
+from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
 from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_
 
 from app.core.database import get_db
 from app.core.deps import get_current_police_or_admin, get_current_user_with_minecraft, get_current_user, get_current_active_admin
 from app.core.decorators import with_role_check
+from app.core.execution import run_db
+from app.core.logging_config import get_logger
 from app.crud.passport import passport_crud
 from app.schemas.passport import (
     Passport,
@@ -17,16 +21,21 @@ from app.schemas.passport import (
     PlayerSkinResponse
 )
 from app.models.user import User
+from app.models.passport import Passport as PassportModel
 from app.utils.logger import ActionLogger
+from app.utils.http_cache import conditional_response
+from app.core.cache import response_cache, CACHE_PASSPORTS_STATS
 from app.clients.spworlds import spworlds_client
 from app.clients.bt_api import bt_client
 
+logger = get_logger(__name__)
+
 router = APIRouter()
 
 
 @router.get("/", response_model=List[Passport])
 @with_role_check("view_passports")
-async def read_passports(
+def read_passports(
         request: Request,
         db: Session = Depends(get_db),
         skip: int = 0,
@@ -46,9 +55,6 @@ async def read_passports(
     """
     Получить список паспортов с возможностью поиска и фильтрации
     """
-    from sqlalchemy import or_, and_
-    from app.models.passport import Passport as PassportModel
-    from datetime import datetime
     
     # Базовый запрос
     query = db.query(PassportModel)
@@ -137,30 +143,33 @@ async def read_passports(
 @router.get("/me", response_model=Passport)
 async def get_my_passport(
         request: Request,
+        response: Response,
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_user),
 ):
     """
     Получить свой паспорт (для обычных пользователей с паспортом) с балансом баллов труда
     """
-    passport = passport_crud.get_by_discord_id(db, discord_id=str(current_user.discord_id))
+    # Обращения к БД выполняются в пуле потоков, event loop ждет только BT API
+    passport = await run_db(passport_crud.get_by_discord_id, db, discord_id=str(current_user.discord_id))
     if not passport:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="У вас нет паспорта в системе",
         )
 
-    # Получаем баланс баллов труда
+    # Баланс берется из кеша клиента BT: повторные запросы с If-None-Match
+    # в пределах BT_BALANCE_CACHE_TTL получают 304 без обращения к BT API
     try:
-        bt_balance = await bt_client.get_user_bt(str(current_user.discord_id))
+        bt_balance = await bt_client.get_cached_user_bt(str(current_user.discord_id))
         passport.bt_balance = bt_balance
-        print(f"DEBUG: BT balance for user {current_user.discord_id}: {bt_balance}")  # Отладка
     except Exception as e:
-        print(f"DEBUG: Error getting BT balance for user {current_user.discord_id}: {e}")
+        logger.warning("bt_balance_failed", discord_id=current_user.discord_id, error=str(e))
         passport.bt_balance = None
 
-    # Логируем просмотр собственного паспорта
-    ActionLogger.log_action(
+    # Логируем просмотр собственного паспорта (и перед ответом 304)
+    await run_db(
+        ActionLogger.log_action,
         db=db,
         user=current_user,
         action="VIEW_OWN_PASSPORT",
@@ -176,6 +185,14 @@ async def get_my_passport(
         request=request
     )
 
+    # Баланс баллов труда хранится во внешнем API, поэтому входит в версию ответа
+    not_modified = conditional_response(
+        request, response,
+        "passports/me", passport.id, passport.updated_at, passport.violations_count, passport.bt_balance
+    )
+    if not_modified:
+        return not_modified
+
     return passport
 
 
@@ -223,7 +240,7 @@ async def create_passport(
     Создать новый паспорт
     """
     # Проверяем, что Discord ID уникален
-    if passport_crud.check_discord_id_exists(db, discord_id=passport_in.discord_id):
+    if await run_db(passport_crud.check_discord_id_exists, db, discord_id=passport_in.discord_id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Паспорт с таким Discord ID уже существует",
@@ -232,7 +249,8 @@ async def create_passport(
     passport = await passport_crud.create(db, obj_in=passport_in)
 
     # Логируем создание паспорта
-    ActionLogger.log_passport_created(
+    await run_db(
+        ActionLogger.log_passport_created,
         db=db,
         user=current_user,
         passport_id=passport.id,
@@ -246,6 +264,7 @@ async def create_passport(
 @router.get("/{passport_id}", response_model=Passport)
 async def read_passport(
         request: Request,
+        response: Response,
         *,
         db: Session = Depends(get_db),
         passport_id: int,
@@ -261,7 +280,7 @@ async def read_passport(
             detail="Паспорт не найден",
         )
 
-    # Логируем просмотр конкретного паспорта
+    # Логируем просмотр конкретного паспорта (и перед ответом 304)
     ActionLogger.log_action(
         db=db,
         user=current_user,
@@ -279,6 +298,13 @@ async def read_passport(
         request=request
     )
 
+    not_modified = conditional_response(
+        request, response,
+        "passports", passport.id, passport.updated_at, passport.violations_count, passport.bt_balance
+    )
+    if not_modified:
+        return not_modified
+
     return passport
 
 
@@ -357,7 +383,7 @@ def find_passport_by_discord_id(
 
 @router.put("/{passport_id}", response_model=Passport)
 @with_role_check("update_passport")
-async def update_passport(
+def update_passport(
         request: Request,
         *,
         db: Session = Depends(get_db),
@@ -411,7 +437,7 @@ async def update_passport(
 
 @router.post("/{passport_id}/emergency", response_model=PassportEmergencyResponse)
 @with_role_check("update_passport_emergency")
-async def toggle_emergency_status(
+def toggle_emergency_status(
         request: Request,
         *,
         db: Session = Depends(get_db),
@@ -593,7 +619,7 @@ async def get_skin_by_discord_id(
 
 @router.delete("/{passport_id}", response_model=Passport)
 @with_role_check("delete_passport")
-async def delete_passport(
+def delete_passport(
         request: Request,
         *,
         db: Session = Depends(get_db),
@@ -644,39 +670,10 @@ def get_passports_statistics(
     """
     Получить статистику по паспортам
     """
-    from sqlalchemy import func
-    from app.models.passport import Passport as PassportModel
-
-    # Общая статистика
-    total_passports = db.query(func.count(PassportModel.id)).scalar()
-    emergency_count = db.query(func.count(PassportModel.id)).filter(PassportModel.is_emergency == True).scalar()
-
-    # Статистика по городам
-    cities_stats = db.query(
-        PassportModel.city,
-        func.count(PassportModel.id).label('count')
-    ).group_by(PassportModel.city).all()
-
-    # Статистика по полу
-    gender_stats = db.query(
-        PassportModel.gender,
-        func.count(PassportModel.id).label('count')
-    ).group_by(PassportModel.gender).all()
-
-    # Статистика по возрасту
-    avg_age = db.query(func.avg(PassportModel.age)).scalar()
-
-    # Статистика по нарушениям
-    total_violations = db.query(func.sum(PassportModel.violations_count)).scalar()
-
-    stats = {
-        "total_passports": total_passports,
-        "emergency_count": emergency_count,
-        "cities": [{"city": city, "count": count} for city, count in cities_stats],
-        "gender_distribution": [{"gender": gender, "count": count} for gender, count in gender_stats],
-        "average_age": float(avg_age) if avg_age else 0,
-        "total_violations": total_violations or 0
-    }
+    stats = response_cache.get_or_set(
+        response_cache.build_key(CACHE_PASSPORTS_STATS, request),
+        lambda: passport_crud.get_statistics(db)
+    )
 
     # Логируем просмотр статистики
     ActionLogger.log_action(
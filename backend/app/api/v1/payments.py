@@ -7,9 +7,11 @@ import json
 from app.core.database import get_db
 from app.core.deps import get_current_user
 from app.core.config import settings
+from app.core.cache import response_cache, CACHE_FINES_STATS
 from app.crud import payment, fine_crud
 from app.models.user import User
 from app.models.fine import Fine
+from app.models.passport import Passport
 from app.schemas.payment import (
     PaymentCreate, 
     PaymentResponse, 
@@ -20,6 +22,7 @@ from app.schemas.payment import (
 from app.clients.spworlds import spworlds_client
 from app.clients.bt_api import bt_client
 from app.utils.currency import convert_ar_to_bt
+from app.utils.logger import ActionLogger
 
 router = APIRouter()
 
@@ -36,7 +39,6 @@ async def create_payment(
     # Проверяем, что пользователь может оплачивать штрафы этого паспорта
     # Для обычных жителей - только свои штрафы
     if current_user.role != "admin":
-        from app.models.passport import Passport
         user_fines = db.query(Fine).join(Passport).filter(
             Fine.id.in_(payment_data.fine_ids),
             Passport.discord_id == str(current_user.discord_id)
@@ -197,7 +199,6 @@ def get_user_payments(
     Получить все платежи текущего пользователя
     """
     # Получаем паспорта пользователя
-    from app.models.passport import Passport
     user_passports = db.query(Fine).join(Passport).filter(
         Passport.discord_id == str(current_user.discord_id)
     ).with_entities(Fine.passport_id).distinct().all()
@@ -246,7 +247,6 @@ def get_payment(
     # Проверяем права доступа
     if current_user.role != "admin":
         # Проверяем, что платеж принадлежит пользователю
-        from app.models.passport import Passport
         user_passport = db.query(Passport).filter(
             Passport.discord_id == str(current_user.discord_id),
             Passport.id == db_payment.passport_id
@@ -289,7 +289,6 @@ async def pay_fines_with_bt(
     # Проверяем, что пользователь может оплачивать штрафы этого паспорта
     # Для обычных жителей - только свои штрафы
     if current_user.role != "admin":
-        from app.models.passport import Passport
         user_fines = db.query(Fine).join(Passport).filter(
             Fine.id.in_(fine_ids),
             Passport.discord_id == str(current_user.discord_id)
@@ -358,9 +357,9 @@ async def pay_fines_with_bt(
     new_bt_balance = await bt_client.get_user_bt(str(current_user.discord_id))
     
     db.commit()
+    response_cache.invalidate(CACHE_FINES_STATS)
     
     # Логируем операцию
-    from app.utils.logger import ActionLogger
     ActionLogger.log_action(
         db=db,
         user=current_user,
@@ -1,27 +1,49 @@
+from datetime import datetime, timedelta
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Request, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, BackgroundTasks
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.config import settings
 from app.core.deps import get_current_active_admin
+from app.crud.job import job_crud
+from app.crud.user import user_crud
 from app.models.user import User
 from app.schemas.user import RoleCheckResult
 from app.services.role_checker import role_checker_service
+from app.services.leader_election import leader_elector
+from app.services.token_refresher import token_refresh_service
+from app.services.log_partitions import log_partition_service
+from app.services.loop_monitor import loop_monitor_service
 from app.utils.logger import ActionLogger
+from app.utils.http_cache import conditional_response, CACHE_PRIVATE_SHORT
+from app.core.cache import response_cache
+from app.core.execution import loop_block_stats
 
 router = APIRouter()
 
 
 @router.post("/check-all")
-async def trigger_role_check_all(
+def trigger_role_check_all(
         request: Request,
-        background_tasks: BackgroundTasks,
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_active_admin),
 ):
     """
     Запустить проверку ролей для всех пользователей (только для администраторов)
+
+    Проверка ставится в очередь задач; одновременно активна только одна массовая проверка,
+    повторный запрос возвращает уже запущенную задачу.
     """
+    # Ставим принудительную проверку в очередь (игнорируем кеш)
+    job, created = job_crud.enqueue(
+        db,
+        job_type="mass_role_check",
+        params={"force": True},
+        dedup_key="mass_role_check",
+        created_by_user_id=current_user.id
+    )
+
     # Логируем запуск массовой проверки ролей
     ActionLogger.log_action(
         db=db,
@@ -29,16 +51,22 @@ async def trigger_role_check_all(
         action="TRIGGER_MASS_ROLE_CHECK",
         entity_type="system",
         details={
-            "triggered_by": current_user.discord_username
+            "triggered_by": current_user.discord_username,
+            "job_id": job.id,
+            "already_running": not created
         },
         request=request
     )
 
-    # Запускаем принудительную проверку в фоне (игнорируем кеш)
-    background_tasks.add_task(role_checker_service.check_all_users_roles, force=True)
-
     return {
-        "message": "Проверка ролей для всех пользователей запущена в фоновом режиме",
+        "message": (
+            "Проверка ролей для всех пользователей поставлена в очередь"
+            if created else
+            "Проверка ролей для всех пользователей уже выполняется"
+        ),
+        "job_id": job.id,
+        "job_status": job.status,
+        "already_running": not created,
         "triggered_by": current_user.discord_username
     }
 
@@ -54,7 +82,6 @@ async def check_specific_user_roles(
     Проверить роли конкретного пользователя (только для администраторов)
     """
     # Проверяем, что пользователь существует
-    from app.crud.user import user_crud
     target_user = user_crud.get(db, id=user_id)
     if not target_user:
         raise HTTPException(
@@ -98,14 +125,20 @@ def get_role_checker_status(
     """
     Получить статус сервиса проверки ролей (только для администраторов)
     """
-    from app.core.config import settings
 
     status_info = {
         "service_running": role_checker_service.is_running,
         "check_interval_minutes": settings.ROLE_CHECK_INTERVAL,
         "last_cache_update": role_checker_service.cache_updated_at.isoformat() if role_checker_service.cache_updated_at else None,
         "guild_roles_cached": len(
-            role_checker_service.guild_roles_cache) if role_checker_service.guild_roles_cache else 0
+            role_checker_service.guild_roles_cache) if role_checker_service.guild_roles_cache else 0,
+        # Периодическая проверка выполняется только в воркере-лидере
+        "leader": leader_elector.status(),
+        "token_refresh": token_refresh_service.status(),
+        "log_partitions": log_partition_service.status(),
+        "response_cache": response_cache.status(),
+        "loop_blocking": loop_block_stats.status(),
+        "event_loop": loop_monitor_service.status()
     }
 
     # Логируем просмотр статуса
@@ -158,13 +191,13 @@ async def restart_role_checker(
 @router.get("/configuration")
 def get_role_configuration(
         request: Request,
+        response: Response,
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_active_admin),
 ):
     """
     Получить конфигурацию ролей (только для администраторов)
     """
-    from app.core.config import settings
 
     config = {
         "discord_guild_id": settings.DISCORD_GUILD_ID,
@@ -178,7 +211,7 @@ def get_role_configuration(
         }
     }
 
-    # Логируем просмотр конфигурации
+    # Логируем просмотр конфигурации (и перед ответом 304)
     ActionLogger.log_action(
         db=db,
         user=current_user,
@@ -190,6 +223,13 @@ def get_role_configuration(
         request=request
     )
 
+    # Конфигурация меняется только при перезапуске — версия вычисляется по содержимому
+    not_modified = conditional_response(
+        request, response, "roles/configuration", config, cache_control=CACHE_PRIVATE_SHORT
+    )
+    if not_modified:
+        return not_modified
+
     return config
 
 
@@ -202,9 +242,6 @@ def get_role_sync_issues(
     """
     Получить список пользователей с проблемами синхронизации ролей
     """
-    from app.crud.user import user_crud
-    from datetime import datetime, timedelta
-    from app.core.config import settings
 
     # Получаем пользователей, которых давно не проверяли
     cutoff_time = datetime.utcnow() - timedelta(minutes=settings.ROLE_CHECK_INTERVAL * 2)
@@ -1,6 +1,8 @@
+from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
 from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_
 
 from app.core.database import get_db
 from app.core.deps import get_current_active_admin, get_current_user
@@ -9,6 +11,8 @@ from app.crud.user import user_crud
 from app.schemas.user import User, UserUpdate, UserPublic, UserStatistics, RoleCheckResult
 from app.models.user import User as UserModel
 from app.utils.logger import ActionLogger
+from app.utils.http_cache import conditional_response
+from app.core.cache import response_cache, CACHE_USERS_STATS
 from app.services.role_checker import role_checker_service
 
 router = APIRouter()
@@ -17,13 +21,14 @@ router = APIRouter()
 @router.get("/me", response_model=User)
 def read_user_me(
         request: Request,
+        response: Response,
         db: Session = Depends(get_db),
         current_user: UserModel = Depends(get_current_user),
 ):
     """
     Получить информацию о текущем пользователе
     """
-    # Логируем просмотр собственного профиля
+    # Логируем просмотр собственного профиля (и перед ответом 304)
     ActionLogger.log_action(
         db=db,
         user=current_user,
@@ -37,12 +42,17 @@ def read_user_me(
         request=request
     )
 
+    # Профиль не изменился с прошлого запроса — отвечаем 304 без тела
+    not_modified = conditional_response(request, response, "users/me", current_user.id, current_user.updated_at)
+    if not_modified:
+        return not_modified
+
     return current_user
 
 
 @router.get("/", response_model=List[UserPublic])
 @with_role_check("view_users")
-async def read_users(
+def read_users(
         request: Request,
         db: Session = Depends(get_db),
         skip: int = 0,
@@ -57,8 +67,6 @@ async def read_users(
     """
     Получить список всех пользователей с расширенными фильтрами (только для администраторов)
     """
-    from sqlalchemy import and_, or_
-    from datetime import datetime
     
     # Базовый запрос
     query = db.query(UserModel)
@@ -125,7 +133,7 @@ async def read_users(
 
 @router.get("/statistics", response_model=UserStatistics)
 @with_role_check("view_user_statistics")
-async def get_user_statistics(
+def get_user_statistics(
         request: Request,
         db: Session = Depends(get_db),
         current_user: UserModel = Depends(get_current_active_admin),
@@ -133,7 +141,10 @@ async def get_user_statistics(
     """
     Получить статистику пользователей (только для администраторов)
     """
-    stats = user_crud.get_statistics(db)
+    stats = response_cache.get_or_set(
+        response_cache.build_key(CACHE_USERS_STATS, request),
+        lambda: user_crud.get_statistics(db)
+    )
 
     # Логируем просмотр статистики
     ActionLogger.log_action(
@@ -150,7 +161,7 @@ async def get_user_statistics(
 
 @router.put("/{user_id}", response_model=User)
 @with_role_check("update_user")
-async def update_user(
+def update_user(
         request: Request,
         *,
         db: Session = Depends(get_db),
@@ -206,7 +217,7 @@ async def update_user(
 
 @router.get("/{user_id}", response_model=User)
 @with_role_check("view_user")
-async def read_user(
+def read_user(
         request: Request,
         *,
         db: Session = Depends(get_db),
@@ -244,7 +255,7 @@ async def read_user(
 
 @router.post("/{user_id}/deactivate", response_model=User)
 @with_role_check("deactivate_user")
-async def deactivate_user(
+def deactivate_user(
         request: Request,
         *,
         db: Session = Depends(get_db),
@@ -290,7 +301,7 @@ async def deactivate_user(
 
 @router.post("/{user_id}/activate", response_model=User)
 @with_role_check("activate_user")
-async def activate_user(
+def activate_user(
         request: Request,
         *,
         db: Session = Depends(get_db),
@@ -374,7 +385,7 @@ async def check_user_roles(
 
 @router.get("/search/minecraft", response_model=List[UserPublic])
 @with_role_check("search_users_minecraft")
-async def search_users_by_minecraft(
+def search_users_by_minecraft(
         request: Request,
         *,
         db: Session = Depends(get_db),
@@ -407,7 +418,7 @@ async def search_users_by_minecraft(
 
 @router.get("/search/discord", response_model=List[UserPublic])
 @with_role_check("search_users_discord")
-async def search_users_by_discord(
+def search_users_by_discord(
         request: Request,
         *,
         db: Session = Depends(get_db),
@@ -418,7 +429,6 @@ async def search_users_by_discord(
     Поиск пользователей по Discord имени
     """
     # Простой поиск через SQL LIKE
-    from sqlalchemy import or_
     users = db.query(UserModel).filter(
         or_(
             UserModel.discord_username.ilike(f"%{q}%"),
@@ -2,60 +2,102 @@
 Клиент для работы с API баллов труда
 """
 import asyncio
-import logging
 from typing import Dict, List, Optional
 import httpx
+from app.core.cache import MISS, MemoryCacheBackend
 from app.core.config import settings
+from app.clients.resilience import upstream_transport
+from app.core.logging_config import get_logger
 
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 
 class BTAPIClient:
     """Клиент для работы с API баллов труда"""
     
     def __init__(self):
-        self.base_url = "http://82.117.84.218:5000/api/users"
-        self.token = "sdfusdufusdufus3f9g7f73g6fg3"
+        self.base_url = settings.BT_API_URL.rstrip("/")
+        self.token = settings.BT_API_TOKEN
         self.headers = {
             "Authorization": f"Bearer {self.token}",
             "Content-Type": "application/json"
         }
+        # Балансы для отображения в паспортах; списания читают баланс напрямую
+        self._balances = MemoryCacheBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+    @property
+    def is_configured(self) -> bool:
+        """Заданы ли URL и токен API баллов труда"""
+        return bool(self.base_url and self.token)
+
+    def _check_configured(self, operation: str) -> bool:
+        if not self.is_configured:
+            logger.warning("bt_api_not_configured", operation=operation)
+            return False
+        return True
     
+    async def ping(self, timeout: float = 5.0) -> bool:
+        """Проверка доступности API баллов труда (HEAD без выгрузки списка пользователей)"""
+        if not self._check_configured("ping"):
+            return False
+        try:
+            async with httpx.AsyncClient(transport=upstream_transport("bt_api")) as client:
+                response = await client.head(
+                    self.base_url, headers=self.headers, timeout=timeout, extensions={"probe": True}
+                )
+                return response.status_code < 500
+        except Exception as e:
+            logger.warning("bt_api_ping_failed", error=str(e))
+            return False
+
     async def get_user_bt(self, user_id: str) -> Optional[int]:
         """Получить количество баллов труда пользователя"""
+        if not self._check_configured("get"):
+            return None
         try:
-            print(f"DEBUG: Requesting BT for user {user_id} from {self.base_url}")  # Отладка
-            async with httpx.AsyncClient() as client:
+            async with httpx.AsyncClient(transport=upstream_transport("bt_api")) as client:
                 response = await client.get(
                     self.base_url,
                     headers=self.headers,
                     timeout=10.0
                 )
                 
-                print(f"DEBUG: BT API response status: {response.status_code}")  # Отладка
-                
                 if response.status_code == 200:
                     users = response.json()
-                    print(f"DEBUG: BT API returned {len(users)} users")  # Отладка
                     for user in users:
                         if str(user.get("user_id")) == str(user_id):
                             bt_value = user.get("bt", 0)
-                            print(f"DEBUG: Found user {user_id} with BT: {bt_value}")  # Отладка
                             return bt_value
-                    print(f"DEBUG: User {user_id} not found in BT API")  # Отладка
+                    logger.debug("bt_user_not_found", user_id=user_id)
                     return None
                 else:
-                    logger.error(f"BT API error: {response.status_code} - {response.text}")
-                    print(f"DEBUG: BT API error: {response.status_code} - {response.text}")  # Отладка
+                    logger.error("bt_api_error", status_code=response.status_code, body=response.text)
                     return None
                     
         except Exception as e:
-            logger.error(f"Error getting BT for user {user_id}: {e}")
-            print(f"DEBUG: Exception getting BT for user {user_id}: {e}")  # Отладка
+            logger.error("bt_request_failed", operation="get", user_id=user_id, error=str(e))
             return None
     
+    async def get_cached_user_bt(self, user_id: str) -> Optional[int]:
+        """Баланс баллов труда для отображения: не старше BT_BALANCE_CACHE_TTL секунд"""
+        key = f"{user_id}:"
+        balance = self._balances.get(key)
+        if balance is not MISS:
+            return balance
+
+        balance = await self.get_user_bt(user_id)
+        if balance is not None and settings.BT_BALANCE_CACHE_TTL > 0:
+            self._balances.set(key, balance, settings.BT_BALANCE_CACHE_TTL)
+        return balance
+
+    def forget_balance(self, user_id: str) -> None:
+        """Сбросить закешированный баланс после его изменения"""
+        self._balances.delete_prefix(f"{user_id}:")
+
     async def subtract_bt(self, user_id: str, amount: int) -> bool:
         """Списать баллы труда у пользователя"""
+        if not self._check_configured("subtract"):
+            return False
         try:
             # Сначала получаем текущий баланс
             current_bt = await self.get_user_bt(user_id)
@@ -66,7 +108,7 @@ class BTAPIClient:
             new_bt = current_bt - amount
             
             # Обновляем баланс
-            async with httpx.AsyncClient() as client:
+            async with httpx.AsyncClient(transport=upstream_transport("bt_api")) as client:
                 response = await client.put(
                     f"{self.base_url}/{user_id}",
                     json={"bt": new_bt},
@@ -75,20 +117,23 @@ class BTAPIClient:
                 )
                 
                 if response.status_code == 200:
+                    self.forget_balance(user_id)
                     result = response.json()
                     return result.get("success", False)
                 else:
-                    logger.error(f"BT API error: {response.status_code} - {response.text}")
+                    logger.error("bt_api_error", status_code=response.status_code, body=response.text)
                     return False
                     
         except Exception as e:
-            logger.error(f"Error subtracting BT for user {user_id}: {e}")
+            logger.error("bt_request_failed", operation="subtract", user_id=user_id, error=str(e))
             return False
     
     async def add_bt(self, user_id: str, amount: int) -> bool:
         """Добавить баллы труда пользователю"""
+        if not self._check_configured("add"):
+            return False
         try:
-            async with httpx.AsyncClient() as client:
+            async with httpx.AsyncClient(transport=upstream_transport("bt_api")) as client:
                 response = await client.post(
                     f"{self.base_url}/{user_id}/add",
                     json={"bt": amount},
@@ -97,20 +142,23 @@ class BTAPIClient:
                 )
                 
                 if response.status_code == 200:
+                    self.forget_balance(user_id)
                     result = response.json()
                     return result.get("success", False)
                 else:
-                    logger.error(f"BT API error: {response.status_code} - {response.text}")
+                    logger.error("bt_api_error", status_code=response.status_code, body=response.text)
                     return False
                     
         except Exception as e:
-            logger.error(f"Error adding BT for user {user_id}: {e}")
+            logger.error("bt_request_failed", operation="add", user_id=user_id, error=str(e))
             return False
     
     async def create_user(self, user_id: str, initial_bt: int = 0) -> bool:
         """Создать пользователя в системе баллов труда"""
+        if not self._check_configured("create_user"):
+            return False
         try:
-            async with httpx.AsyncClient() as client:
+            async with httpx.AsyncClient(transport=upstream_transport("bt_api")) as client:
                 response = await client.post(
                     self.base_url,
                     json={"user_id": user_id, "bt": initial_bt},
@@ -122,11 +170,11 @@ class BTAPIClient:
                     result = response.json()
                     return result.get("success", False)
                 else:
-                    logger.error(f"BT API error: {response.status_code} - {response.text}")
+                    logger.error("bt_api_error", status_code=response.status_code, body=response.text)
                     return False
                     
         except Exception as e:
-            logger.error(f"Error creating BT user {user_id}: {e}")
+            logger.error("bt_request_failed", operation="create_user", user_id=user_id, error=str(e))
             return False
 
 
@@ -3,6 +3,10 @@ from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 import urllib.parse
 from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.clients.resilience import upstream_transport
+
+logger = get_logger(__name__)
 
 
 class DiscordClient:
@@ -11,14 +15,24 @@ class DiscordClient:
     """
 
     def __init__(self):
-        self.base_url = "https://discord.com/api/v10"
-        self.client = httpx.AsyncClient(
-            base_url=self.base_url,
-            timeout=30.0,
-            headers={
-                "User-Agent": "RP-Server-Backend/1.0.0"
-            }
-        )
+        self.base_url = settings.DISCORD_API_URL
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        HTTP клиент, создается при первом запросе (SSL-контекст не строится на импорте)
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=30.0,
+                headers={
+                    "User-Agent": "RP-Server-Backend/1.0.0"
+                },
+                transport=upstream_transport("discord")
+            )
+        return self._client
 
     def get_oauth_url(self, state: str = None) -> str:
         """
@@ -70,11 +84,11 @@ class DiscordClient:
             if response.status_code == 200:
                 return response.json()
             else:
-                print(f"Discord token exchange error: {response.status_code} - {response.text}")
+                logger.warning("discord_api_error", endpoint="token exchange", status_code=response.status_code, body=response.text)
                 return None
 
         except Exception as e:
-            print(f"Discord token exchange failed: {e}")
+            logger.error("discord_api_failed", endpoint="token exchange", error=str(e))
             return None
 
     async def refresh_token(self, refresh_token: str) -> Optional[Dict[str, Any]]:
@@ -104,11 +118,11 @@ class DiscordClient:
             if response.status_code == 200:
                 return response.json()
             else:
-                print(f"Discord token refresh error: {response.status_code} - {response.text}")
+                logger.warning("discord_api_error", endpoint="token refresh", status_code=response.status_code, body=response.text)
                 return None
 
         except Exception as e:
-            print(f"Discord token refresh failed: {e}")
+            logger.error("discord_api_failed", endpoint="token refresh", error=str(e))
             return None
 
     async def get_user_info(self, access_token: str) -> Optional[Dict[str, Any]]:
@@ -132,11 +146,11 @@ class DiscordClient:
             if response.status_code == 200:
                 return response.json()
             else:
-                print(f"Discord user info error: {response.status_code} - {response.text}")
+                logger.warning("discord_api_error", endpoint="user info", status_code=response.status_code, body=response.text)
                 return None
 
         except Exception as e:
-            print(f"Discord user info failed: {e}")
+            logger.error("discord_api_failed", endpoint="user info", error=str(e))
             return None
 
     async def get_user_guilds(self, access_token: str) -> Optional[List[Dict[str, Any]]]:
@@ -160,11 +174,11 @@ class DiscordClient:
             if response.status_code == 200:
                 return response.json()
             else:
-                print(f"Discord guilds error: {response.status_code} - {response.text}")
+                logger.warning("discord_api_error", endpoint="guilds", status_code=response.status_code, body=response.text)
                 return None
 
         except Exception as e:
-            print(f"Discord guilds failed: {e}")
+            logger.error("discord_api_failed", endpoint="guilds", error=str(e))
             return None
 
     async def get_guild_member(self, access_token: str, guild_id: str) -> Optional[Dict[str, Any]]:
@@ -192,15 +206,14 @@ class DiscordClient:
                 # Rate limit - возвращаем None вместо ошибки
                 rate_limit_data = response.json()
                 retry_after = rate_limit_data.get('retry_after', 60)
-                print(f"Discord guild member error: {response.status_code} - {response.text}")
-                print(f"Rate limited, retry after {retry_after} seconds")
+                logger.warning("discord_rate_limited", endpoint="guild member", retry_after=retry_after)
                 return None
             else:
-                print(f"Discord guild member error: {response.status_code} - {response.text}")
+                logger.warning("discord_api_error", endpoint="guild member", status_code=response.status_code, body=response.text)
                 return None
 
         except Exception as e:
-            print(f"Discord guild member failed: {e}")
+            logger.error("discord_api_failed", endpoint="guild member", error=str(e))
             return None
 
     async def get_guild_roles(self, guild_id: str, bot_token: str) -> Optional[List[Dict[str, Any]]]:
@@ -225,11 +238,11 @@ class DiscordClient:
             if response.status_code == 200:
                 return response.json()
             else:
-                print(f"Discord guild roles error: {response.status_code} - {response.text}")
+                logger.warning("discord_api_error", endpoint="guild roles", status_code=response.status_code, body=response.text)
                 return None
 
         except Exception as e:
-            print(f"Discord guild roles failed: {e}")
+            logger.error("discord_api_failed", endpoint="guild roles", error=str(e))
             return None
 
     async def get_guild_member_by_bot(self, bot_token: str, guild_id: str, user_id: int) -> Optional[Dict[str, Any]]:
@@ -255,11 +268,11 @@ class DiscordClient:
             if response.status_code == 200:
                 return response.json()
             else:
-                print(f"Discord guild member (bot) error: {response.status_code} - {response.text}")
+                logger.warning("discord_api_error", endpoint="guild member (bot)", status_code=response.status_code, body=response.text)
                 return None
 
         except Exception as e:
-            print(f"Discord guild member (bot) failed: {e}")
+            logger.error("discord_api_failed", endpoint="guild member (bot)", error=str(e))
             return None
 
     def determine_user_role(self, member_data: Dict[str, Any], guild_roles: List[Dict[str, Any]] = None) -> Optional[str]:
@@ -277,24 +290,15 @@ class DiscordClient:
         """
         user_role_ids = member_data.get("roles", [])
 
-        print(f"DEBUG determine_user_role: user_role_ids = {user_role_ids}")
-        print(f"DEBUG determine_user_role: admin_role_id = {settings.DISCORD_ADMIN_ROLE_ID}")
-        print(f"DEBUG determine_user_role: police_role_id = {settings.DISCORD_POLICE_ROLE_ID}")
-        print(f"DEBUG determine_user_role: admin_role_id type = {type(settings.DISCORD_ADMIN_ROLE_ID)}")
-        print(f"DEBUG determine_user_role: user_role_ids types = {[type(x) for x in user_role_ids]}")
-        
         # Проверяем по ID ролей (более надежно) - приводим к строке для сравнения
         admin_role_id = str(settings.DISCORD_ADMIN_ROLE_ID)
         police_role_id = str(settings.DISCORD_POLICE_ROLE_ID)
         user_role_ids_str = [str(role_id) for role_id in user_role_ids]
         
-        print(f"DEBUG determine_user_role: checking {admin_role_id} in {user_role_ids_str}")
         if admin_role_id in user_role_ids_str:
-            print(f"DEBUG determine_user_role: Found admin role!")
             return "admin"
 
         if police_role_id in user_role_ids_str:
-            print(f"DEBUG determine_user_role: Found police role!")
             return "police"
 
         # Дополнительная проверка по именам (резервный способ)
@@ -317,11 +321,27 @@ class DiscordClient:
         # ВНИМАНИЕ: Этот метод НЕ проверяет паспорта!
         return None
 
+    async def ping(self, timeout: float = 5.0) -> bool:
+        """
+        Проверка доступности Discord API (публичный /gateway без авторизации)
+
+        Returns:
+            True если API доступен
+        """
+        try:
+            response = await self.client.get("/gateway", timeout=timeout, extensions={"probe": True})
+            return response.status_code == 200
+        except Exception as e:
+            logger.warning("discord_ping_failed", error=str(e))
+            return False
+
     async def close(self):
         """
         Закрытие HTTP клиента
         """
-        await self.client.aclose()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
 
 # Глобальный экземпляр клиента
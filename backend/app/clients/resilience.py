@@ -0,0 +1,318 @@
+"""
+Устойчивость клиентов внешних API к сбоям и медленным ответам
+
+Общий слой для всех клиентов из app/clients (подключается транспортом httpx):
+  * предохранитель (circuit breaker) на каждый внешний API: после серии
+    неудачных вызовов запросы сразу отклоняются, через CIRCUIT_RECOVERY_TIMEOUT
+    пропускается один пробный;
+  * адаптивный таймаут чтения/записи по наблюдаемой задержке эндпоинта
+    (p99 * UPSTREAM_TIMEOUT_FACTOR), не больше таймаута, заданного клиентом;
+    задержка считается отдельно для каждого метода и шаблона пути, проверки
+    доступности (extensions={"probe": True}) в ней не участвуют;
+  * крайний срок запроса (DeadlineMiddleware): вызов не ждет дольше,
+    чем осталось у HTTP запроса, который его сделал.
+"""
+import re
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.execution import remaining_budget
+from app.core.logging_config import get_logger
+from app.core.metrics import InstrumentedTransport
+
+logger = get_logger(__name__)
+
+# Перцентили считаются, только когда накоплено достаточно ответов
+MIN_LATENCY_SAMPLES = 20
+
+TIMEOUT_KEYS = ("connect", "read", "write", "pool")
+# Адаптивный таймаут ограничивает только ожидание ответа: задержка меряется
+# на переиспользуемых соединениях и не говорит о времени нового подключения (TLS)
+ADAPTIVE_TIMEOUT_KEYS = ("read", "write")
+
+# Лимит отдельно отслеживаемых эндпоинтов на внешний API, остальные делят общий
+MAX_TRACKED_ENDPOINTS = 32
+OTHER_ENDPOINT = "other"
+
+# Числовые сегменты пути (ID пользователей, серверов) заменяются на {id}
+NUMERIC_SEGMENT_RE = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_key(request: httpx.Request) -> str:
+    """
+    Метод и шаблон пути запроса: GET /guilds/{id}/members/{id}
+    """
+    return f"{request.method} {NUMERIC_SEGMENT_RE.sub('/{id}', request.url.path)}"
+
+
+class CircuitOpenError(httpx.TransportError):
+    """
+    Вызов отклонен: предохранитель внешнего API разомкнут
+    """
+
+
+class DeadlineExceededError(httpx.TimeoutException):
+    """
+    Вызов не начат: у запроса не осталось времени на внешний API
+    """
+
+
+class CircuitBreaker:
+    """
+    Предохранитель внешнего API: closed -> open -> half_open -> closed
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.opened_total = 0
+        self.rejected_total = 0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        """
+        Можно ли выполнить вызов сейчас
+        """
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < settings.CIRCUIT_RECOVERY_TIMEOUT:
+                self.rejected_total += 1
+                return False
+            self.state = self.HALF_OPEN
+            logger.info("circuit_half_open", upstream=self.name)
+
+        if self.state == self.HALF_OPEN:
+            # В полуоткрытом состоянии пропускаем только один пробный вызов
+            if self._trial_in_flight:
+                self.rejected_total += 1
+                return False
+            self._trial_in_flight = True
+
+        return True
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info("circuit_closed", upstream=self.name)
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= settings.CIRCUIT_FAILURE_THRESHOLD:
+            if self.state != self.OPEN:
+                self.opened_total += 1
+                logger.warning("circuit_opened", upstream=self.name, failures=self.consecutive_failures)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """
+        Вызов завершился без оценки внешнего API (например, истек срок запроса)
+        """
+        self._trial_in_flight = False
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "opened_total": self.opened_total,
+            "rejected_total": self.rejected_total,
+            "retry_in_seconds": (
+                max(0.0, round(self.opened_at + settings.CIRCUIT_RECOVERY_TIMEOUT - time.monotonic(), 1))
+                if self.state == self.OPEN else None
+            )
+        }
+
+
+class LatencyTracker:
+    """
+    Задержки последних успешных ответов и таймаут по ним
+    """
+
+    def __init__(self):
+        self.samples = deque(maxlen=settings.UPSTREAM_LATENCY_WINDOW)
+
+    def observe(self, latency: float) -> None:
+        self.samples.append(latency)
+
+    def percentile(self, quantile: float) -> Optional[float]:
+        if len(self.samples) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+    def timeout(self, configured: Optional[float]) -> Optional[float]:
+        """
+        Таймаут вызова: p99 * UPSTREAM_TIMEOUT_FACTOR, но не меньше UPSTREAM_TIMEOUT_MIN
+        и не больше заданного клиентом
+        """
+        p99 = self.percentile(0.99)
+        if p99 is None:
+            return configured
+        adaptive = max(settings.UPSTREAM_TIMEOUT_MIN, p99 * settings.UPSTREAM_TIMEOUT_FACTOR)
+        return adaptive if configured is None else min(configured, adaptive)
+
+    def status(self) -> dict:
+        p50, p99 = self.percentile(0.5), self.percentile(0.99)
+        return {
+            "samples": len(self.samples),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+        }
+
+
+class Upstream:
+    """
+    Состояние одного внешнего API, общее для всех его HTTP клиентов
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(name)
+        self.endpoints: Dict[str, LatencyTracker] = {}
+
+    def latency(self, endpoint: str) -> LatencyTracker:
+        """
+        Задержки эндпоинта (метод + шаблон пути)
+        """
+        tracker = self.endpoints.get(endpoint)
+        if tracker is None:
+            if len(self.endpoints) >= MAX_TRACKED_ENDPOINTS:
+                endpoint = OTHER_ENDPOINT
+                tracker = self.endpoints.get(endpoint)
+            if tracker is None:
+                tracker = self.endpoints[endpoint] = LatencyTracker()
+        return tracker
+
+    def status(self) -> dict:
+        endpoints = {}
+        for endpoint, tracker in self.endpoints.items():
+            adaptive_timeout = tracker.timeout(None)
+            endpoints[endpoint] = {
+                **tracker.status(),
+                "adaptive_timeout_seconds": round(adaptive_timeout, 2) if adaptive_timeout is not None else None
+            }
+        return {**self.breaker.status(), "endpoints": endpoints}
+
+
+def get_upstream(name: str) -> Upstream:
+    upstream = upstreams.get(name)
+    if upstream is None:
+        upstream = upstreams[name] = Upstream(name)
+    return upstream
+
+
+def upstream_status() -> Dict[str, dict]:
+    """
+    Состояние предохранителей и задержек всех внешних API
+    """
+    return {name: upstream.status() for name, upstream in upstreams.items()}
+
+
+def _timeout_key(error: httpx.TimeoutException) -> str:
+    """
+    Какой из таймаутов httpx сработал
+    """
+    for error_type, key in (
+            (httpx.ConnectTimeout, "connect"),
+            (httpx.WriteTimeout, "write"),
+            (httpx.PoolTimeout, "pool"),
+    ):
+        if isinstance(error, error_type):
+            return key
+    return "read"
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """
+    Транспорт httpx с предохранителем, адаптивным таймаутом и сроком запроса
+
+    Проверки доступности помечаются extensions={"probe": True}: они проходят через
+    предохранитель, но не влияют на задержку эндпоинтов и получают полный таймаут.
+    """
+
+    def __init__(self, service: str, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.upstream = get_upstream(service)
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        breaker = self.upstream.breaker
+        if not breaker.allow():
+            raise CircuitOpenError(f"{self.upstream.name} circuit is open", request=request)
+
+        configured = request.extensions.get("timeout") or {}
+        is_probe = bool(request.extensions.get("probe"))
+        latency = None if is_probe else self.upstream.latency(endpoint_key(request))
+        timeouts = dict(configured)
+
+        # Пробный вызов предохранителя получает полный таймаут клиента: задержка могла вырасти
+        if latency is not None and breaker.state != CircuitBreaker.HALF_OPEN:
+            for key in ADAPTIVE_TIMEOUT_KEYS:
+                timeouts[key] = latency.timeout(configured.get(key))
+
+        # Таймауты, которые сократил срок запроса
+        limited_by_deadline = set()
+        budget = remaining_budget()
+        if budget is not None:
+            if budget <= 0:
+                breaker.release()
+                raise DeadlineExceededError("Request deadline exceeded", request=request)
+            for key in TIMEOUT_KEYS:
+                if timeouts.get(key) is None or budget < timeouts[key]:
+                    timeouts[key] = budget
+                    limited_by_deadline.add(key)
+
+        request.extensions["timeout"] = {key: timeouts.get(key) for key in TIMEOUT_KEYS}
+
+        started = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except httpx.TimeoutException as e:
+            # Таймаут из-за срока запроса не говорит о состоянии внешнего API
+            if _timeout_key(e) in limited_by_deadline:
+                breaker.release()
+            else:
+                breaker.record_failure()
+            raise
+        except httpx.TransportError:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+            if latency is not None:
+                latency.observe(time.perf_counter() - started)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def upstream_transport(
+        service: str,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+) -> httpx.AsyncBaseTransport:
+    """
+    Транспорт для клиента внешнего API: метрики + предохранитель и таймауты
+    """
+    return InstrumentedTransport(service, ResilientTransport(service, transport))
+
+
+# Глобальный реестр состояния внешних API
+upstreams: Dict[str, Upstream] = {}
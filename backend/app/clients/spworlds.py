@@ -5,8 +5,13 @@ import hashlib
 import hmac
 import base64
 from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.clients.resilience import CircuitOpenError, upstream_transport
+from app.core.cache import MemoryCacheBackend
 from app.schemas.payment import SPWorldsPaymentCreate, SPWorldsPaymentResponse
 
+logger = get_logger(__name__)
+
 
 class SPWorldsClient:
     """
@@ -17,14 +22,26 @@ class SPWorldsClient:
         self.base_url = settings.SPWORLDS_API_URL
         self.map_id = settings.SPWORLDS_MAP_ID
         self.map_token = settings.SPWORLDS_MAP_TOKEN
-        self.client = httpx.AsyncClient(
-            base_url=self.base_url,
-            timeout=10.0,  # Reduced timeout for faster failure detection
-            headers={
-                "User-Agent": "RP-Server-Backend/1.0.0"
-            },
-            auth=(self.map_id, self.map_token) if self.map_id and self.map_token else None
-        )
+        self._client: Optional[httpx.AsyncClient] = None
+        # Последние полученные данные игроков: отдаются, когда SP-Worlds недоступен
+        self._fallback = MemoryCacheBackend(max_entries=50000)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        HTTP клиент, создается при первом запросе (SSL-контекст не строится на импорте)
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=10.0,  # Reduced timeout for faster failure detection
+                headers={
+                    "User-Agent": "RP-Server-Backend/1.0.0"
+                },
+                auth=(self.map_id, self.map_token) if self.map_id and self.map_token else None,
+                transport=upstream_transport("spworlds")
+            )
+        return self._client
 
     async def find_user(self, discord_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -41,7 +58,7 @@ class SPWorldsClient:
             }
         """
         if not self.map_id or not self.map_token:
-            print("SP-Worlds API: map_id or map_token not configured")
+            logger.warning("spworlds_not_configured")
             return None
             
         try:
@@ -52,28 +69,43 @@ class SPWorldsClient:
                 data = response.json()
                 # SP-Worlds API returns 200 with null values if user not found
                 if data.get("username") is None and data.get("uuid") is None:
-                    print(f"SP-Worlds API: User with Discord ID {discord_id} not found")
+                    logger.debug("spworlds_user_not_found", discord_id=discord_id)
                     return None
-                return {
+                user_data = {
                     "username": data.get("username"),
                     "uuid": data.get("uuid")
                 }
+                self._fallback.set(str(discord_id), user_data, settings.SPWORLDS_FALLBACK_TTL)
+                return user_data
             elif response.status_code == 401:
-                print(f"SP-Worlds API: Authentication failed - check map_id and map_token")
+                logger.error("spworlds_auth_failed")
                 return None
             else:
-                print(f"SP-Worlds API error: {response.status_code} - {response.text}")
-                return None
+                logger.warning("spworlds_api_error", status_code=response.status_code, body=response.text)
+                return self._fallback_user(discord_id)
 
+        except CircuitOpenError:
+            logger.debug("spworlds_circuit_open", discord_id=discord_id)
+            return self._fallback_user(discord_id)
         except httpx.TimeoutException:
-            print(f"SP-Worlds API timeout for Discord ID {discord_id}")
-            return None
+            logger.warning("spworlds_timeout", discord_id=discord_id)
+            return self._fallback_user(discord_id)
         except httpx.ConnectError:
-            print(f"SP-Worlds API connection error for Discord ID {discord_id}")
-            return None
+            logger.warning("spworlds_connection_error", discord_id=discord_id)
+            return self._fallback_user(discord_id)
         except Exception as e:
-            print(f"SP-Worlds API request failed for Discord ID {discord_id}: {e}")
-            return None
+            logger.error("spworlds_request_failed", discord_id=discord_id, error=str(e))
+            return self._fallback_user(discord_id)
+
+    def _fallback_user(self, discord_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Последние известные данные игрока, если SP-Worlds не ответил
+        """
+        cached = self._fallback.get(str(discord_id))
+        if isinstance(cached, dict):
+            logger.info("spworlds_fallback_used", discord_id=discord_id)
+            return cached
+        return None
 
     async def find_user_by_nickname(self, nickname: str) -> Optional[Dict[str, Any]]:
         """
@@ -94,13 +126,14 @@ class SPWorldsClient:
             
         try:
             # Получаем UUID из Mojang API
-            mojang_response = await httpx.AsyncClient().get(
-                f"https://api.mojang.com/users/profiles/minecraft/{nickname}",
-                timeout=5.0
-            )
+            async with httpx.AsyncClient(transport=upstream_transport("mojang")) as mojang_client:
+                mojang_response = await mojang_client.get(
+                    f"{settings.MOJANG_API_URL}/users/profiles/minecraft/{nickname}",
+                    timeout=5.0
+                )
             
             if mojang_response.status_code != 200:
-                print(f"Minecraft user {nickname} not found in Mojang API")
+                logger.debug("mojang_user_not_found", nickname=nickname)
                 return None
                 
             mojang_data = mojang_response.json()
@@ -115,7 +148,7 @@ class SPWorldsClient:
             }
             
         except Exception as e:
-            print(f"Failed to lookup UUID for nickname {nickname}: {e}")
+            logger.warning("mojang_lookup_failed", nickname=nickname, error=str(e))
             return None
 
     async def get_player_skin_url(self, uuid: str) -> Optional[str]:
@@ -132,7 +165,7 @@ class SPWorldsClient:
             return None
         
         try:
-            skin_client = httpx.AsyncClient(timeout=10.0)
+            skin_client = httpx.AsyncClient(timeout=10.0, transport=upstream_transport("skins"))
             skin_url = f"https://assets.zaralx.ru/api/v1/minecraft/vanilla/player/face/{uuid}/full"
             
             response = await skin_client.head(skin_url)
@@ -141,11 +174,11 @@ class SPWorldsClient:
             if response.status_code == 200:
                 return skin_url
             else:
-                print(f"Skin URL not available for UUID {uuid}: {response.status_code}")
+                logger.debug("skin_not_available", uuid=uuid, status_code=response.status_code)
                 return None
                 
         except Exception as e:
-            print(f"Failed to check skin URL for UUID {uuid}: {e}")
+            logger.warning("skin_check_failed", uuid=uuid, error=str(e))
             return None
 
     async def ping(self) -> bool:
@@ -156,22 +189,22 @@ class SPWorldsClient:
             True если API доступен
         """
         if not self.map_id or not self.map_token:
-            print("SP-Worlds API: map_id or map_token not configured for ping")
+            logger.warning("spworlds_not_configured", operation="ping")
             return False
             
         try:
             # SP-Worlds API doesn't have a ping endpoint, so we'll test with a simple user lookup
             # Using a non-existent Discord ID should return 200 with null data if API is working
-            response = await self.client.get("/users/1", timeout=5.0)
+            response = await self.client.get("/users/1", timeout=5.0, extensions={"probe": True})
             return response.status_code in [200, 404]  # 200 means user found, 404 means user not found but API works
         except httpx.TimeoutException:
-            print("SP-Worlds API ping timeout")
+            logger.warning("spworlds_timeout", operation="ping")
             return False
         except httpx.ConnectError:
-            print("SP-Worlds API connection error during ping")
+            logger.warning("spworlds_connection_error", operation="ping")
             return False
         except Exception as e:
-            print(f"SP-Worlds ping failed: {e}")
+            logger.error("spworlds_request_failed", operation="ping", error=str(e))
             return False
 
     async def create_payment(self, payment_data: SPWorldsPaymentCreate) -> SPWorldsPaymentResponse:
@@ -235,7 +268,7 @@ class SPWorldsClient:
             True если подпись валидна
         """
         if not self.map_token:
-            print("validate_webhook_signature: map_token not configured")
+            logger.warning("spworlds_not_configured", operation="validate_webhook_signature")
             return False
             
         try:
@@ -247,14 +280,16 @@ class SPWorldsClient:
             return hmac.compare_digest(expected_signature, signature)
             
         except Exception as e:
-            print(f"Webhook signature validation failed: {e}")
+            logger.error("webhook_signature_validation_failed", error=str(e))
             return False
 
     async def close(self):
         """
         Закрытие HTTP клиента
         """
-        await self.client.aclose()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
 
 # Глобальный экземпляр клиента
@@ -0,0 +1,234 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+import orjson
+from fastapi import Request
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Маркер отсутствия значения (None тоже может быть закешированным результатом)
+MISS = object()
+
+
+class MemoryCacheBackend:
+    """
+    In-process LRU кеш с TTL и ограничением числа записей
+
+    Кеш свой у каждого процесса: invalidate() сбрасывает записи только в текущем
+    воркере, остальные отдают прежние данные до истечения TTL. При нескольких
+    воркерах нужен RESPONSE_CACHE_BACKEND=redis.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return MISS
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return MISS
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for key in [key for key in self._data if key.startswith(prefix)]:
+                del self._data[key]
+
+    def size(self) -> int:
+        return len(self._data)
+
+
+class RedisCacheBackend:
+    """
+    Общий для всех воркеров кеш в Redis (значения хранятся в JSON)
+
+    Значения сериализуются тем же orjson с default, что и ответы API (Decimal,
+    Pydantic модели). Ошибка сериализации или разбора считается промахом.
+    """
+
+    KEY_PREFIX = "response_cache:"
+
+    def __init__(self, url: str):
+        import redis
+        # Импорт здесь: app.utils импортирует CRUD, который сам импортирует этот модуль
+        from app.utils.serialization import dumps
+
+        self._dumps = dumps
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._errors = (redis.RedisError,)
+
+    def get(self, key: str) -> Any:
+        try:
+            raw = self._client.get(self.KEY_PREFIX + key)
+        except self._errors as e:
+            logger.warning("response_cache_redis_failed", operation="get", error=str(e))
+            return MISS
+        if raw is None:
+            return MISS
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError as e:
+            logger.warning("response_cache_decode_failed", key=key, error=str(e))
+            return MISS
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        try:
+            payload = self._dumps(value)
+        except TypeError as e:
+            # Значение не кешируется: следующий запрос снова вызовет loader
+            logger.warning("response_cache_encode_failed", key=key, error=str(e))
+            return
+        try:
+            self._client.setex(self.KEY_PREFIX + key, ttl, payload)
+        except self._errors as e:
+            logger.warning("response_cache_redis_failed", operation="set", error=str(e))
+
+    def delete_prefix(self, prefix: str) -> None:
+        try:
+            keys = list(self._client.scan_iter(match=f"{self.KEY_PREFIX}{prefix}*", count=500))
+            if keys:
+                self._client.delete(*keys)
+        except self._errors as e:
+            logger.warning("response_cache_redis_failed", operation="invalidate", error=str(e))
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class ResponseCache:
+    """
+    Кеш ответов дашборд-эндпоинтов
+
+    Ключ — пространство имен + путь + нормализованные query параметры. Одновременные промахи
+    по одному ключу внутри процесса вычисляются один раз (защита от stampede), остальные
+    запросы ждут результат. Запись данных сбрасывает пространство имен через invalidate();
+    с бэкендом memory сброс действует только в текущем воркере.
+    """
+
+    # Число блокировок для защиты от stampede (ключи распределяются по хешу)
+    LOCK_STRIPES = 64
+
+    def __init__(self):
+        self._backend = None
+        self._backend_lock = threading.Lock()
+        self._locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.RESPONSE_CACHE_BACKEND != "none"
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = self._create_backend()
+        return self._backend
+
+    @staticmethod
+    def _create_backend():
+        if settings.RESPONSE_CACHE_BACKEND == "redis":
+            try:
+                return RedisCacheBackend(settings.REDIS_URL)
+            except ImportError:
+                logger.warning("response_cache_redis_unavailable", fallback="memory")
+
+        # WEB_CONCURRENCY — число воркеров uvicorn/gunicorn
+        workers = int(os.environ.get("WEB_CONCURRENCY", "1") or 1)
+        if workers > 1:
+            logger.warning("response_cache_per_worker", backend="memory", workers=workers)
+        return MemoryCacheBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+    @staticmethod
+    def build_key(namespace: str, request: Request) -> str:
+        """
+        Ключ кеша: пространство имен, путь и отсортированные query параметры
+        """
+        query = urlencode(sorted(request.query_params.multi_items()))
+        return f"{namespace}:{request.url.path}?{query}"
+
+    def get_or_set(self, key: str, loader: Callable[[], Any], ttl: Optional[int] = None) -> Any:
+        """
+        Вернуть значение из кеша или вычислить его через loader и сохранить на ttl секунд
+        """
+        if not self.enabled:
+            return loader()
+
+        value = self.backend.get(key)
+        if value is not MISS:
+            self._count(hit=True)
+            return value
+
+        with self._locks[hash(key) % self.LOCK_STRIPES]:
+            # Пока ждали блокировку, значение мог вычислить другой запрос
+            value = self.backend.get(key)
+            if value is not MISS:
+                self._count(hit=True)
+                return value
+
+            self._count(hit=False)
+            value = loader()
+            self.backend.set(key, value, ttl or settings.RESPONSE_CACHE_TTL)
+            return value
+
+    def _count(self, hit: bool) -> None:
+        # Эндпоинты синхронные и выполняются в пуле потоков: += без блокировки теряет инкременты
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def invalidate(self, *namespaces: str) -> None:
+        """
+        Сбросить все записи указанных пространств имен
+        """
+        if not self.enabled:
+            return
+        for namespace in namespaces:
+            self.backend.delete_prefix(f"{namespace}:")
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Состояние кеша для эндпоинтов статуса
+        """
+        return {
+            "backend": settings.RESPONSE_CACHE_BACKEND,
+            "entries": self.backend.size() if self.enabled else 0,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# Пространства имен кеша
+CACHE_PASSPORTS_STATS = "passports_stats"
+CACHE_FINES_STATS = "fines_stats"
+CACHE_USERS_STATS = "users_stats"
+CACHE_LOGS_CATALOG = "logs_catalog"
+
+# Глобальный экземпляр кеша
+response_cache = ResponseCache()
@@ -10,10 +10,10 @@ engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,  # Проверка соединения перед использованием
     echo=settings.DEBUG,  # Логирование SQL запросов в режиме отладки
-    pool_size=10,  # Базовый размер пула соединений (увеличен с 5)
-    max_overflow=20,  # Максимальное количество дополнительных соединений (увеличен с 10)
+    pool_size=settings.DB_POOL_SIZE,  # Базовый размер пула соединений
+    max_overflow=settings.DB_MAX_OVERFLOW,  # Максимальное количество дополнительных соединений
     pool_recycle=3600,  # Переcоздание соединений каждый час (3600 сек)
-    pool_timeout=60  # Увеличиваем таймаут до 60 секунд
+    pool_timeout=settings.DB_POOL_TIMEOUT  # Сколько ждать свободное соединение
 )
 
 # Создание фабрики сессий
@@ -1,16 +1,19 @@
 import asyncio
-import logging
 from functools import wraps
 from typing import Callable, Any
 from datetime import datetime, timedelta, timezone
+
+import anyio.from_thread
 from fastapi import Request, Depends
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.execution import request_deadline
+from app.core.logging_config import get_logger
 from app.models.user import User
 from app.services.role_checker import role_checker_service
 
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 # Семафор для ограничения одновременных проверок ролей
 role_check_semaphore = asyncio.Semaphore(2)  # Максимум 2 одновременных проверки
@@ -48,7 +51,7 @@ def check_user_roles_on_action(action_name: str):
             
             # Если пользователь найден, запускаем проверку ролей в фоне
             if current_user:
-                logger.info(f"User {current_user.discord_username} performing action: {action_name}")
+                logger.info("user_action", user=current_user.discord_username, action=action_name)
                 
                 # Запускаем проверку ролей асинхронно
                 asyncio.create_task(
@@ -66,16 +69,18 @@ async def trigger_role_check_for_user(user_id: int, action: str):
     """
     Запускает проверку ролей для пользователя при выполнении действия
     """
+    # Фоновая задача не ограничена сроком запроса, из которого она запущена
+    request_deadline.set(None)
     now = datetime.now(timezone.utc)
     
     # Проверяем кулдаун
     if user_id in last_role_check:
         time_since_last_check = now - last_role_check[user_id]
         if time_since_last_check < ROLE_CHECK_COOLDOWN:
-            logger.debug(f"Role check for user {user_id} skipped due to cooldown ({time_since_last_check.total_seconds():.1f}s since last check)")
+            logger.debug("role_check_cooldown", user_id=user_id, seconds_since_check=round(time_since_last_check.total_seconds(), 1))
             return None
     
-    logger.info(f"Triggering role check for user {user_id} due to action: {action}")
+    logger.info("role_check_triggered", user_id=user_id, action=action)
     last_role_check[user_id] = now
     
     async with role_check_semaphore:  # Ограничиваем количество одновременных проверок
@@ -83,23 +88,45 @@ async def trigger_role_check_for_user(user_id: int, action: str):
             result = await role_checker_service.check_user_by_id(user_id)
             if result:
                 if result.get("changed"):
-                    logger.info(f"User {user_id} role changed during {action}: {result}")
+                    logger.info("user_role_changed", user_id=user_id, action=action, result=result)
                 
                 if not result.get("has_access"):
-                    logger.warning(f"User {user_id} lost access during {action}")
+                    logger.warning("user_lost_access", user_id=user_id, action=action)
                     
                 return result
                     
         except Exception as e:
-            logger.error(f"Error checking roles for user {user_id} during {action}: {e}")
+            logger.error("role_check_failed", user_id=user_id, action=action, error=str(e))
             return None
 
 
+def _schedule_role_check(user_id: int, action_name: str):
+    """
+    Поставить фоновую проверку ролей в event loop
+    """
+    asyncio.create_task(trigger_role_check_for_user(user_id, action_name))
+
+
 def with_role_check(action_name: str):
     """
     Упрощенный декоратор для эндпоинтов FastAPI
+
+    Поддерживает как async, так и синхронные эндпоинты. Синхронные FastAPI
+    выполняет в пуле потоков, поэтому задача проверки ролей ставится в loop через anyio.
     """
     def decorator(func: Callable) -> Callable:
+        if not asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            def sync_wrapper(*args, **kwargs):
+                current_user = kwargs.get('current_user')
+
+                if current_user and isinstance(current_user, User):
+                    anyio.from_thread.run_sync(_schedule_role_check, current_user.id, action_name)
+
+                return func(*args, **kwargs)
+
+            return sync_wrapper
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
             # Ищем current_user в kwargs
@@ -107,12 +134,10 @@ def with_role_check(action_name: str):
             
             if current_user and isinstance(current_user, User):
                 # Запускаем проверку ролей в фоне
-                asyncio.create_task(
-                    trigger_role_check_for_user(current_user.id, action_name)
-                )
+                _schedule_role_check(current_user.id, action_name)
             
             # Выполняем оригинальную функцию
             return await func(*args, **kwargs)
         
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
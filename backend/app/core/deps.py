@@ -4,10 +4,13 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.logging_config import get_logger
 from app.core.security import verify_token
 from app.crud.user import user_crud
 from app.models.user import User
 
+logger = get_logger(__name__)
+
 # Схема безопасности
 security = HTTPBearer()
 
@@ -19,9 +22,7 @@ def get_current_user(
     """
     Получение текущего пользователя по JWT токену
     """
-    print(f"DEBUG get_current_user: Received token: {credentials.credentials[:20]}...")
     payload = verify_token(credentials.credentials)
-    print(f"DEBUG get_current_user: Token payload: {payload}")
     discord_id = payload.get("sub")
 
     if not discord_id:
@@ -34,31 +35,24 @@ def get_current_user(
     # Discord ID остается строкой как в базе данных
 
     user = user_crud.get_by_discord_id(db, discord_id=discord_id)
-    print(f"DEBUG get_current_user: Found user: {user.discord_username if user else 'None'}")
     if not user:
-        print(f"DEBUG get_current_user: User not found for discord_id: {discord_id}")
+        logger.debug("auth_user_not_found", discord_id=discord_id)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Пользователь не найден",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    print(f"DEBUG get_current_user: User {user.discord_username} is_active: {user.is_active}")
     if not user.is_active:
-        print(f"DEBUG get_current_user: User {user.discord_username} is BLOCKED (is_active=False)")
+        logger.debug("auth_user_blocked", user=user.discord_username)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Пользователь заблокирован"
         )
 
     # Проверяем, что у пользователя есть валидная роль
-    print(f"DEBUG deps.py: User {user.discord_username} has role: '{user.role}', is_active: {user.is_active}")
-    print(f"DEBUG deps.py: User discord_roles: {user.discord_roles}")
-    print(f"DEBUG deps.py: User created_at: {user.created_at}")
-    
     if user.role not in ["admin", "police", "citizen"]:
-        print(f"DEBUG deps.py: Invalid role '{user.role}', expected 'admin', 'police' or 'citizen'")
-        print(f"DEBUG deps.py: User full data: id={user.id}, discord_id={user.discord_id}, role={user.role}")
+        logger.debug("auth_invalid_role", user_id=user.id, discord_id=user.discord_id, role=user.role)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"У вас нет необходимых ролей для доступа к системе. Текущая роль: {user.role}"
@@ -130,11 +124,8 @@ def get_current_user_for_refresh(
     """
     Получение текущего пользователя для обновления токена (разрешаем истекшие токены)
     """
-    print(f"DEBUG get_current_user_for_refresh: Received token: {credentials.credentials[:20]}...")
-    
     # Разрешаем истекшие токены для обновления
     payload = verify_token(credentials.credentials, allow_expired=True)
-    print(f"DEBUG get_current_user_for_refresh: Token payload: {payload}")
     discord_id = payload.get("sub")
 
     if not discord_id:
@@ -145,28 +136,24 @@ def get_current_user_for_refresh(
         )
 
     user = user_crud.get_by_discord_id(db, discord_id=discord_id)
-    print(f"DEBUG get_current_user_for_refresh: Found user: {user.discord_username if user else 'None'}")
     if not user:
-        print(f"DEBUG get_current_user_for_refresh: User not found for discord_id: {discord_id}")
+        logger.debug("auth_refresh_user_not_found", discord_id=discord_id)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Пользователь не найден",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    print(f"DEBUG get_current_user_for_refresh: User {user.discord_username} is_active: {user.is_active}")
     if not user.is_active:
-        print(f"DEBUG get_current_user_for_refresh: User {user.discord_username} is BLOCKED (is_active=False)")
+        logger.debug("auth_refresh_user_blocked", user=user.discord_username)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Пользователь заблокирован"
         )
 
     # Проверяем, что у пользователя есть валидная роль
-    print(f"DEBUG deps.py: User {user.discord_username} has role: '{user.role}', is_active: {user.is_active}")
-    
     if user.role not in ["admin", "police", "citizen"]:
-        print(f"DEBUG deps.py: Invalid role '{user.role}', expected 'admin', 'police' or 'citizen'")
+        logger.debug("auth_refresh_invalid_role", user_id=user.id, role=user.role)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"У вас нет необходимых ролей для доступа к системе. Текущая роль: {user.role}"
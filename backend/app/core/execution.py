@@ -0,0 +1,214 @@
+import threading
+import time
+from contextvars import ContextVar
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+import anyio.to_thread
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+# Крайний срок текущего запроса (по time.monotonic) для вызовов внешних API
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def db_thread_limit() -> int:
+    """
+    Размер пула потоков для синхронной работы с БД
+
+    По умолчанию совпадает с максимальным числом соединений пула SQLAlchemy
+    (pool_size + max_overflow): больше потоков все равно ждали бы соединение.
+    """
+    if settings.DB_THREAD_LIMIT > 0:
+        return settings.DB_THREAD_LIMIT
+    return settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+
+
+def configure_db_thread_limiter() -> int:
+    """
+    Настроить лимитер пула потоков anyio (вызывается в lifespan, внутри event loop)
+
+    Лимитер общий: через него идут синхронные (def) эндпоинты FastAPI,
+    синхронные зависимости и вызовы run_db.
+    """
+    limit = db_thread_limit()
+    anyio.to_thread.current_default_thread_limiter().total_tokens = limit
+    return limit
+
+
+async def run_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Выполнить синхронный участок работы с БД в пуле потоков
+
+    Для async эндпоинтов, которые между обращениями к БД ждут внешние API.
+    Сессию нельзя использовать из нескольких потоков одновременно —
+    не запускайте параллельно несколько run_db с одной сессией.
+    """
+    return await anyio.to_thread.run_sync(partial(func, *args, **kwargs))
+
+
+def route_template(scope: dict) -> str:
+    """
+    Шаблон маршрута запроса (/passports/{passport_id}), а не сырой путь
+
+    Доступен после того, как роутер FastAPI сопоставил запрос (scope["route"]).
+    """
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path or "unmatched"
+
+
+def remaining_budget() -> Optional[float]:
+    """
+    Сколько секунд осталось до крайнего срока запроса (None — срок не задан)
+    """
+    deadline = request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware: крайний срок запроса для вызовов внешних API
+
+    Срок — UPSTREAM_REQUEST_DEADLINE секунд от начала запроса; клиент может
+    сократить его заголовком X-Request-Timeout (секунды). Клиенты из app/clients
+    не ждут внешний API дольше оставшегося времени.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or settings.UPSTREAM_REQUEST_DEADLINE <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        budget = settings.UPSTREAM_REQUEST_DEADLINE
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-timeout":
+                try:
+                    budget = min(budget, max(0.0, float(value)))
+                except ValueError:
+                    pass
+                break
+
+        token = request_deadline.set(time.monotonic() + budget)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_deadline.reset(token)
+
+
+class _TimedCoroutine:
+    """
+    Обертка над корутиной, считающая время ее выполнения на event loop
+
+    Учитываются только отрезки между await — время ожидания I/O и работы
+    в пуле потоков не входит, то есть это время, на которое запрос блокировал loop.
+    """
+
+    def __init__(self, coro):
+        self._coro = coro
+        self.blocked = 0.0
+
+    def __await__(self):
+        message = None
+        error = None
+        while True:
+            started = time.perf_counter()
+            try:
+                if error is None:
+                    yielded = self._coro.send(message)
+                else:
+                    yielded = self._coro.throw(error)
+            except StopIteration as stop:
+                self.blocked += time.perf_counter() - started
+                return stop.value
+            except BaseException:
+                self.blocked += time.perf_counter() - started
+                raise
+            self.blocked += time.perf_counter() - started
+
+            message = None
+            error = None
+            try:
+                message = yield yielded
+            except BaseException as e:
+                error = e
+
+
+class LoopBlockStats:
+    """
+    Статистика времени блокировки event loop по маршрутам
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, List[float]] = {}
+
+    def record(self, route: str, blocked: float) -> None:
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                self._routes[route] = [1, blocked, blocked]
+            else:
+                stats[0] += 1
+                stats[1] += blocked
+                stats[2] = max(stats[2], blocked)
+
+    def snapshot(self, limit: Optional[int] = None) -> List[dict]:
+        """
+        Маршруты, отсортированные по суммарному времени блокировки
+        """
+        with self._lock:
+            items = [(route, list(stats)) for route, stats in self._routes.items()]
+
+        result = [
+            {
+                "route": route,
+                "requests": int(count),
+                "blocked_total_ms": round(total * 1000, 2),
+                "blocked_avg_ms": round(total * 1000 / count, 2),
+                "blocked_max_ms": round(maximum * 1000, 2)
+            }
+            for route, (count, total, maximum) in items
+        ]
+        result.sort(key=lambda item: item["blocked_total_ms"], reverse=True)
+        return result[:limit] if limit else result
+
+    def status(self) -> dict:
+        return {
+            "db_thread_limit": db_thread_limit(),
+            "routes": self.snapshot(limit=20)
+        }
+
+
+class LoopBlockingMiddleware:
+    """
+    ASGI middleware: время, проведенное запросом на event loop, по шаблону маршрута
+
+    Должен быть подключен внутри middleware на BaseHTTPMiddleware (т.е. добавлен раньше),
+    иначе обработчик выполняется в отдельной задаче и не попадает в замер.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timed = _TimedCoroutine(self.app(scope, receive, send))
+        try:
+            await timed
+        finally:
+            loop_block_stats.record(route_template(scope), timed.blocked)
+
+
+# Глобальный экземпляр статистики
+loop_block_stats = LoopBlockStats()
@@ -0,0 +1,101 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+from typing import Optional
+
+import structlog
+
+from app.core.config import settings
+
+# Слушатель очереди логов (запись в stdout выполняется в отдельном потоке)
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler без форматирования в вызывающем потоке
+
+    Стандартный prepare() форматирует запись сразу; здесь запись уходит в очередь как есть,
+    а рендеринг (в т.ч. JSON) выполняет ProcessorFormatter в потоке слушателя.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _shared_processors() -> list:
+    return [
+        structlog.contextvars.merge_contextvars,
+        structlog.stdlib.add_log_level,
+        structlog.stdlib.add_logger_name,
+        structlog.processors.TimeStamper(fmt="iso", utc=True),
+    ]
+
+
+def setup_logging() -> None:
+    """
+    Настройка логирования приложения
+
+    structlog и стандартный logging пишут через общую неблокирующую очередь;
+    уровень задается LOG_LEVEL, а для отдельных модулей — LOG_LEVELS.
+    Повторный вызов ничего не делает.
+    """
+    global _queue_listener
+    if _queue_listener is not None:
+        return
+
+    renderer = (
+        structlog.processors.JSONRenderer()
+        if settings.LOG_FORMAT.lower() == "json"
+        else structlog.dev.ConsoleRenderer(colors=False)
+    )
+    formatter = structlog.stdlib.ProcessorFormatter(
+        foreign_pre_chain=[
+            *_shared_processors(),
+            structlog.stdlib.ExtraAdder(),
+        ],
+        processors=[
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            structlog.processors.format_exc_info,
+            renderer,
+        ],
+    )
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=False)
+    _queue_listener.start()
+    atexit.register(_queue_listener.stop)
+
+    root_logger = logging.getLogger()
+    root_logger.handlers = [_DeferredQueueHandler(log_queue)]
+    root_logger.setLevel(settings.LOG_LEVEL.upper())
+
+    # Уровни для отдельных модулей, например {"app.core.deps": "DEBUG", "httpx": "WARNING"}
+    for logger_name, level in settings.LOG_LEVELS.items():
+        logging.getLogger(logger_name).setLevel(level.upper())
+
+    structlog.configure(
+        processors=[
+            # Отброс записи до форматирования, если уровень отключен
+            structlog.stdlib.filter_by_level,
+            *_shared_processors(),
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            structlog.processors.StackInfoRenderer(),
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+
+
+def get_logger(name: str) -> structlog.stdlib.BoundLogger:
+    """
+    Получить структурированный логгер модуля
+    """
+    return structlog.stdlib.get_logger(name)
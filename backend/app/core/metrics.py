@@ -0,0 +1,201 @@
+import time
+from typing import Optional
+
+import httpx
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from app.core.execution import loop_block_stats, route_template
+
+# Бакеты под HTTP-запросы и вызовы внешних API (секунды)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP запросы", ["method", "route", "status"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Время обработки HTTP запроса", ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP запросы в обработке"
+)
+
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Ожидание соединения из пула SQLAlchemy (включая установку нового)",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0)
+)
+
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "upstream_request_duration_seconds", "Время запросов к внешним API", ["service", "method", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+
+ROLE_CHECK_PASS_DURATION = Histogram(
+    "role_checker_pass_duration_seconds", "Длительность полного прохода проверки ролей",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+)
+ROLE_CHECK_USERS = Counter(
+    "role_checker_users_total", "Результаты проверки ролей пользователей", ["result"]
+)
+
+LOGIN_STEP_DURATION = Histogram(
+    "auth_login_step_duration_seconds", "Длительность шагов входа через Discord OAuth", ["step"],
+    buckets=LATENCY_BUCKETS
+)
+
+SSE_CONNECTIONS = Gauge(
+    "sse_connections", "Активные SSE соединения"
+)
+SSE_EVENTS = Counter(
+    "sse_events_total", "События SSE по результату постановки в очередь", ["outcome"]
+)
+
+
+class PrometheusMiddleware:
+    """
+    ASGI middleware: количество и длительность запросов по шаблону маршрута и статусу
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            labels = (scope["method"], route_template(scope), str(status_code))
+            HTTP_REQUESTS.labels(*labels).inc()
+            HTTP_REQUEST_DURATION.labels(*labels).observe(elapsed)
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    Транспорт httpx, замеряющий время запросов к внешнему API
+
+    outcome: код ответа (2xx/4xx/5xx) или имя исключения (ConnectTimeout и т.п.).
+    """
+
+    def __init__(self, service: str, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.service = service
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await self._transport.handle_async_request(request)
+            outcome = f"{response.status_code // 100}xx"
+            return response
+        except Exception as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            UPSTREAM_REQUEST_DURATION.labels(self.service, request.method, outcome).observe(
+                time.perf_counter() - started
+            )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class _RuntimeCollector:
+    """
+    Метрики, снимаемые в момент опроса: пул соединений, задержка event loop,
+    время блокировки loop по маршрутам
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def collect(self):
+        pool = self.engine.pool
+        if hasattr(pool, "checkedout"):
+            yield GaugeMetricFamily("db_pool_size", "Базовый размер пула соединений", value=pool.size())
+            yield GaugeMetricFamily("db_pool_checked_out", "Соединения, выданные из пула", value=pool.checkedout())
+            yield GaugeMetricFamily("db_pool_checked_in", "Свободные соединения в пуле", value=pool.checkedin())
+            yield GaugeMetricFamily(
+                "db_pool_overflow", "Соединения сверх pool_size (отрицательное — еще не созданы)",
+                value=pool.overflow()
+            )
+
+        # Импорт здесь: app.services импортирует клиенты, которые сами импортируют этот модуль
+        from app.services.loop_monitor import loop_monitor_service
+
+        lag = GaugeMetricFamily("event_loop_lag_seconds", "Задержка event loop по перцентилям", labels=["quantile"])
+        percentiles = loop_monitor_service.percentiles()
+        for quantile, key in (("0.5", "p50_ms"), ("0.9", "p90_ms"), ("0.99", "p99_ms"), ("1", "max_ms")):
+            lag.add_metric([quantile], percentiles[key] / 1000)
+        yield lag
+        yield CounterMetricFamily(
+            "event_loop_stalls", "Зависания event loop дольше порога", value=loop_monitor_service.stalls_total
+        )
+
+        # Импорт здесь по той же причине: клиенты импортируют этот модуль
+        from app.clients.resilience import CircuitBreaker, upstreams
+
+        circuit = GaugeMetricFamily(
+            "upstream_circuit_open", "Предохранитель внешнего API разомкнут (1) или замкнут (0)", labels=["service"]
+        )
+        for name, upstream in upstreams.items():
+            circuit.add_metric([name], 0 if upstream.breaker.state == CircuitBreaker.CLOSED else 1)
+        yield circuit
+
+        blocked = CounterMetricFamily(
+            "http_request_loop_blocked_seconds", "Время, проведенное запросами на event loop", labels=["route"]
+        )
+        for item in loop_block_stats.snapshot():
+            blocked.add_metric([item["route"]], item["blocked_total_ms"] / 1000)
+        yield blocked
+
+
+def instrument_engine(engine) -> None:
+    """
+    Подключить метрики пула соединений SQLAlchemy
+
+    Время ожидания соединения снимается оберткой над QueuePool._do_get:
+    публичных событий "начало ожидания" у пула нет.
+    """
+    pool = engine.pool
+    do_get = getattr(pool, "_do_get", None)
+    if getattr(do_get, "_instrumented", False):
+        return
+
+    if do_get is not None:
+        def timed_do_get():
+            started = time.perf_counter()
+            try:
+                return do_get()
+            finally:
+                DB_POOL_WAIT.observe(time.perf_counter() - started)
+
+        timed_do_get._instrumented = True
+        pool._do_get = timed_do_get
+
+    REGISTRY.register(_RuntimeCollector(engine))
+
+
+def render_metrics() -> bytes:
+    """
+    Текущие метрики процесса в текстовом формате Prometheus
+    """
+    return generate_latest(REGISTRY)
+
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
@@ -1,5 +1,4 @@
 import asyncio
-import logging
 from typing import Callable, Optional
 from fastapi import Request, Response, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -8,9 +7,10 @@ from starlette.middleware.base import BaseHTTPMiddleware
 
 from app.core.database import SessionLocal
 from app.core.deps import get_current_user_by_token
+from app.core.logging_config import get_logger
 from app.services.role_checker import role_checker_service
 
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 class RoleCheckMiddleware(BaseHTTPMiddleware):
     """
@@ -77,11 +77,11 @@ class RoleCheckMiddleware(BaseHTTPMiddleware):
                     
                     # Логируем действие
                     action = self.ROLE_CHECK_ENDPOINTS[endpoint_key]
-                    logger.info(f"User {user.discord_username} performed action: {action}")
+                    logger.info("user_action", user=user.discord_username, action=action)
                     
         except Exception as e:
             # Если произошла ошибка при проверке токена, не прерываем запрос
-            logger.error(f"Error in role check middleware: {e}")
+            logger.error("role_check_middleware_error", error=str(e))
         
         # Продолжаем обработку запроса
         return await call_next(request)
@@ -94,13 +94,13 @@ class RoleCheckMiddleware(BaseHTTPMiddleware):
             result = await role_checker_service.check_user_by_id(user_id)
             if result:
                 if result.get("changed"):
-                    logger.info(f"User {user_id} role changed during action: {result}")
+                    logger.info("user_role_changed", user_id=user_id, result=result)
                 
                 if not result.get("has_access"):
-                    logger.warning(f"User {user_id} lost access during action")
+                    logger.warning("user_lost_access", user_id=user_id)
                     
         except Exception as e:
-            logger.error(f"Error checking roles for user {user_id}: {e}")
+            logger.error("role_check_failed", user_id=user_id, error=str(e))
 
 
 def get_user_token_from_request(request: Request) -> Optional[str]:
@@ -118,19 +118,19 @@ async def trigger_role_check_for_user(user_id: int, action: str):
     """
     Запускает проверку ролей для пользователя при выполнении действия
     """
-    logger.info(f"Triggering role check for user {user_id} due to action: {action}")
+    logger.info("role_check_triggered", user_id=user_id, action=action)
     
     try:
         result = await role_checker_service.check_user_by_id(user_id)
         if result:
             if result.get("changed"):
-                logger.info(f"User {user_id} role changed during {action}: {result}")
+                logger.info("user_role_changed", user_id=user_id, action=action, result=result)
             
             if not result.get("has_access"):
-                logger.warning(f"User {user_id} lost access during {action}")
+                logger.warning("user_lost_access", user_id=user_id, action=action)
                 
             return result
                 
     except Exception as e:
-        logger.error(f"Error checking roles for user {user_id} during {action}: {e}")
+        logger.error("role_check_failed", user_id=user_id, action=action, error=str(e))
         return None
\ No newline at end of file
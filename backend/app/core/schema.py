@@ -0,0 +1,63 @@
+"""
+Управление схемой базы данных
+
+Схемой управляет Alembic. Приложение при старте таблицы не создает —
+только если явно включен DB_CREATE_ALL (локальная разработка, тесты).
+
+Запуск при деплое (docker-entrypoint.sh):
+    python -m app.core.schema
+"""
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from app.core.database import engine
+from app.core.logging_config import get_logger
+from app.models import Base
+from app.services.log_partitions import log_partition_service
+
+logger = get_logger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+
+def _alembic_config() -> Config:
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    return config
+
+
+def create_schema() -> None:
+    """
+    Создать все таблицы по моделям (create_all) и партиции логов
+    """
+    Base.metadata.create_all(bind=engine)
+    # Партиционированная таблица logs без партиций не принимает записи
+    if log_partition_service.is_supported:
+        log_partition_service.run_maintenance()
+
+
+def bootstrap_database() -> str:
+    """
+    Привести схему к актуальной версии
+
+    Пустая база: create_all по моделям и alembic stamp head (ранние миграции
+    не содержат создания базовых таблиц). Существующая база: alembic upgrade head.
+    """
+    config = _alembic_config()
+
+    if not inspect(engine).has_table("users"):
+        create_schema()
+        command.stamp(config, "head")
+        logger.info("database_schema_created")
+        return "created"
+
+    command.upgrade(config, "head")
+    logger.info("database_schema_upgraded")
+    return "upgraded"
+
+
+if __name__ == "__main__":
+    print(f"Database schema {bootstrap_database()}")
@@ -3,11 +3,15 @@ from app.crud.passport import passport_crud
 from app.crud.fine import fine_crud
 from app.crud.payment import payment
 from app.crud.log import log_crud
+from app.crud.log_catalog import log_catalog_crud
+from app.crud.job import job_crud
 
 __all__ = [
     "user_crud",
     "passport_crud", 
     "fine_crud",
     "payment",
-    "log_crud"
+    "log_crud",
+    "log_catalog_crud",
+    "job_crud"
 ]
\ No newline at end of file
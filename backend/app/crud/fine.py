@@ -1,11 +1,14 @@
 from typing import List, Optional
 from datetime import datetime
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import case, func, literal, null, tuple_
 
+from app.core.cache import response_cache, CACHE_FINES_STATS, CACHE_PASSPORTS_STATS
 from app.crud.base import CRUDBase
 from app.models.fine import Fine
+from app.models.passport import Passport
+from app.models.user import User
 from app.schemas.fine import FineCreate, FineUpdate
 
 
@@ -46,11 +49,18 @@ class CRUDFine(CRUDBase[Fine, FineCreate, FineUpdate]):
 
         return obj
 
+    def update(self, db: Session, *, db_obj: Fine, obj_in) -> Fine:
+        """
+        Обновить штраф
+        """
+        fine = super().update(db, db_obj=db_obj, obj_in=obj_in)
+        response_cache.invalidate(CACHE_FINES_STATS)
+        return fine
+
     def _update_passport_violations_count(self, db: Session, passport_id: int) -> None:
         """
         Обновить количество нарушений для паспорта
         """
-        from app.models.passport import Passport
 
         violations_count = db.query(func.count(Fine.id)).filter(
             Fine.passport_id == passport_id
@@ -61,6 +71,9 @@ class CRUDFine(CRUDBase[Fine, FineCreate, FineUpdate]):
         })
         db.commit()
 
+        # Изменились и штрафы, и счетчик нарушений паспорта
+        response_cache.invalidate(CACHE_FINES_STATS, CACHE_PASSPORTS_STATS)
+
     def get_by_passport_id(
             self, db: Session, *, passport_id: int, skip: int = 0, limit: int = 100
     ) -> List[Fine]:
@@ -156,13 +169,133 @@ class CRUDFine(CRUDBase[Fine, FineCreate, FineUpdate]):
             "total_amount": total_amount or 0
         }
 
+    def get_overview_statistics(
+            self,
+            db: Session,
+            *,
+            date_from: Optional[datetime] = None,
+            date_to: Optional[datetime] = None
+    ) -> dict:
+        """
+        Получить общую статистику по штрафам за два запроса к БД
+
+        1. Итоги за период с разбивкой на оплаченные/неоплаченные (один агрегатный проход).
+        2. Топ статей и рейтинг сотрудников одним GROUP BY GROUPING SETS с JOIN на users
+           (вне PostgreSQL — двумя обычными GROUP BY).
+        """
+
+        filters = []
+        if date_from:
+            filters.append(Fine.created_at >= date_from)
+        if date_to:
+            filters.append(Fine.created_at <= date_to)
+
+        paid = Fine.is_paid == True
+        unpaid = Fine.is_paid == False
+        # GROUPING SETS и FILTER (WHERE ...) есть только в PostgreSQL
+        is_postgres = db.get_bind().dialect.name == "postgresql"
+
+        def where(aggregate, column, condition):
+            if is_postgres:
+                return aggregate(column).filter(condition)
+            return aggregate(case((condition, column)))
+
+        # Итоги
+        totals = db.query(
+            func.count(Fine.id),
+            func.sum(Fine.amount),
+            func.avg(Fine.amount),
+            where(func.count, Fine.id, paid),
+            where(func.sum, Fine.amount, paid),
+            where(func.count, Fine.id, unpaid),
+            where(func.sum, Fine.amount, unpaid)
+        ).filter(*filters).one()
+        (total_fines, total_amount, avg_amount,
+         paid_count, paid_amount, unpaid_count, unpaid_amount) = totals
+
+        group_columns = (
+            func.count(Fine.id),
+            func.sum(Fine.amount),
+            where(func.count, Fine.id, paid),
+            where(func.sum, Fine.amount, unpaid)
+        )
+        officer_key = (Fine.created_by_user_id, User.id, User.minecraft_username, User.discord_username)
+
+        if is_postgres:
+            # Группировки по статье и по сотруднику за один проход
+            grouped_rows = (
+                db.query(func.grouping(Fine.article), Fine.article, *officer_key, *group_columns)
+                .outerjoin(User, Fine.created_by_user_id == User.id)
+                .filter(*filters)
+                .group_by(func.grouping_sets(tuple_(Fine.article), tuple_(*officer_key)))
+                .all()
+            )
+        else:
+            # Остальные СУБД: два обычных GROUP BY в том же формате строк
+            article_rows = (
+                db.query(literal(0), Fine.article, *(null() for _ in officer_key), *group_columns)
+                .filter(*filters)
+                .group_by(Fine.article)
+                .all()
+            )
+            officer_rows = (
+                db.query(literal(1), null(), *officer_key, *group_columns)
+                .outerjoin(User, Fine.created_by_user_id == User.id)
+                .filter(*filters)
+                .group_by(*officer_key)
+                .all()
+            )
+            grouped_rows = article_rows + officer_rows
+
+        top_articles = []
+        officers = []
+        for (officer_row, article, user_id, officer_id, minecraft_username, discord_username,
+             count, amount, group_paid_count, group_unpaid_amount) in grouped_rows:
+            if officer_row:
+                # Как и раньше: "Unknown" только если сотрудника нет в users
+                officers.append({
+                    "user_id": user_id,
+                    "username": minecraft_username if officer_id is not None else "Unknown",
+                    "discord_username": discord_username if officer_id is not None else "Unknown",
+                    "fines_count": count,
+                    "total_amount": amount or 0,
+                    "paid_count": group_paid_count,
+                    "unpaid_amount": group_unpaid_amount or 0
+                })
+            else:
+                top_articles.append({
+                    "article": article,
+                    "count": count,
+                    "total_amount": amount or 0,
+                    "paid_count": group_paid_count,
+                    "unpaid_amount": group_unpaid_amount or 0
+                })
+
+        top_articles.sort(key=lambda item: item["count"], reverse=True)
+        officers.sort(key=lambda item: item["fines_count"], reverse=True)
+
+        return {
+            "total_fines": total_fines,
+            "total_amount": total_amount or 0,
+            "average_amount": float(avg_amount) if avg_amount else 0,
+            "paid": {
+                "count": paid_count,
+                "total_amount": paid_amount or 0
+            },
+            "unpaid": {
+                "count": unpaid_count,
+                "total_amount": unpaid_amount or 0
+            },
+            "top_articles": top_articles[:10],
+            "officers": officers
+        }
+
     def get_multi_with_details(
             self, db: Session, *, skip: int = 0, limit: int = 100
     ) -> List[Fine]:
         """
         Получить список штрафов с подробной информацией
         """
-        from sqlalchemy.orm import joinedload
         return (
             db.query(Fine)
             .options(
@@ -180,8 +313,6 @@ class CRUDFine(CRUDBase[Fine, FineCreate, FineUpdate]):
         """
         Получить список штрафов с информацией о выписавшем сотруднике
         """
-        from app.models.user import User
-        from sqlalchemy.orm import joinedload
         
         return (
             db.query(Fine, User.discord_username, User.minecraft_username)
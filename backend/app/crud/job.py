@@ -0,0 +1,200 @@
+from typing import List, Optional, Dict, Any
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+
+from app.crud.base import CRUDBase
+from app.models.job import Job, ACTIVE_JOB_STATUSES
+from app.schemas.job import JobCreate, JobUpdate
+
+
+class CRUDJob(CRUDBase[Job, JobCreate, JobUpdate]):
+    """
+    CRUD операции для фоновых задач
+    """
+
+    def get_active_by_dedup_key(self, db: Session, *, dedup_key: str) -> Optional[Job]:
+        """
+        Получить активную задачу по ключу идемпотентности
+        """
+        return (
+            db.query(Job)
+            .filter(Job.dedup_key == dedup_key, Job.status.in_(ACTIVE_JOB_STATUSES))
+            .first()
+        )
+
+    def enqueue(
+            self,
+            db: Session,
+            *,
+            job_type: str,
+            params: Optional[Dict[str, Any]] = None,
+            dedup_key: Optional[str] = None,
+            created_by_user_id: Optional[int] = None
+    ) -> tuple[Job, bool]:
+        """
+        Поставить задачу в очередь
+
+        Если задан dedup_key и уже есть активная задача с таким ключом,
+        новая задача не создается и возвращается существующая.
+
+        Returns:
+            (задача, создана ли новая задача)
+        """
+        if dedup_key:
+            existing = self.get_active_by_dedup_key(db, dedup_key=dedup_key)
+            if existing:
+                return existing, False
+
+        db_obj = Job(
+            job_type=job_type,
+            params=params,
+            dedup_key=dedup_key,
+            status="pending",
+            progress_current=0,
+            created_by_user_id=created_by_user_id
+        )
+        db.add(db_obj)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Параллельный запрос успел поставить такую же задачу
+            db.rollback()
+            existing = self.get_active_by_dedup_key(db, dedup_key=dedup_key)
+            if existing:
+                return existing, False
+            raise
+        db.refresh(db_obj)
+        return db_obj, True
+
+    def claim_next(self, db: Session, *, worker_id: str) -> Optional[Job]:
+        """
+        Захватить следующую ожидающую задачу (SKIP LOCKED — без гонок между воркерами)
+        """
+        job = self._claimable(db).first()
+        if not job:
+            db.rollback()
+            return None
+
+        now = datetime.now(timezone.utc)
+        job.status = "running"
+        job.worker_id = worker_id
+        job.started_at = now
+        job.heartbeat_at = now
+        db.commit()
+        db.refresh(job)
+        return job
+
+    @staticmethod
+    def _claimable(db: Session):
+        """
+        Ожидающие задачи по порядку; строки, заблокированные другими воркерами, пропускаются
+        """
+        return (
+            db.query(Job)
+            .filter(Job.status == "pending")
+            .order_by(Job.id)
+            .with_for_update(skip_locked=True)
+        )
+
+    def update_progress(
+            self,
+            db: Session,
+            *,
+            job: Job,
+            current: int,
+            total: Optional[int] = None
+    ) -> bool:
+        """
+        Обновить прогресс задачи и heartbeat
+
+        Returns:
+            True, если запрошена отмена задачи
+        """
+        job.progress_current = current
+        if total is not None:
+            job.progress_total = total
+        job.heartbeat_at = datetime.now(timezone.utc)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job.cancel_requested
+
+    def finish(
+            self,
+            db: Session,
+            *,
+            job: Job,
+            status: str,
+            result: Optional[Dict[str, Any]] = None,
+            error: Optional[str] = None
+    ) -> Job:
+        """
+        Завершить задачу с указанным статусом (completed, failed, cancelled)
+        """
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = datetime.now(timezone.utc)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def request_cancel(self, db: Session, *, job: Job) -> Job:
+        """
+        Запросить отмену задачи
+
+        Ожидающая задача отменяется сразу, выполняющаяся — на ближайшем шаге прогресса.
+        """
+        if job.status == "pending":
+            job.status = "cancelled"
+            job.finished_at = datetime.now(timezone.utc)
+        if job.status in ACTIVE_JOB_STATUSES:
+            job.cancel_requested = True
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def requeue_stale(self, db: Session, *, stale_after_seconds: int) -> int:
+        """
+        Вернуть в очередь задачи, воркер которых перестал подавать сигналы (например, после рестарта)
+
+        Returns:
+            Количество возвращенных задач
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=stale_after_seconds)
+        count = (
+            db.query(Job)
+            .filter(Job.status == "running", Job.heartbeat_at < cutoff)
+            .update(
+                {"status": "pending", "worker_id": None},
+                synchronize_session=False
+            )
+        )
+        db.commit()
+        return count
+
+    def get_recent(
+            self,
+            db: Session,
+            *,
+            job_type: Optional[str] = None,
+            status: Optional[str] = None,
+            skip: int = 0,
+            limit: int = 50
+    ) -> List[Job]:
+        """
+        Получить последние задачи с фильтрами
+        """
+        query = db.query(Job)
+        if job_type:
+            query = query.filter(Job.job_type == job_type)
+        if status:
+            query = query.filter(Job.status == status)
+        return query.order_by(Job.id.desc()).offset(skip).limit(limit).all()
+
+
+job_crud = CRUDJob(Job)
@@ -1,11 +1,15 @@
-from typing import List, Optional
-from datetime import datetime
+import base64
+from typing import List, Optional, Sequence, Tuple
+from datetime import datetime, timedelta
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
+from sqlalchemy import func, or_, tuple_
 
+from app.core.cache import response_cache, CACHE_LOGS_CATALOG
 from app.crud.base import CRUDBase
-from app.models.log import Log
+from app.crud.log_catalog import log_catalog_crud
+from app.models.log import Log, SECURITY_ACTIONS
+from app.models.user import User
 from app.schemas.log import LogCreate, LogBase
 
 
@@ -37,8 +41,14 @@ class CRUDLog(CRUDBase[Log, LogCreate, LogBase]):
             ip_address=ip_address
         )
         db.add(db_obj)
+        # Справочник действий обновляется в той же транзакции, что и лог
+        catalog_changed = log_catalog_crud.record(db, action=action, entity_type=entity_type)
         db.commit()
         db.refresh(db_obj)
+
+        if catalog_changed:
+            log_catalog_crud.mark_known(action=action, entity_type=entity_type)
+            response_cache.invalidate(CACHE_LOGS_CATALOG)
         return db_obj
 
     def get_by_user_id(
@@ -125,6 +135,146 @@ class CRUDLog(CRUDBase[Log, LogCreate, LogBase]):
             .all()
         )
 
+    def build_filters(
+        self,
+        *,
+        user_id: Optional[int] = None,
+        action: Optional[str] = None,
+        entity_type: Optional[str] = None,
+        entity_id: Optional[int] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        exclude_actions: Optional[Sequence[str]] = None,
+        ip_address: Optional[str] = None,
+        user_role: Optional[str] = None,
+        search: Optional[str] = None
+    ) -> list:
+        """
+        Собрать SQL-условия для выборки логов
+
+        Порядок условий повторяет порядок столбцов в индексах: сначала равенства
+        по ведущим столбцам (user_id, action, entity_type, entity_id), затем диапазон
+        по created_at, в конце условия без индекса (NOT IN, ILIKE, поля users).
+        Фильтры user_role и search требуют JOIN на users (см. query_filtered).
+        """
+        filters = []
+
+        if user_id is not None:
+            filters.append(Log.user_id == user_id)
+        if action:
+            filters.append(Log.action == action)
+        if entity_type:
+            filters.append(Log.entity_type == entity_type)
+        if entity_id is not None:
+            filters.append(Log.entity_id == entity_id)
+
+        if date_from:
+            filters.append(Log.created_at >= date_from)
+        if date_to:
+            filters.append(Log.created_at <= date_to)
+
+        if exclude_actions:
+            filters.append(~Log.action.in_(exclude_actions))
+        if ip_address:
+            filters.append(Log.ip_address.ilike(f"%{ip_address}%"))
+        if user_role:
+            filters.append(User.role == user_role)
+        if search:
+            search_term = f"%{search}%"
+            filters.append(or_(
+                Log.action.ilike(search_term),
+                Log.entity_type.ilike(search_term),
+                Log.ip_address.ilike(search_term),
+                User.discord_username.ilike(search_term),
+                User.minecraft_username.ilike(search_term)
+            ))
+
+        return filters
+
+    def query_filtered(self, db: Session, **filters) -> Query:
+        """
+        Запрос логов с фильтрами build_filters (JOIN на users только при необходимости)
+        """
+        query = db.query(Log)
+        if filters.get("user_role") or filters.get("search"):
+            query = query.outerjoin(User, Log.user_id == User.id)
+        return query.filter(*self.build_filters(**filters))
+
+    def get_filtered(
+        self, db: Session, *, skip: int = 0, limit: int = 100, **filters
+    ) -> List[Log]:
+        """
+        Получить страницу логов по фильтрам, новые записи сначала
+        """
+        return (
+            self.query_filtered(db, **filters)
+            .order_by(Log.created_at.desc(), Log.id.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    def count_filtered(self, db: Session, **filters) -> int:
+        """
+        Подсчитать количество логов по фильтрам
+        """
+        return self.query_filtered(db, **filters).with_entities(func.count(Log.id)).scalar()
+
+    def get_security_feed(
+        self,
+        db: Session,
+        *,
+        since: datetime,
+        before: Optional[Tuple[datetime, int]] = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[Log]:
+        """
+        Получить ленту событий безопасности одним запросом
+
+        Использует частичный индекс ix_logs_security_created_at. Если передан before
+        (created_at, id) последней записи предыдущей страницы, используется keyset-пагинация
+        и skip игнорируется.
+        """
+        query = db.query(Log).filter(
+            Log.action.in_(SECURITY_ACTIONS),
+            Log.created_at >= since
+        ).order_by(Log.created_at.desc(), Log.id.desc())
+
+        if before:
+            query = query.filter(tuple_(Log.created_at, Log.id) < tuple_(*before))
+        else:
+            query = query.offset(skip)
+
+        return query.limit(limit).all()
+
+    @staticmethod
+    def encode_cursor(log: Log) -> str:
+        """
+        Курсор keyset-пагинации: urlsafe base64 от (created_at, id) записи
+        """
+        raw = f"{log.created_at.isoformat()}|{log.id}".encode()
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """
+        Разобрать курсор encode_cursor; ValueError, если курсор некорректен
+        """
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, log_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(log_id)
+
+    def count_security_events(self, db: Session, *, since: datetime) -> int:
+        """
+        Подсчитать количество событий безопасности за период
+        """
+        return (
+            db.query(func.count(Log.id))
+            .filter(Log.action.in_(SECURITY_ACTIONS), Log.created_at >= since)
+            .scalar()
+        )
+
     def get_by_ip_address(
         self, db: Session, *, ip_address: str, skip: int = 0, limit: int = 100
     ) -> List[Log]:
@@ -146,7 +296,6 @@ class CRUDLog(CRUDBase[Log, LogCreate, LogBase]):
         """
         Получить статистику активности пользователя
         """
-        from datetime import timedelta
         
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
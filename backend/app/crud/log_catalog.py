@@ -0,0 +1,60 @@
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models.log_catalog import LogCatalog
+from app.schemas.log import LogCatalogEntry
+
+
+class CRUDLogCatalog(CRUDBase[LogCatalog, LogCatalogEntry, LogCatalogEntry]):
+    """
+    CRUD операции для справочника действий в логах
+    """
+
+    def __init__(self, model):
+        super().__init__(model)
+        # Пары, уже записанные этим процессом (новая пара сбрасывает кеш справочника)
+        self._known_pairs: Set[Tuple[str, str]] = set()
+
+    def record(self, db: Session, *, action: str, entity_type: str) -> bool:
+        """
+        Учесть запись лога в справочнике (без commit — фиксируется вместе с логом)
+
+        Известные процессу пары не трогают БД; новая пара вставляется через
+        ON CONFLICT DO NOTHING, поэтому конкурентные записи логов не ждут друг друга
+        на строке справочника.
+
+        Returns:
+            True, если пара еще не известна процессу (после commit вызвать mark_known)
+        """
+        pair = (action, entity_type)
+        if pair in self._known_pairs:
+            return False
+
+        insert = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+        stmt = insert(LogCatalog).values(action=action, entity_type=entity_type)
+        db.execute(stmt.on_conflict_do_nothing(index_elements=["action", "entity_type"]))
+
+        return True
+
+    def mark_known(self, *, action: str, entity_type: str) -> None:
+        """
+        Запомнить пару после фиксации транзакции (при откате вставка повторится)
+        """
+        self._known_pairs.add((action, entity_type))
+
+    def get_catalog(self, db: Session) -> Dict[str, List[str]]:
+        """
+        Получить списки встречающихся типов действий и сущностей
+        """
+        rows = db.query(LogCatalog.action, LogCatalog.entity_type).all()
+
+        return {
+            "actions": sorted({action for action, _ in rows if action}),
+            "entity_types": sorted({entity_type for _, entity_type in rows if entity_type})
+        }
+
+
+log_catalog_crud = CRUDLogCatalog(LogCatalog)
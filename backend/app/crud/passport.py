@@ -2,11 +2,16 @@ from typing import List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
+from app.core.cache import response_cache, CACHE_PASSPORTS_STATS
 from app.crud.base import CRUDBase
+from app.models.fine import Fine
 from app.models.passport import Passport
 from app.schemas.passport import PassportCreate, PassportUpdate
 from app.clients.spworlds import spworlds_client
 from app.clients.bt_api import bt_client
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 
 class CRUDPassport(CRUDBase[Passport, PassportCreate, PassportUpdate]):
@@ -43,6 +48,7 @@ class CRUDPassport(CRUDBase[Passport, PassportCreate, PassportUpdate]):
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        response_cache.invalidate(CACHE_PASSPORTS_STATS)
         return db_obj
 
     def update(
@@ -61,13 +67,22 @@ class CRUDPassport(CRUDBase[Passport, PassportCreate, PassportUpdate]):
             elif isinstance(gender_value, str):
                 pass  # Уже строка
 
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        passport = super().update(db, db_obj=db_obj, obj_in=update_data)
+        response_cache.invalidate(CACHE_PASSPORTS_STATS)
+        return passport
+
+    def remove(self, db: Session, *, id: int) -> Passport:
+        """
+        Удалить паспорт
+        """
+        passport = super().remove(db, id=id)
+        response_cache.invalidate(CACHE_PASSPORTS_STATS)
+        return passport
 
     def update_violations_count(self, db: Session, *, passport_id: int) -> None:
         """
         Обновить количество нарушений для паспорта
         """
-        from app.models.fine import Fine
 
         violations_count = db.query(func.count(Fine.id)).filter(
             Fine.passport_id == passport_id
@@ -77,6 +92,66 @@ class CRUDPassport(CRUDBase[Passport, PassportCreate, PassportUpdate]):
             "violations_count": violations_count
         })
         db.commit()
+        response_cache.invalidate(CACHE_PASSPORTS_STATS)
+
+    def get_all_ids(self, db: Session) -> List[int]:
+        """
+        Получить ID всех паспортов
+        """
+        return [row[0] for row in db.query(Passport.id).order_by(Passport.id).all()]
+
+    def recount_violations(self, db: Session, *, passport_ids: List[int]) -> None:
+        """
+        Пересчитать количество нарушений для набора паспортов одним UPDATE
+        """
+
+        violations_subquery = (
+            db.query(func.count(Fine.id))
+            .filter(Fine.passport_id == Passport.id)
+            .correlate(Passport)
+            .scalar_subquery()
+        )
+        db.query(Passport).filter(Passport.id.in_(passport_ids)).update(
+            {"violations_count": violations_subquery},
+            synchronize_session=False
+        )
+        db.commit()
+        response_cache.invalidate(CACHE_PASSPORTS_STATS)
+
+    def get_statistics(self, db: Session) -> dict:
+        """
+        Получить статистику по паспортам
+        """
+        # Общая статистика
+        total_passports = db.query(func.count(Passport.id)).scalar()
+        emergency_count = db.query(func.count(Passport.id)).filter(Passport.is_emergency == True).scalar()
+
+        # Статистика по городам
+        cities_stats = db.query(
+            Passport.city,
+            func.count(Passport.id).label('count')
+        ).group_by(Passport.city).all()
+
+        # Статистика по полу
+        gender_stats = db.query(
+            Passport.gender,
+            func.count(Passport.id).label('count')
+        ).group_by(Passport.gender).all()
+
+        # Статистика по возрасту
+        avg_age = db.query(func.avg(Passport.age)).scalar()
+
+        # Статистика по нарушениям
+        total_violations = db.query(func.sum(Passport.violations_count)).scalar()
+
+        return {
+            "total_passports": total_passports,
+            "emergency_count": emergency_count,
+            "cities": [{"city": city, "count": count} for city, count in cities_stats],
+            "gender_distribution": [{"gender": gender, "count": count} for gender, count in gender_stats],
+            "average_age": float(avg_age) if avg_age else 0,
+            "total_violations": total_violations or 0
+        }
 
     def set_emergency_status(self, db: Session, *, passport_id: int, is_emergency: bool) -> Optional[Passport]:
         """
@@ -90,6 +165,7 @@ class CRUDPassport(CRUDBase[Passport, PassportCreate, PassportUpdate]):
         db.add(passport)
         db.commit()
         db.refresh(passport)
+        response_cache.invalidate(CACHE_PASSPORTS_STATS)
         return passport
 
     def get_by_nickname(self, db: Session, *, nickname: str) -> Optional[Passport]:
@@ -203,12 +279,11 @@ class CRUDPassport(CRUDBase[Passport, PassportCreate, PassportUpdate]):
         
         try:
             # Получаем баланс баллов труда
-            bt_balance = await bt_client.get_user_bt(passport.discord_id)
+            bt_balance = await bt_client.get_cached_user_bt(passport.discord_id)
             # Добавляем баланс к объекту паспорта (динамически)
             passport.bt_balance = bt_balance
-            print(f"DEBUG CRUD: BT balance for passport {id}: {bt_balance}")  # Отладка
         except Exception as e:
-            print(f"DEBUG CRUD: Error getting BT balance for passport {id}: {e}")  # Отладка
+            logger.warning("bt_balance_failed", passport_id=id, error=str(e))
             passport.bt_balance = None
             
         return passport
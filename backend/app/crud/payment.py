@@ -1,8 +1,10 @@
+from datetime import datetime
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 import json
 
+from app.core.cache import response_cache, CACHE_FINES_STATS
 from app.crud.base import CRUDBase
 from app.models.payment import Payment
 from app.models.fine import Fine
@@ -57,6 +59,7 @@ class CRUDPayment(CRUDBase[Payment, PaymentCreate, PaymentUpdate]):
             synchronize_session=False
         )
         db.commit()
+        response_cache.invalidate(CACHE_FINES_STATS)
     
     def get_by_passport(self, db: Session, *, passport_id: int) -> List[Payment]:
         """Получить все платежи паспорта"""
@@ -71,8 +74,6 @@ class CRUDPayment(CRUDBase[Payment, PaymentCreate, PaymentUpdate]):
         webhook_data: str
     ) -> Payment:
         """Завершить платеж успешно"""
-        from datetime import datetime
-        
         # Обновляем статус платежа
         payment.status = "completed"
         payment.payer_nickname = payer_nickname
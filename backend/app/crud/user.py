@@ -1,8 +1,9 @@
 from typing import Optional, List, Dict, Any, Union
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
+from app.core.cache import response_cache, CACHE_USERS_STATS
 from app.crud.base import CRUDBase
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
@@ -55,6 +56,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         )
         db.add(db_obj)
         db.commit()
+        response_cache.invalidate(CACHE_USERS_STATS)
         db.refresh(db_obj)
         return db_obj
 
@@ -72,10 +74,13 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             discord_roles: Optional[List[str]] = None,
             discord_access_token: Optional[str] = None,
             discord_refresh_token: Optional[str] = None,
-            discord_expires_at: Optional[datetime] = None
+            discord_expires_at: Optional[datetime] = None,
+            refreshed_at: Optional[datetime] = None
     ) -> User:
         """
         Обновить данные пользователя из Discord
+
+        refreshed_at передает только POST /auth/refresh (отметка для повторных вызовов).
         """
         if discord_username is not None:
             user.discord_username = discord_username
@@ -97,6 +102,8 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             user.discord_refresh_token = discord_refresh_token
         if discord_expires_at is not None:
             user.discord_expires_at = discord_expires_at
+        if refreshed_at is not None:
+            user.last_refreshed_at = refreshed_at
 
         user.last_role_check = datetime.utcnow()
         # Активируем пользователя при успешной авторизации Discord
@@ -104,9 +111,60 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
 
         db.add(user)
         db.commit()
+        response_cache.invalidate(CACHE_USERS_STATS)
         db.refresh(user)
         return user
 
+    def update_discord_tokens(
+            self,
+            db: Session,
+            *,
+            user: User,
+            discord_access_token: str,
+            discord_refresh_token: str,
+            discord_expires_at: datetime
+    ) -> User:
+        """
+        Обновить только OAuth токены Discord (без отметки о проверке ролей и активации)
+        """
+        user.discord_access_token = discord_access_token
+        user.discord_refresh_token = discord_refresh_token
+        user.discord_expires_at = discord_expires_at
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        return user
+
+    def get_user_ids_with_expiring_tokens(
+            self, db: Session, *, expiring_before: datetime, expired_after: datetime
+    ) -> List[int]:
+        """
+        Получить ID активных пользователей, чьи Discord токены истекают до expiring_before
+
+        Токены, истекшие раньше expired_after, не выбираются. Сначала идут еще действующие
+        токены (ближайшие к истечению), затем уже истекшие.
+        """
+        now = datetime.now(timezone.utc)
+        rows = (
+            db.query(User.id)
+            .filter(User.is_active == True)
+            .filter(User.discord_refresh_token != None)
+            .filter(User.discord_expires_at != None)
+            .filter(User.discord_expires_at < expiring_before)
+            .filter(User.discord_expires_at >= expired_after)
+            .order_by(User.discord_expires_at < now, User.discord_expires_at)
+            .all()
+        )
+        return [row[0] for row in rows]
+
+    def update(self, db: Session, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]) -> User:
+        """
+        Обновить пользователя
+        """
+        user = super().update(db, db_obj=db_obj, obj_in=obj_in)
+        response_cache.invalidate(CACHE_USERS_STATS)
+        return user
+
     def update_role_check(self, db: Session, *, user: User) -> User:
         """
         Обновить время последней проверки ролей
@@ -144,7 +202,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         """
         return db.query(User).filter(User.minecraft_uuid == minecraft_uuid).first()
 
-    def get_active_users(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[User]:
+    def get_active_users(self, db: Session, *, skip: int = 0, limit: Optional[int] = 100) -> List[User]:
         """
         Получить активных пользователей
         """
@@ -169,6 +227,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         user.is_active = False
         db.add(user)
         db.commit()
+        response_cache.invalidate(CACHE_USERS_STATS)
         db.refresh(user)
         return user
 
@@ -179,6 +238,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         user.is_active = True
         db.add(user)
         db.commit()
+        response_cache.invalidate(CACHE_USERS_STATS)
         db.refresh(user)
         return user
 
@@ -1,19 +1,33 @@
 import asyncio
+import hmac
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
+import anyio.to_thread
 import uvicorn
 
 from app.core.config import settings
-from app.core.database import engine, get_db
+from app.core.database import engine
+from app.core.execution import configure_db_thread_limiter, DeadlineMiddleware, LoopBlockingMiddleware
+from app.core.metrics import PrometheusMiddleware, instrument_engine, render_metrics, METRICS_CONTENT_TYPE
+from app.core.logging_config import setup_logging, get_logger
+from app.core.schema import create_schema
+from app.utils.serialization import AppJSONResponse
 from app.api.v1 import api_router
-from app.models import Base
 from app.clients import discord_client, spworlds_client
-from app.services import role_checker_service
+from app.clients.resilience import upstream_status
+from app.services import (
+    role_checker_service, leader_elector, job_worker_service, token_refresh_service, log_partition_service,
+    loop_monitor_service, health_probe_service
+)
+
+# Настраиваем логирование до запуска приложения
+setup_logging()
+logger = get_logger(__name__)
 
-# Создание таблиц в базе данных
-Base.metadata.create_all(bind=engine)
+# Метрики пула соединений для /metrics
+instrument_engine(engine)
 
 
 @asynccontextmanager
@@ -22,29 +36,51 @@ async def lifespan(app: FastAPI):
     Управление жизненным циклом приложения
     """
     # Startup
-    print(f"🚀 Запуск {settings.PROJECT_NAME} v{settings.VERSION}")
+    logger.info("app_starting", project=settings.PROJECT_NAME, version=settings.VERSION)
 
-    # Проверяем соединение с внешними сервисами
-    try:
-        spworlds_ping = await spworlds_client.ping()
-        print(f"✅ SP-Worlds API: {'доступен' if spworlds_ping else 'недоступен'}")
-    except Exception as e:
-        print(f"❌ SP-Worlds API: ошибка - {e}")
+    # Пул потоков для синхронных эндпоинтов и run_db по размеру пула соединений
+    db_threads = configure_db_thread_limiter()
+    logger.info("db_thread_pool_configured", threads=db_threads)
+
+    # Мониторинг задержки event loop запускаем первым, чтобы видеть и зависания при старте
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor_task = asyncio.create_task(loop_monitor_service.start())
+    else:
+        loop_monitor_task = None
+
+    # Схемой управляет Alembic (python -m app.core.schema); create_all только по явному флагу
+    if settings.DB_CREATE_ALL:
+        await anyio.to_thread.run_sync(create_schema)
+        logger.info("database_schema_created", source="DB_CREATE_ALL")
+
+    # Доступность БД и внешних API проверяется в фоне и не задерживает старт
+    health_probe_task = asyncio.create_task(health_probe_service.start())
+
+    # Запускаем выбор лидера: фоновые сервисы работают только в одном воркере
+    leader_election_task = asyncio.create_task(leader_elector.start())
 
     # Запускаем сервис проверки ролей
     if settings.ROLE_CHECK_INTERVAL > 0:
         role_checker_task = asyncio.create_task(role_checker_service.start())
-        print(f"✅ Сервис проверки ролей запущен (интервал: {settings.ROLE_CHECK_INTERVAL} мин)")
     else:
         role_checker_task = None
-        print("⚠️ Сервис проверки ролей отключен")
+        logger.warning("role_checker_disabled", reason="ROLE_CHECK_INTERVAL=0")
+
+    # Запускаем планировщик упреждающего обновления Discord токенов (работает в воркере-лидере)
+    token_refresh_task = asyncio.create_task(token_refresh_service.start())
+
+    # Запускаем воркер очереди задач (задачи захватываются через SKIP LOCKED в любом воркере)
+    job_worker_task = asyncio.create_task(job_worker_service.start())
 
-    print("✅ Приложение готово к работе!")
+    # Запускаем обслуживание партиций логов (работает в воркере-лидере)
+    log_partition_task = asyncio.create_task(log_partition_service.start())
+
+    logger.info("app_started", role_check_interval_minutes=settings.ROLE_CHECK_INTERVAL)
 
     yield
 
     # Shutdown
-    print(f"🛑 Остановка {settings.PROJECT_NAME}")
+    logger.info("app_stopping", project=settings.PROJECT_NAME)
 
     # Останавливаем сервис проверки ролей
     if role_checker_task:
@@ -54,12 +90,60 @@ async def lifespan(app: FastAPI):
             await role_checker_task
         except asyncio.CancelledError:
             pass
-        print("✅ Сервис проверки ролей остановлен")
+
+    # Останавливаем планировщик обновления токенов
+    await token_refresh_service.stop()
+    token_refresh_task.cancel()
+    try:
+        await token_refresh_task
+    except asyncio.CancelledError:
+        pass
+
+    # Останавливаем воркер очереди задач (незавершенные задачи вернутся в очередь)
+    await job_worker_service.stop()
+    job_worker_task.cancel()
+    try:
+        await job_worker_task
+    except asyncio.CancelledError:
+        pass
+
+    # Останавливаем обслуживание партиций логов
+    await log_partition_service.stop()
+    log_partition_task.cancel()
+    try:
+        await log_partition_task
+    except asyncio.CancelledError:
+        pass
+
+    # Освобождаем лидерство, чтобы другой воркер подхватил фоновые сервисы
+    leader_election_task.cancel()
+    try:
+        await leader_election_task
+    except asyncio.CancelledError:
+        pass
+    await leader_elector.stop()
+
+    # Останавливаем проверку зависимостей
+    await health_probe_service.stop()
+    health_probe_task.cancel()
+    try:
+        await health_probe_task
+    except asyncio.CancelledError:
+        pass
+
+    # Останавливаем мониторинг event loop
+    if loop_monitor_task:
+        await loop_monitor_service.stop()
+        loop_monitor_task.cancel()
+        try:
+            await loop_monitor_task
+        except asyncio.CancelledError:
+            pass
 
     # Закрываем HTTP клиенты
     await discord_client.close()
     await spworlds_client.close()
-    print("✅ HTTP клиенты закрыты")
+    logger.info("http_clients_closed")
 
 
 # Создание приложения FastAPI
@@ -67,6 +151,7 @@ app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     lifespan=lifespan,
+    default_response_class=AppJSONResponse,
     description="""
     ## РП Сервер - Система управления
 
@@ -98,6 +183,13 @@ app = FastAPI(
     redoc_url="/redoc" if settings.DEBUG else None,
 )
 
+# Замер времени блокировки event loop по маршрутам
+# (добавляется первым, чтобы оказаться внутри middleware на BaseHTTPMiddleware)
+app.add_middleware(LoopBlockingMiddleware)
+
+# Крайний срок запроса для вызовов внешних API
+app.add_middleware(DeadlineMiddleware)
+
 # Middleware для пропуска предупреждения ngrok
 @app.middleware("http")
 async def add_ngrok_header(request: Request, call_next):
@@ -105,6 +197,9 @@ async def add_ngrok_header(request: Request, call_next):
     response.headers["ngrok-skip-browser-warning"] = "true"
     return response
 
+# Метрики запросов по шаблонам маршрутов (внешний слой — учитывает все middleware)
+app.add_middleware(PrometheusMiddleware)
+
 # Настройка CORS - временно отключено из-за дублирования с внешним nginx
 # app.add_middleware(
 #     CORSMiddleware,
@@ -139,32 +234,66 @@ def root(response: Response):
     }
 
 
+@app.get("/livez")
+def liveness_check():
+    """
+    Проверка живости процесса (без обращения к БД и внешним API)
+    """
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+def readiness_check(response: Response):
+    """
+    Проверка готовности: последние результаты фоновой проверки зависимостей
+
+    503 пока недоступна БД (или еще не было ни одной проверки).
+    Недоступность внешних API отражается в отчете, но не влияет на статус.
+    """
+    response.headers["ngrok-skip-browser-warning"] = "true"
+    readiness = health_probe_service.readiness()
+    if not health_probe_service.is_ready:
+        response.status_code = 503
+    return readiness
+
+
 @app.get("/health")
-async def health_check(response: Response):
+def health_check(response: Response):
     """
-    Проверка состояния сервиса
+    Проверка состояния сервиса (совместимость, данные фоновой проверки)
     """
     response.headers["ngrok-skip-browser-warning"] = "true"
-    try:
-        # Проверяем подключение к базе данных
-        db = next(get_db())
-        from sqlalchemy import text
-        db.execute(text("SELECT 1"))
-        db.close()
-
-        # Проверяем внешние сервисы
-        spworlds_status = await spworlds_client.ping()
-
-        return {
-            "status": "healthy",
-            "database": "connected",
-            "spworlds_api": "connected" if spworlds_status else "disconnected",
-            "discord_integration": "enabled",
-            "role_checker": "running" if role_checker_service.is_running else "stopped",
-            "version": settings.VERSION
-        }
-    except Exception as e:
-        raise HTTPException(status_code=503, detail=f"Ошибка сервиса: {str(e)}")
+    health_probe_service.probe_database_now()
+    dependencies = health_probe_service.results
+    if not health_probe_service.is_ready:
+        raise HTTPException(status_code=503, detail="Ошибка сервиса: база данных недоступна")
+
+    spworlds = dependencies.get("spworlds", {})
+    return {
+        "status": "healthy",
+        "database": "connected",
+        "spworlds_api": "connected" if spworlds.get("ok") else "disconnected",
+        "discord_integration": "enabled",
+        "role_checker": "running" if role_checker_service.is_running else "stopped",
+        "circuit_breakers": upstream_status(),
+        "version": settings.VERSION
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    """
+    Метрики Prometheus текущего процесса
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    if settings.METRICS_TOKEN:
+        authorization = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(authorization, f"Bearer {settings.METRICS_TOKEN}"):
+            raise HTTPException(status_code=401, detail="Неверный токен метрик")
+
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
 
 
 @app.get("/api/v1/auth/discord/status")
@@ -5,6 +5,8 @@ from app.models.passport import Passport, Gender
 from app.models.fine import Fine
 from app.models.payment import Payment
 from app.models.log import Log
+from app.models.log_catalog import LogCatalog
+from app.models.job import Job
 
 __all__ = [
     "BaseModel",
@@ -15,5 +17,7 @@ __all__ = [
     "Gender",
     "Fine",
     "Payment",
-    "Log"
+    "Log",
+    "LogCatalog",
+    "Job"
 ]
\ No newline at end of file
@@ -0,0 +1,47 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, Text, JSON, Boolean, DateTime, Index, text
+
+from app.models.base import BaseModel
+
+
+# Статусы задач, которые считаются активными (для идемпотентной постановки)
+ACTIVE_JOB_STATUSES = ("pending", "running")
+
+
+class Job(BaseModel):
+    """
+    Модель фоновой задачи (очередь в базе данных)
+    """
+    __tablename__ = "jobs"
+
+    job_type = Column(String(50), nullable=False, index=True)  # Тип задачи (mass_role_check, ...)
+    status = Column(String(20), nullable=False, default="pending", index=True)  # pending, running, completed, failed, cancelled
+    dedup_key = Column(String(100), nullable=True)  # Ключ идемпотентности (одна активная задача на ключ)
+    params = Column(JSON, nullable=True)  # Параметры задачи
+
+    # Прогресс выполнения
+    progress_current = Column(Integer, default=0, nullable=False)
+    progress_total = Column(Integer, nullable=True)
+
+    # Результат
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    # Отмена и владение
+    cancel_requested = Column(Boolean, default=False, nullable=False)
+    worker_id = Column(String(100), nullable=True)  # Воркер, выполняющий задачу
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # Последний сигнал жизни от воркера
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+
+    __table_args__ = (
+        # Не больше одной активной задачи на ключ идемпотентности
+        Index(
+            "ix_jobs_dedup_key_active",
+            "dedup_key",
+            unique=True,
+            postgresql_where=text("status IN ('pending', 'running')"),
+            sqlite_where=text("status IN ('pending', 'running')")
+        ),
+    )
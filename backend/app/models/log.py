@@ -1,16 +1,42 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Text, JSON
+from sqlalchemy import Column, String, Integer, ForeignKey, Text, JSON, DateTime, Index, PrimaryKeyConstraint, func, text
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
+from sqlalchemy.schema import CreateColumn
 
 from app.models.base import BaseModel
 
+# Действия, попадающие в ленту безопасности (GET /logs/security)
+SECURITY_ACTIONS = (
+    "LOGIN", "LOGOUT", "LOGIN_FAILED", "LOGIN_BLOCKED",
+    "TOKEN_CHECK", "SECURITY_EVENT", "ROLE_CHANGED",
+    "EMERGENCY_STATUS_CHANGE", "DEACTIVATE", "ACTIVATE"
+)
+
 
 class Log(BaseModel):
     """
     Модель логов действий пользователей
+
+    В PostgreSQL таблица партиционирована по месяцам на created_at
+    (см. миграцию a8d3e5f1b702 и app/services/log_partitions.py),
+    поэтому created_at входит в первичный ключ.
     """
     __tablename__ = "logs"
+    __table_args__ = (
+        Index("ix_logs_user_id_created_at", "user_id", text("created_at DESC")),
+        Index("ix_logs_action_created_at", "action", "created_at"),
+        Index("ix_logs_entity_type_entity_id_created_at", "entity_type", "entity_id", "created_at"),
+        Index(
+            "ix_logs_security_created_at", "created_at", "id",
+            postgresql_where=text("action IN ({})".format(", ".join(f"'{a}'" for a in SECURITY_ACTIONS)))
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), index=True)
     
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     action = Column(String(100), nullable=False)  # Тип действия (CREATE, UPDATE, DELETE)
     entity_type = Column(String(50), nullable=False)  # Тип сущности (passport, fine, user)
     entity_id = Column(Integer, nullable=True)  # ID сущности
@@ -18,4 +44,24 @@ class Log(BaseModel):
     ip_address = Column(String(45), nullable=True)  # IP адрес пользователя
     
     # Связи
-    user = relationship("User", back_populates="logs")
\ No newline at end of file
+    user = relationship("User", back_populates="logs")
+
+    # Для ORM запись однозначно определяется id
+    __mapper_args__ = {"primary_key": [id]}
+
+
+# SQLite (разработка, тесты) не умеет автоинкремент в составном первичном ключе:
+# там logs не партиционирована, и ключом остается только id (rowid)
+@compiles(CreateColumn, "sqlite")
+def _compile_sqlite_column(element, compiler, **kw):
+    column = element.element
+    if column.table is Log.__table__ and column.name == "id":
+        return "id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT"
+    return compiler.visit_create_column(element, **kw)
+
+
+@compiles(PrimaryKeyConstraint, "sqlite")
+def _compile_sqlite_primary_key(constraint, compiler, **kw):
+    if constraint.table is Log.__table__:
+        return None
+    return compiler.visit_primary_key_constraint(constraint, **kw)
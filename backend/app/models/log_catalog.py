@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, DateTime, UniqueConstraint, func
+
+from app.models.base import BaseModel
+
+
+class LogCatalog(BaseModel):
+    """
+    Справочник встречающихся в логах пар (действие, тип сущности)
+
+    Пополняется при записи лога новой пары, чтобы фильтры логов не сканировали всю таблицу logs.
+    Счетчиков нет: строка пишется один раз, и запись лога не блокируется на общей строке справочника.
+    """
+    __tablename__ = "log_catalog"
+    __table_args__ = (
+        UniqueConstraint("action", "entity_type", name="uq_log_catalog_action_entity_type"),
+    )
+
+    action = Column(String(100), nullable=False)  # Тип действия
+    entity_type = Column(String(50), nullable=False)  # Тип сущности
+    first_seen = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # Первая запись
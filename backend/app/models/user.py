@@ -40,6 +40,9 @@ class User(BaseModel):
     # Последняя проверка ролей
     last_role_check = Column(DateTime(timezone=True), nullable=True)
 
+    # Последнее обновление данных через POST /auth/refresh
+    last_refreshed_at = Column(DateTime(timezone=True), nullable=True)
+
     # OAuth данные
     discord_access_token = Column(String(512), nullable=True)
     discord_refresh_token = Column(String(512), nullable=True)
@@ -17,6 +17,7 @@ from app.schemas.payment import (
     SPWorldsPaymentResponse
 )
 from app.schemas.log import Log, LogCreate
+from app.schemas.job import Job, JobCreate
 
 __all__ = [
     "User",
@@ -41,5 +42,7 @@ __all__ = [
     "SPWorldsPaymentCreate",
     "SPWorldsPaymentResponse",
     "Log",
-    "LogCreate"
+    "LogCreate",
+    "Job",
+    "JobCreate"
 ]
\ No newline at end of file
@@ -0,0 +1,52 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any
+from datetime import datetime
+
+
+class JobBase(BaseModel):
+    """
+    Базовая схема фоновой задачи
+    """
+    job_type: str = Field(..., description="Тип задачи")
+    params: Optional[Dict[str, Any]] = Field(None, description="Параметры задачи")
+
+
+class JobCreate(JobBase):
+    """
+    Схема для постановки задачи в очередь
+    """
+    dedup_key: Optional[str] = Field(None, description="Ключ идемпотентности")
+    created_by_user_id: Optional[int] = Field(None, description="ID пользователя, поставившего задачу")
+
+
+class JobUpdate(BaseModel):
+    """
+    Схема для обновления задачи
+    """
+    status: Optional[str] = None
+    progress_current: Optional[int] = None
+    progress_total: Optional[int] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+class Job(JobBase):
+    """
+    Схема задачи для ответа
+    """
+    id: int
+    status: str
+    progress_current: int = 0
+    progress_total: Optional[int] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    worker_id: Optional[str] = None
+    created_by_user_id: Optional[int] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
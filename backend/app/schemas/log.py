@@ -34,6 +34,18 @@ class Log(LogBase):
         from_attributes = True
 
 
+class LogCatalogEntry(BaseModel):
+    """
+    Схема записи справочника действий в логах
+    """
+    action: str
+    entity_type: str
+    first_seen: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 class LogPagination(BaseModel):
     """
     Схема для пагинации логов
@@ -1,5 +1,19 @@
 from app.services.role_checker import role_checker_service
+from app.services.leader_election import leader_elector
+from app.services.job_worker import job_worker_service
+from app.services.token_refresher import token_refresh_service
+from app.services.log_partitions import log_partition_service
+from app.services.loop_monitor import loop_monitor_service
+from app.services.health import health_probe_service
+from app.services.sse_registry import sse_registry
 
 __all__ = [
-    "role_checker_service"
+    "role_checker_service",
+    "leader_elector",
+    "job_worker_service",
+    "token_refresh_service",
+    "log_partition_service",
+    "loop_monitor_service",
+    "health_probe_service",
+    "sse_registry"
 ]
\ No newline at end of file
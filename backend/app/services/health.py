@@ -0,0 +1,147 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import anyio.to_thread
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.logging_config import get_logger
+from app.clients.discord import discord_client
+from app.clients.spworlds import spworlds_client
+from app.clients.bt_api import bt_client
+from app.clients.resilience import upstream_status
+from app.services.leader_election import leader_elector
+
+logger = get_logger(__name__)
+
+# Без этих зависимостей воркер не может обслуживать запросы
+CRITICAL_DEPENDENCIES = ("database",)
+
+
+def _ping_database() -> bool:
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return True
+
+
+class HealthProbeService:
+    """
+    Фоновая проверка зависимостей для /readyz
+
+    Зависимости (БД, SP-Worlds, Discord, BT API) опрашиваются по расписанию,
+    эндпоинты здоровья только читают сохраненный результат — сами пробы
+    Docker/балансировщика не создают нагрузку на БД и внешние API.
+    Готовность определяется только критичными зависимостями: недоступность
+    внешних API отражается в отчете, но не выводит воркер из балансировки.
+    БД проверяет каждый воркер, внешние API — только воркер-лидер, чтобы фоновый
+    трафик к Discord, SP-Worlds и BT не рос с числом воркеров. Остальные воркеры
+    видят состояние внешних API по своим предохранителям (circuit_breakers).
+    """
+
+    def __init__(self):
+        self.is_running = False
+        self.started_at = time.monotonic()
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._probes: Dict[str, Callable[[], Awaitable[bool]]] = {
+            "database": lambda: anyio.to_thread.run_sync(_ping_database),
+            "spworlds": spworlds_client.ping,
+            "discord": discord_client.ping,
+            "bt_api": bt_client.ping,
+        }
+
+    async def start(self):
+        """
+        Запуск периодической проверки зависимостей
+        """
+        self.is_running = True
+        logger.info("health_prober_started")
+
+        while self.is_running:
+            await self.probe_all()
+            await asyncio.sleep(settings.HEALTH_PROBE_INTERVAL)
+
+    async def stop(self):
+        """
+        Остановка проверки
+        """
+        self.is_running = False
+        logger.info("health_prober_stopped")
+
+    async def probe_all(self) -> None:
+        """
+        Опросить зависимости параллельно (внешние API — только в воркере-лидере)
+        """
+        probe_upstreams = leader_elector.is_leader
+        if not probe_upstreams:
+            # Лидерство могло перейти к другому воркеру: старые результаты не показываем
+            for name in [name for name in self.results if name not in CRITICAL_DEPENDENCIES]:
+                del self.results[name]
+
+        await asyncio.gather(*(
+            self._probe(name, probe) for name, probe in self._probes.items()
+            if probe_upstreams or name in CRITICAL_DEPENDENCIES
+        ))
+
+    async def _probe(self, name: str, probe: Callable[[], Awaitable[bool]]) -> None:
+        started = time.perf_counter()
+        error: Optional[str] = None
+        try:
+            ok = bool(await asyncio.wait_for(probe(), timeout=settings.HEALTH_PROBE_TIMEOUT))
+        except asyncio.TimeoutError:
+            ok, error = False, "timeout"
+        except Exception as e:
+            ok, error = False, str(e)
+
+        self._record(name, ok, started, error)
+
+    def _record(self, name: str, ok: bool, started: float, error: Optional[str]) -> None:
+        previous = self.results.get(name)
+        if previous and previous["ok"] != ok:
+            logger.warning("dependency_state_changed", dependency=name, state="up" if ok else "down", error=error)
+
+        self.results[name] = {
+            "ok": ok,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+            "error": error
+        }
+
+    def probe_database_now(self) -> None:
+        """
+        Синхронная проверка БД, пока фоновая проверка еще не дала результата
+
+        Нужна для /health до первого цикла проверки (например, без lifespan в тестах).
+        """
+        if "database" in self.results:
+            return
+        started = time.perf_counter()
+        error: Optional[str] = None
+        try:
+            ok = _ping_database()
+        except Exception as e:
+            ok, error = False, str(e)
+        self._record("database", ok, started, error)
+
+    @property
+    def is_ready(self) -> bool:
+        return all(self.results.get(name, {}).get("ok") for name in CRITICAL_DEPENDENCIES)
+
+    def readiness(self) -> dict:
+        """
+        Последние результаты проверок без обращения к зависимостям
+        """
+        return {
+            "status": "ready" if self.is_ready else "not_ready",
+            "uptime_seconds": round(time.monotonic() - self.started_at),
+            "version": settings.VERSION,
+            "dependencies": self.results,
+            "upstreams_probed": leader_elector.is_leader,
+            "circuit_breakers": upstream_status()
+        }
+
+
+# Глобальный экземпляр проверки зависимостей
+health_probe_service = HealthProbeService()
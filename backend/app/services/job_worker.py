@@ -0,0 +1,194 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional, Any
+
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.core.config import settings
+from app.core.execution import run_db
+from app.core.logging_config import get_logger
+from app.crud.job import job_crud
+from app.crud.passport import passport_crud
+from app.models.job import Job
+from app.services.leader_election import leader_elector
+from app.services.role_checker import role_checker_service
+
+logger = get_logger(__name__)
+
+
+class JobCancelled(Exception):
+    """
+    Задача отменена пользователем
+    """
+
+
+class JobContext:
+    """
+    Контекст выполнения задачи: параметры, прогресс и проверка отмены
+
+    Сессия синхронная: обработчики обращаются к БД через run_db, по одному вызову за раз.
+    """
+
+    # Минимальный интервал между записями прогресса в БД (секунды)
+    PROGRESS_FLUSH_INTERVAL = 2.0
+
+    def __init__(self, db: Session, job: Job):
+        self.db = db
+        self.job = job
+        self.params: Dict[str, Any] = job.params or {}
+        self._last_flush = 0.0
+
+    async def report_progress(self, current: int, total: Optional[int] = None) -> None:
+        """
+        Сообщить о прогрессе; бросает JobCancelled, если запрошена отмена
+
+        Запись в БД (и heartbeat) выполняется не чаще PROGRESS_FLUSH_INTERVAL,
+        а также всегда на последнем шаге.
+        """
+        now = time.monotonic()
+        is_last = total is not None and current >= total
+        if not is_last and now - self._last_flush < self.PROGRESS_FLUSH_INTERVAL:
+            return
+
+        self._last_flush = now
+        if await run_db(job_crud.update_progress, self.db, job=self.job, current=current, total=total):
+            raise JobCancelled()
+
+
+JobHandler = Callable[[JobContext], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class JobWorkerService:
+    """
+    Воркер очереди задач в базе данных
+
+    Работает в каждом процессе: задачи захватываются через SELECT ... FOR UPDATE SKIP LOCKED,
+    поэтому одну задачу выполняет ровно один воркер.
+    """
+
+    def __init__(self):
+        self.is_running = False
+        self.worker_id = leader_elector.worker_id
+        self.current_job_id: Optional[int] = None
+        self.handlers: Dict[str, JobHandler] = {}
+
+    def register(self, job_type: str, handler: JobHandler) -> None:
+        """
+        Зарегистрировать обработчик для типа задачи
+        """
+        self.handlers[job_type] = handler
+
+    async def start(self):
+        """
+        Запуск цикла обработки очереди
+        """
+        self.is_running = True
+        logger.info("job_worker_started", worker_id=self.worker_id)
+
+        while self.is_running:
+            try:
+                await run_db(self._requeue_stale)
+                processed = await self.run_next()
+                if not processed:
+                    await asyncio.sleep(settings.JOB_WORKER_POLL_INTERVAL)
+            except Exception as e:
+                logger.error("job_worker_error", error=str(e))
+                await asyncio.sleep(settings.JOB_WORKER_POLL_INTERVAL)
+
+    async def stop(self):
+        """
+        Остановка воркера
+        """
+        self.is_running = False
+        logger.info("job_worker_stopped")
+
+    def _requeue_stale(self) -> None:
+        """
+        Возврат в очередь задач, брошенных упавшими воркерами
+        """
+        db = SessionLocal()
+        try:
+            count = job_crud.requeue_stale(db, stale_after_seconds=settings.JOB_STALE_TIMEOUT)
+            if count:
+                logger.warning("stale_jobs_requeued", count=count)
+        finally:
+            db.close()
+
+    async def run_next(self) -> bool:
+        """
+        Захватить и выполнить одну задачу
+
+        Returns:
+            True, если задача была обработана
+        """
+        db = SessionLocal()
+        try:
+            job = await run_db(job_crud.claim_next, db, worker_id=self.worker_id)
+            if not job:
+                return False
+
+            self.current_job_id = job.id
+            handler = self.handlers.get(job.job_type)
+            if not handler:
+                await run_db(job_crud.finish, db, job=job, status="failed", error=f"Unknown job type: {job.job_type}")
+                return True
+
+            logger.info("job_started", job_id=job.id, job_type=job.job_type)
+            context = JobContext(db, job)
+            try:
+                result = await handler(context)
+                await run_db(job_crud.finish, db, job=job, status="completed", result=result)
+                logger.info("job_completed", job_id=job.id)
+            except JobCancelled:
+                await run_db(job_crud.finish, db, job=job, status="cancelled")
+                logger.info("job_cancelled", job_id=job.id)
+            except Exception as e:
+                await run_db(db.rollback)
+                await run_db(job_crud.finish, db, job=job, status="failed", error=str(e))
+                logger.error("job_failed", job_id=job.id, error=str(e))
+            return True
+        finally:
+            self.current_job_id = None
+            db.close()
+
+
+async def run_mass_role_check(context: JobContext) -> Dict[str, Any]:
+    """
+    Массовая проверка ролей всех пользователей
+
+    Если идет периодический проход проверки ролей (в этом или другом воркере),
+    задача ждет его окончания, чтобы не проверять тех же пользователей дважды.
+    """
+    while True:
+        summary = await role_checker_service.run_exclusive_pass(
+            force=context.params.get("force", True),
+            progress_callback=context.report_progress
+        )
+        if summary is not None:
+            return summary
+        # Heartbeat на время ожидания (и проверка отмены)
+        await context.report_progress(0)
+        await asyncio.sleep(settings.LEADER_HEARTBEAT_INTERVAL)
+
+
+async def run_violations_recount(context: JobContext) -> Dict[str, Any]:
+    """
+    Пересчет количества нарушений во всех паспортах пачками
+    """
+    batch_size = context.params.get("batch_size", 500)
+    passport_ids = await run_db(passport_crud.get_all_ids, context.db)
+    total = len(passport_ids)
+
+    for start in range(0, total, batch_size):
+        batch = passport_ids[start:start + batch_size]
+        await run_db(passport_crud.recount_violations, context.db, passport_ids=batch)
+        await context.report_progress(start + len(batch), total)
+
+    return {"passports_recounted": total}
+
+
+# Глобальный экземпляр воркера
+job_worker_service = JobWorkerService()
+job_worker_service.register("mass_role_check", run_mass_role_check)
+job_worker_service.register("violations_recount", run_violations_recount)
@@ -0,0 +1,303 @@
+import asyncio
+import os
+import socket
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Ключ advisory lock для фоновых сервисов (должен быть < 2^31,
+# чтобы в pg_locks он целиком попадал в objid)
+BACKGROUND_SERVICES_LOCK_KEY = 726_001
+# Ключ advisory lock прохода проверки ролей (периодического и массовой задачи)
+ROLE_CHECK_PASS_LOCK_KEY = 726_002
+# Пространство ключей (classid) транзакционных локов обновления токена: ключ — (726, user_id)
+TOKEN_REFRESH_LOCK_NAMESPACE = 726
+
+
+def _is_postgres() -> bool:
+    return settings.DATABASE_URL.startswith("postgresql")
+
+
+class AdvisoryLock:
+    """
+    Межпроцессный лок на время операции (advisory lock PostgreSQL на отдельном соединении)
+
+    Соединение открывается только на время удержания лока. Без PostgreSQL воркер
+    один, и лок действует в пределах процесса.
+    """
+
+    def __init__(self, key: int):
+        self.key = key
+        self.is_held = False
+        self._engine: Optional[Engine] = None
+        self._connection: Optional[Connection] = None
+
+    def _get_engine(self) -> Engine:
+        if self._engine is None:
+            self._engine = create_engine(settings.DATABASE_URL, poolclass=NullPool)
+        return self._engine
+
+    def _try_acquire(self) -> bool:
+        connection = self._get_engine().connect()
+        try:
+            acquired = bool(connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"),
+                {"key": self.key}
+            ).scalar())
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if acquired:
+            self._connection = connection
+        else:
+            connection.close()
+        return acquired
+
+    def _release(self, connection: Connection) -> None:
+        try:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+            connection.commit()
+        finally:
+            connection.close()
+
+    async def try_acquire(self) -> bool:
+        """
+        Захватить лок без ожидания
+
+        Returns:
+            True, если лок захвачен этим вызовом
+        """
+        if self.is_held:
+            return False
+        # Занимаем до похода в базу, чтобы параллельная корутина процесса не прошла
+        self.is_held = True
+        if not _is_postgres():
+            return True
+        try:
+            acquired = await asyncio.to_thread(self._try_acquire)
+        except Exception:
+            self.is_held = False
+            raise
+        self.is_held = acquired
+        return acquired
+
+    async def release(self) -> None:
+        """
+        Освободить лок и закрыть его соединение
+        """
+        connection, self._connection = self._connection, None
+        self.is_held = False
+        if connection is not None:
+            await asyncio.to_thread(self._release, connection)
+
+
+class LeaderElector:
+    """
+    Выбор лидера среди воркеров через advisory lock PostgreSQL
+
+    Лок держится на отдельном соединении: пока соединение живо, лидер один.
+    Если воркер падает или соединение рвется, PostgreSQL сам снимает лок,
+    и следующий воркер забирает лидерство на ближайшем heartbeat.
+    Остальные воркеры открывают соединение только на время попытки захвата
+    и заодно запоминают, кто лидер, — статус читает это значение без запросов к БД.
+    """
+
+    def __init__(self, lock_key: int = BACKGROUND_SERVICES_LOCK_KEY):
+        self.lock_key = lock_key
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.is_running = False
+        self.is_leader = False
+        self.leader_since: Optional[datetime] = None
+        self.last_heartbeat: Optional[datetime] = None
+        self.leader_id: Optional[str] = None
+        self._engine: Optional[Engine] = None
+        self._connection: Optional[Connection] = None
+
+    @property
+    def is_postgres(self) -> bool:
+        return _is_postgres()
+
+    def _get_engine(self) -> Engine:
+        """
+        Отдельный движок без пула, чтобы не занимать соединение из основного пула
+        """
+        if self._engine is None:
+            self._engine = create_engine(settings.DATABASE_URL, poolclass=NullPool)
+        return self._engine
+
+    def _try_acquire(self) -> Tuple[bool, Optional[str]]:
+        """
+        Попытка захватить лок (синхронно, выполняется в потоке)
+
+        Returns:
+            (захвачен ли лок, идентификатор текущего лидера). Если лок не захвачен,
+            соединение закрывается до следующей попытки.
+        """
+        connection = self._get_engine().connect()
+        try:
+            # application_name позволяет другим воркерам узнать, кто лидер
+            connection.execute(
+                text("SELECT set_config('application_name', :name, false)"),
+                {"name": f"leader:{self.worker_id}"[:63]}
+            )
+            acquired = bool(connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"),
+                {"key": self.lock_key}
+            ).scalar())
+            leader_id = self.worker_id if acquired else self._resolve_leader(connection)
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+
+        if acquired:
+            self._connection = connection
+        else:
+            connection.close()
+        return acquired, leader_id
+
+    def _resolve_leader(self, connection: Connection) -> Optional[str]:
+        """
+        Идентификатор воркера, держащего лок (из pg_locks)
+        """
+        application_name = connection.execute(
+            text(
+                "SELECT a.application_name FROM pg_locks l "
+                "JOIN pg_stat_activity a ON a.pid = l.pid "
+                "WHERE l.locktype = 'advisory' AND l.classid = 0 "
+                "AND l.objid = :key AND l.granted LIMIT 1"
+            ),
+            {"key": self.lock_key}
+        ).scalar()
+        if application_name and application_name.startswith("leader:"):
+            return application_name[len("leader:"):]
+        return application_name
+
+    def _heartbeat(self) -> None:
+        """
+        Проверка, что соединение с локом живо (синхронно, выполняется в потоке)
+        """
+        self._connection.execute(text("SELECT 1"))
+        self._connection.commit()
+
+    def _release(self) -> None:
+        """
+        Освобождение лока и закрытие соединения
+        """
+        if self._connection is None:
+            return
+        try:
+            if self.is_leader:
+                self._connection.execute(
+                    text("SELECT pg_advisory_unlock(:key)"),
+                    {"key": self.lock_key}
+                )
+                self._connection.commit()
+        finally:
+            self._connection.close()
+            self._connection = None
+
+    def _drop_connection(self) -> None:
+        """
+        Сброс сломанного соединения без попытки разблокировки
+        """
+        if self._connection is not None:
+            try:
+                self._connection.invalidate()
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    async def tick(self) -> bool:
+        """
+        Один шаг выборов: heartbeat для лидера, попытка захвата для остальных
+
+        Returns:
+            Является ли текущий воркер лидером
+        """
+        if not settings.LEADER_ELECTION_ENABLED or not self.is_postgres:
+            # Без PostgreSQL (например, SQLite в разработке) воркер всегда один
+            if not self.is_leader:
+                self.is_leader = True
+                self.leader_since = datetime.now(timezone.utc)
+                self.leader_id = self.worker_id
+            self.last_heartbeat = datetime.now(timezone.utc)
+            return True
+
+        try:
+            if self.is_leader:
+                await asyncio.to_thread(self._heartbeat)
+            else:
+                acquired, self.leader_id = await asyncio.to_thread(self._try_acquire)
+                if acquired:
+                    self.is_leader = True
+                    self.leader_since = datetime.now(timezone.utc)
+                    logger.info("leader_acquired", worker_id=self.worker_id)
+            self.last_heartbeat = datetime.now(timezone.utc)
+        except Exception as e:
+            if self.is_leader:
+                logger.warning("leader_lost", worker_id=self.worker_id, error=str(e))
+            else:
+                logger.error("leader_election_error", worker_id=self.worker_id, error=str(e))
+            self.is_leader = False
+            self.leader_since = None
+            self.leader_id = None
+            self._drop_connection()
+
+        return self.is_leader
+
+    async def start(self):
+        """
+        Запуск цикла выборов
+        """
+        self.is_running = True
+        logger.info("leader_election_started", worker_id=self.worker_id)
+
+        while self.is_running:
+            await self.tick()
+            await asyncio.sleep(settings.LEADER_HEARTBEAT_INTERVAL)
+
+    async def stop(self):
+        """
+        Остановка выборов с освобождением лидерства
+        """
+        self.is_running = False
+        try:
+            await asyncio.to_thread(self._release)
+        except Exception as e:
+            logger.error("leader_release_failed", worker_id=self.worker_id, error=str(e))
+        self.is_leader = False
+        self.leader_since = None
+        self.leader_id = None
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+        logger.info("leader_election_stopped", worker_id=self.worker_id)
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Состояние выборов для эндпоинтов статуса
+        """
+        return {
+            "enabled": settings.LEADER_ELECTION_ENABLED and self.is_postgres,
+            "worker_id": self.worker_id,
+            "is_leader": self.is_leader,
+            "leader_id": self.leader_id,
+            "leader_since": self.leader_since.isoformat() if self.leader_since else None,
+            "last_heartbeat": self.last_heartbeat.isoformat() if self.last_heartbeat else None,
+            "heartbeat_interval_seconds": settings.LEADER_HEARTBEAT_INTERVAL
+        }
+
+
+# Глобальный экземпляр для фоновых сервисов
+leader_elector = LeaderElector()
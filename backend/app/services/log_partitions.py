@@ -0,0 +1,221 @@
+import asyncio
+import re
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Any
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal, engine
+from app.core.config import settings
+from app.core.execution import run_db
+from app.core.logging_config import get_logger
+from app.services.leader_election import leader_elector
+
+logger = get_logger(__name__)
+
+# Имя месячной партиции: logs_p2026_10
+PARTITION_NAME_RE = re.compile(r"^logs_p(\d{4})_(\d{2})$")
+
+
+def _add_months(value: date, months: int) -> date:
+    month_index = value.month - 1 + months
+    return date(value.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"logs_p{month.year:04d}_{month.month:02d}"
+
+
+class LogPartitionService:
+    """
+    Обслуживание партиций таблицы логов
+
+    Периодически (только в воркере-лидере) создает месячные партиции наперед и применяет
+    политику хранения: партиции старше LOG_RETENTION_MONTHS целиком отсоединяются
+    (archive) или удаляются (drop) — без построчного DELETE. Хранение выключено
+    по умолчанию (LOG_RETENTION_MONTHS=0) и включается оператором явно.
+
+    DDL берет эксклюзивные блокировки на logs, поэтому выполняется в пуле потоков,
+    а не в event loop.
+    """
+
+    def __init__(self):
+        self.is_running = False
+        self.last_run_at: Optional[datetime] = None
+        self.last_created: List[str] = []
+        self.last_retired: List[str] = []
+
+    @property
+    def is_supported(self) -> bool:
+        return engine.dialect.name == "postgresql"
+
+    async def start(self):
+        """
+        Запуск планировщика обслуживания партиций
+        """
+        self.is_running = True
+        logger.info("log_partitions_started")
+
+        while self.is_running:
+            if leader_elector.is_leader and self.is_supported:
+                try:
+                    await run_db(self.run_maintenance)
+                except Exception as e:
+                    logger.error("log_partitions_error", error=str(e))
+            await asyncio.sleep(settings.LOG_MAINTENANCE_INTERVAL)
+
+    async def stop(self):
+        """
+        Остановка планировщика
+        """
+        self.is_running = False
+        logger.info("log_partitions_stopped")
+
+    def run_maintenance(self) -> Dict[str, List[str]]:
+        """
+        Создать недостающие партиции и применить политику хранения
+        """
+        db = SessionLocal()
+        try:
+            if not self._is_partitioned(db):
+                return {"created": [], "retired": []}
+
+            created = self.ensure_partitions(db, months_ahead=settings.LOG_PARTITIONS_AHEAD)
+            retired = self.apply_retention(db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self.last_run_at = datetime.now(timezone.utc)
+        self.last_created = created
+        self.last_retired = retired
+        if created or retired:
+            logger.info("log_partitions_updated", created=created, retired=retired)
+
+        return {"created": created, "retired": retired}
+
+    def ensure_partitions(self, db: Session, months_ahead: int) -> List[str]:
+        """
+        Создать партиции на текущий месяц и months_ahead месяцев вперед
+        """
+        existing = set(self._get_partition_names(db))
+        today = datetime.now(timezone.utc).date()
+        current_month = date(today.year, today.month, 1)
+
+        created = []
+        for offset in range(months_ahead + 1):
+            month = _add_months(current_month, offset)
+            name = partition_name(month)
+            if name in existing:
+                continue
+            try:
+                # Ошибка одного месяца не должна ломать обслуживание остальных
+                with db.begin_nested():
+                    self._create_partition(db, name, month, has_default="logs_default" in existing)
+            except Exception as e:
+                logger.error("log_partition_create_failed", partition=name, error=str(e))
+                continue
+            created.append(name)
+
+        if "logs_default" not in existing:
+            db.execute(text("CREATE TABLE IF NOT EXISTS logs_default PARTITION OF logs DEFAULT"))
+
+        return created
+
+    @staticmethod
+    def _create_partition(db: Session, name: str, month: date, has_default: bool) -> None:
+        """
+        Создать партицию месяца
+
+        PostgreSQL не дает создать партицию, если в logs_default уже есть строки из ее
+        диапазона (например, записанные, пока партиции не было). Тогда logs_default
+        отсоединяется, строки переносятся в новую партицию и default подключается обратно.
+        """
+        bounds = {"start": month, "end": _add_months(month, 1)}
+        range_sql = f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+
+        in_default = has_default and db.execute(text(
+            "SELECT 1 FROM logs_default WHERE created_at >= :start AND created_at < :end LIMIT 1"
+        ), bounds).scalar()
+        if not in_default:
+            db.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF logs {range_sql}"))
+            return
+
+        db.execute(text("ALTER TABLE logs DETACH PARTITION logs_default"))
+        db.execute(text(f"CREATE TABLE {name} PARTITION OF logs {range_sql}"))
+        moved = db.execute(text(
+            f"WITH moved AS ("
+            f"  DELETE FROM logs_default WHERE created_at >= :start AND created_at < :end RETURNING *"
+            f") INSERT INTO {name} SELECT * FROM moved"
+        ), bounds).rowcount
+        db.execute(text("ALTER TABLE logs ATTACH PARTITION logs_default DEFAULT"))
+        logger.info("log_default_rows_moved", partition=name, rows=moved)
+
+    def apply_retention(self, db: Session) -> List[str]:
+        """
+        Отсоединить или удалить партиции, целиком вышедшие за окно хранения
+        """
+        if settings.LOG_RETENTION_MONTHS <= 0:
+            return []
+
+        today = datetime.now(timezone.utc).date()
+        cutoff = _add_months(date(today.year, today.month, 1), -settings.LOG_RETENTION_MONTHS)
+
+        retired = []
+        for name in self._get_partition_names(db):
+            match = PARTITION_NAME_RE.match(name)
+            if not match:
+                continue
+            month = date(int(match.group(1)), int(match.group(2)), 1)
+            # Партиция покрывает [month, month + 1) — удаляем, только если она целиком старше cutoff
+            if _add_months(month, 1) > cutoff:
+                continue
+
+            if settings.LOG_RETENTION_MODE == "drop":
+                db.execute(text(f"DROP TABLE {name}"))
+            else:
+                db.execute(text(f"ALTER TABLE logs DETACH PARTITION {name}"))
+                db.execute(text(f"ALTER TABLE {name} RENAME TO logs_archive_{name[len('logs_'):]}"))
+            retired.append(name)
+
+        return retired
+
+    @staticmethod
+    def _is_partitioned(db: Session) -> bool:
+        return bool(db.execute(text(
+            "SELECT 1 FROM pg_class WHERE relname = 'logs' AND relkind = 'p'"
+        )).scalar())
+
+    @staticmethod
+    def _get_partition_names(db: Session) -> List[str]:
+        rows = db.execute(text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = 'logs'
+            ORDER BY child.relname
+        """)).scalars().all()
+        return list(rows)
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Состояние обслуживания партиций для эндпоинтов статуса
+        """
+        return {
+            "running": self.is_running,
+            "supported": self.is_supported,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_created": self.last_created,
+            "last_retired": self.last_retired,
+            "retention_months": settings.LOG_RETENTION_MONTHS,
+            "retention_mode": settings.LOG_RETENTION_MODE
+        }
+
+
+# Глобальный экземпляр сервиса
+log_partition_service = LogPartitionService()
@@ -0,0 +1,143 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, List, Optional
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Сколько кадров стека сохранять для зависания
+STACK_DEPTH = 20
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class LoopMonitorService:
+    """
+    Мониторинг задержки event loop
+
+    Корутина-сэмплер засыпает на LOOP_MONITOR_INTERVAL и измеряет, насколько позже
+    она проснулась — это задержка (lag) loop. Сторожевой поток следит за отметкой
+    последнего пробуждения: если loop не отвечает дольше LOOP_SLOW_CALLBACK_MS,
+    снимается стек потока loop, чтобы было видно, какой код его блокирует.
+    Работает в каждом воркере.
+    """
+
+    def __init__(self):
+        self.is_running = False
+        self.max_lag = 0.0
+        self.stalls_total = 0
+        self._samples: Deque[float] = deque(maxlen=settings.LOOP_MONITOR_SAMPLES)
+        self._stalls: Deque[dict] = deque(maxlen=20)
+        self._last_tick = time.monotonic()
+        self._reported_tick: Optional[float] = None
+        self._loop_thread_id: Optional[int] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._watchdog_stop = threading.Event()
+
+    @property
+    def threshold(self) -> float:
+        return settings.LOOP_SLOW_CALLBACK_MS / 1000
+
+    async def start(self):
+        """
+        Запуск сэмплера задержки и сторожевого потока
+        """
+        loop = asyncio.get_running_loop()
+        interval = settings.LOOP_MONITOR_INTERVAL
+
+        if settings.LOOP_MONITOR_ASYNCIO_DEBUG:
+            # Встроенная проверка asyncio: предупреждения о колбэках дольше порога (дорого для продакшена)
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.threshold
+
+        self.is_running = True
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._watchdog_stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info("loop_monitor_started", interval_seconds=interval, threshold_ms=settings.LOOP_SLOW_CALLBACK_MS)
+
+        while self.is_running:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - expected)
+            self._samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            self._last_tick = time.monotonic()
+
+    async def stop(self):
+        """
+        Остановка мониторинга
+        """
+        self.is_running = False
+        self._watchdog_stop.set()
+        if self._watchdog:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+        logger.info("loop_monitor_stopped")
+
+    def _watch(self):
+        """
+        Сторожевой поток: снимает стек loop, если тот завис дольше порога
+        """
+        interval = settings.LOOP_MONITOR_INTERVAL
+        while not self._watchdog_stop.wait(min(interval, self.threshold) / 2):
+            last_tick = self._last_tick
+            stalled_for = time.monotonic() - last_tick - interval
+            if stalled_for < self.threshold or self._reported_tick == last_tick:
+                continue
+
+            # О каждом зависании сообщаем один раз
+            self._reported_tick = last_tick
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)[-STACK_DEPTH:]) if frame else ""
+            self.stalls_total += 1
+            self._stalls.append({
+                "detected_at": datetime.now(timezone.utc).isoformat(),
+                "stalled_ms": round(stalled_for * 1000, 1),
+                "stack": stack
+            })
+            logger.warning("event_loop_blocked", stalled_ms=round(stalled_for * 1000), stack=stack)
+
+    def percentiles(self) -> dict:
+        """
+        Перцентили задержки loop по последним сэмплам (мс)
+        """
+        values = sorted(self._samples)
+        return {
+            "p50_ms": round(_percentile(values, 0.50) * 1000, 2),
+            "p90_ms": round(_percentile(values, 0.90) * 1000, 2),
+            "p99_ms": round(_percentile(values, 0.99) * 1000, 2),
+            "max_ms": round(self.max_lag * 1000, 2),
+            "samples": len(values)
+        }
+
+    def status(self) -> dict:
+        """
+        Текущее состояние мониторинга для админского статуса
+        """
+        return {
+            "is_running": self.is_running,
+            "interval": settings.LOOP_MONITOR_INTERVAL,
+            "threshold_ms": settings.LOOP_SLOW_CALLBACK_MS,
+            "lag": self.percentiles(),
+            "stalls_total": self.stalls_total,
+            "recent_stalls": list(self._stalls)[-5:]
+        }
+
+
+# Глобальный экземпляр мониторинга event loop
+loop_monitor_service = LoopMonitorService()
@@ -1,20 +1,23 @@
 import asyncio
-import logging
+import time
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Awaitable
 from sqlalchemy.orm import Session
 
 from app.core.database import SessionLocal
 from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.core.metrics import ROLE_CHECK_PASS_DURATION, ROLE_CHECK_USERS
 from app.crud.user import user_crud
 from app.models.user import User
 from app.clients.discord import discord_client
 from app.clients.spworlds import spworlds_client
 from app.utils.logger import ActionLogger
+from app.services.leader_election import AdvisoryLock, ROLE_CHECK_PASS_LOCK_KEY, leader_elector
+from app.services.token_refresher import token_refresh_service
 
 # Настройка логирования
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 
 class RoleCheckerService:
@@ -29,20 +32,28 @@ class RoleCheckerService:
         # Кеш для пользовательских ролей (кеш на 2 минуты)
         self.user_roles_cache: Dict[int, Dict[str, Any]] = {}
         self.user_cache_expiry: Dict[int, datetime] = {}
+        # Периодический проход и массовая проверка не должны идти одновременно
+        self.pass_lock = AdvisoryLock(ROLE_CHECK_PASS_LOCK_KEY)
 
     async def start(self):
         """
         Запуск сервиса проверки ролей
         """
         self.is_running = True
-        logger.info("Role checker service started")
+        logger.info("role_checker_started")
 
         while self.is_running:
+            # Периодическую проверку выполняет только воркер-лидер
+            if not leader_elector.is_leader:
+                await asyncio.sleep(settings.LEADER_HEARTBEAT_INTERVAL)
+                continue
+
             try:
-                await self.check_all_users_roles()
+                if await self.run_exclusive_pass() is None:
+                    logger.info("role_check_pass_skipped", reason="pass_already_running")
                 await asyncio.sleep(settings.ROLE_CHECK_INTERVAL * 60)  # Конвертируем минуты в секунды
             except Exception as e:
-                logger.error(f"Error in role checker service: {e}")
+                logger.error("role_checker_error", error=str(e))
                 await asyncio.sleep(60)  # Ждем минуту перед повторной попыткой
 
     async def stop(self):
@@ -50,28 +61,57 @@ class RoleCheckerService:
         Остановка сервиса
         """
         self.is_running = False
-        logger.info("Role checker service stopped")
+        logger.info("role_checker_stopped")
+
+    async def run_exclusive_pass(
+            self,
+            force: bool = False,
+            progress_callback: Optional[Callable[[int, int], Awaitable[None]]] = None
+    ) -> Optional[Dict[str, int]]:
+        """
+        Проверка ролей всех пользователей под межпроцессным локом прохода
+
+        Returns:
+            Сводка по проверке или None, если другой проход уже выполняется
+        """
+        if not await self.pass_lock.try_acquire():
+            return None
+        try:
+            return await self.check_all_users_roles(force=force, progress_callback=progress_callback)
+        finally:
+            await self.pass_lock.release()
 
-    async def check_all_users_roles(self, force: bool = False):
+    async def check_all_users_roles(
+            self,
+            force: bool = False,
+            progress_callback: Optional[Callable[[int, int], Awaitable[None]]] = None
+    ) -> Dict[str, int]:
         """
         Проверка ролей всех пользователей
-        
+
         Args:
             force: Принудительная проверка всех пользователей, игнорируя кеш
+            progress_callback: Вызывается после каждого пользователя с (проверено, всего);
+                может бросить исключение, чтобы прервать проверку (отмена задачи)
+
+        Returns:
+            Сводка по проверке
         """
-        logger.info(f"Starting role check for all users (force={force})")
+        summary = {"total": 0, "checked": 0, "changed": 0, "lost_access": 0, "errors": 0}
+        logger.info("role_check_pass_started", force=force)
         
         # Если принудительная проверка, очищаем весь кеш
         if force:
-            logger.info("Forcing role check for all users, clearing entire cache")
+            logger.info("role_check_cache_cleared", scope="all")
             self.user_roles_cache.clear()
             self.user_cache_expiry.clear()
 
+        started = time.monotonic()
         db = SessionLocal()
         try:
             if force:
-                # При принудительной проверке берем всех активных пользователей
-                users = user_crud.get_active_users(db)
+                # При принудительной проверке берем всех активных пользователей (без лимита страницы)
+                users = user_crud.get_active_users(db, limit=None)
             else:
                 # Получаем пользователей, которым нужно проверить роли
                 users = user_crud.get_users_for_role_check(
@@ -79,29 +119,44 @@ class RoleCheckerService:
                     minutes_ago=settings.ROLE_CHECK_INTERVAL
                 )
 
-            logger.info(f"Found {len(users)} users to check")
+            logger.info("role_check_pass_users", count=len(users))
+            summary["total"] = len(users)
 
             # Проверяем каждого пользователя
-            for user in users:
+            for index, user in enumerate(users, start=1):
                 try:
                     result = await self.check_user_roles(db, user, force)
+                    summary["checked"] += 1
                     if result:
                         if result.get("changed"):
+                            summary["changed"] += 1
                             logger.info(
-                                f"User {user.discord_username} role changed from {result['old_role']} to {result['new_role']}")
+                                "user_role_changed", user=user.discord_username,
+                                old_role=result["old_role"], new_role=result["new_role"]
+                            )
 
                         if not result.get("has_access"):
-                            logger.warning(f"User {user.discord_username} lost access to the server")
+                            summary["lost_access"] += 1
+                            logger.warning("user_lost_access", user=user.discord_username)
                             # Деактивируем пользователя
                             user_crud.deactivate_user(db, user=user)
 
                 except Exception as e:
-                    logger.error(f"Error checking roles for user {user.discord_username}: {e}")
+                    summary["errors"] += 1
+                    logger.error("role_check_failed", user=user.discord_username, error=str(e))
+
+                if progress_callback:
+                    await progress_callback(index, len(users))
 
                 # Небольшая задержка между проверками
                 await asyncio.sleep(0.5)
         finally:
             db.close()
+            ROLE_CHECK_PASS_DURATION.observe(time.monotonic() - started)
+            for result in ("checked", "changed", "lost_access", "errors"):
+                ROLE_CHECK_USERS.labels(result).inc(summary[result])
+
+        return summary
 
     async def check_user_roles(self, db: Session, user: User, force: bool = False) -> Optional[Dict[str, Any]]:
         """
@@ -117,33 +172,22 @@ class RoleCheckerService:
         """
         try:
             # Проверяем, не истек ли Discord токен
-            if user.discord_expires_at and user.discord_expires_at < datetime.now(timezone.utc):
+            # (обычно токены заранее обновляет token_refresh_service, здесь — запасной путь)
+            if token_refresh_service.needs_refresh(user.discord_expires_at):
                 if user.discord_refresh_token:
-                    # Пытаемся обновить токен
-                    token_data = await discord_client.refresh_token(user.discord_refresh_token)
-                    if token_data:
-                        access_token = token_data["access_token"]
-                        refresh_token = token_data["refresh_token"]
-                        expires_in = token_data["expires_in"]
-                        expires_at = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
-
-                        user_crud.update_discord_data(
-                            db,
-                            user=user,
-                            discord_access_token=access_token,
-                            discord_refresh_token=refresh_token,
-                            discord_expires_at=expires_at
-                        )
-                        user.discord_access_token = access_token
+                    # Обновляем токен; параллельные обновления для пользователя объединяются
+                    access_token = await token_refresh_service.refresh_user_token(user.id)
+                    if access_token:
+                        db.refresh(user)
                     else:
-                        logger.warning(f"Failed to refresh token for user {user.discord_username}")
+                        logger.warning("discord_token_refresh_failed", user=user.discord_username)
                         # Если пользователь администратор, не блокируем его даже при проблемах с токеном
                         if user.role == "admin":
-                            logger.info(f"Preserving admin access for user {user.discord_username} despite token issues")
+                            logger.info("admin_access_preserved", user=user.discord_username, reason="token_refresh_failed")
                             
                             # Если администратор был заблокирован, активируем его обратно
                             if not user.is_active:
-                                logger.info(f"Reactivating admin user {user.discord_username}")
+                                logger.info("user_reactivated", user=user.discord_username, reason="admin")
                                 user_crud.activate_user(db, user=user)
                             
                             return {
@@ -156,14 +200,14 @@ class RoleCheckerService:
                             }
                         return {"has_access": False, "changed": False}
                 else:
-                    logger.warning(f"No refresh token for user {user.discord_username}")
+                    logger.warning("discord_refresh_token_missing", user=user.discord_username)
                     # Если пользователь администратор, не блокируем его даже без refresh токена
                     if user.role == "admin":
-                        logger.info(f"Preserving admin access for user {user.discord_username} despite missing refresh token")
+                        logger.info("admin_access_preserved", user=user.discord_username, reason="refresh_token_missing")
                         
                         # Если администратор был заблокирован, активируем его обратно
                         if not user.is_active:
-                            logger.info(f"Reactivating admin user {user.discord_username}")
+                            logger.info("user_reactivated", user=user.discord_username, reason="admin")
                             user_crud.activate_user(db, user=user)
                         
                         return {
@@ -183,12 +227,12 @@ class RoleCheckerService:
             )
 
             if not member_info:
-                logger.info(f"User {user.discord_username} is not in the guild")
+                logger.info("user_not_in_guild", user=user.discord_username)
                 
                 # Проверяем кеш пользователя - если данные свежие и не принудительная проверка, не меняем роль
                 if not force and self._is_user_cache_valid(user.id):
                     cached_data = self.user_roles_cache[user.id]
-                    logger.info(f"Using cached role data for user {user.discord_username}")
+                    logger.info("role_cache_used", user=user.discord_username)
                     return {
                         "user_id": user.id,
                         "old_role": user.role,
@@ -200,11 +244,11 @@ class RoleCheckerService:
                 
                 # Если пользователь администратор, сохраняем его роль даже если он не в гильдии
                 if user.role == "admin":
-                    logger.info(f"Preserving admin role for user {user.discord_username} even though not in guild")
+                    logger.info("admin_access_preserved", user=user.discord_username, reason="not_in_guild")
                     
                     # Если администратор был заблокирован, активируем его обратно
                     if not user.is_active:
-                        logger.info(f"Reactivating admin user {user.discord_username}")
+                        logger.info("user_reactivated", user=user.discord_username, reason="admin")
                         user_crud.activate_user(db, user=user)
                     
                     # Обновляем кеш
@@ -236,7 +280,7 @@ class RoleCheckerService:
                 
                 # Если пользователь был деактивирован, но теперь получил роль citizen, активируем его
                 if not user.is_active and new_role == "citizen":
-                    logger.info(f"Reactivating user {user.discord_username} due to citizen role assignment")
+                    logger.info("user_reactivated", user=user.discord_username, reason="citizen_role")
                     user_crud.activate_user(db, user=user)
 
                 # Логируем изменения
@@ -272,12 +316,13 @@ class RoleCheckerService:
             old_role = user.role
 
             # Получаем обновленные данные из SP-Worlds
-            print(f"DEBUG ROLE_CHECKER: Fetching SP-Worlds data for Discord ID: {user.discord_id}")
             spworlds_data = await spworlds_client.find_user(str(user.discord_id))
-            print(f"DEBUG ROLE_CHECKER: SP-Worlds response: {spworlds_data}")
             minecraft_username = spworlds_data.get("username") if spworlds_data else None
             minecraft_uuid = spworlds_data.get("uuid") if spworlds_data else None
-            print(f"DEBUG ROLE_CHECKER: Extracted minecraft_username: {minecraft_username}, minecraft_uuid: {minecraft_uuid}")
+            logger.debug(
+                "spworlds_user_resolved", discord_id=user.discord_id,
+                minecraft_username=minecraft_username, minecraft_uuid=minecraft_uuid
+            )
 
             minecraft_data_updated = (
                     user.minecraft_username != minecraft_username or
@@ -304,7 +349,7 @@ class RoleCheckerService:
             
             # Если пользователь был деактивирован, но теперь у него есть роль, активируем его
             if not user.is_active and new_role and new_role != "none":
-                logger.info(f"Reactivating user {user.discord_username} due to role restoration")
+                logger.info("user_reactivated", user=user.discord_username, reason="role_restored")
                 user_crud.activate_user(db, user=user)
 
             # Логируем изменения
@@ -336,7 +381,7 @@ class RoleCheckerService:
                         }
                     )
                 except Exception as e:
-                    logger.error(f"Failed to send role change notification: {e}")
+                    logger.error("role_change_notification_failed", user_id=user.id, error=str(e))
 
             if minecraft_data_updated:
                 ActionLogger.log_action(
@@ -362,7 +407,7 @@ class RoleCheckerService:
             }
 
         except Exception as e:
-            logger.error(f"Error checking roles for user {user.discord_username}: {e}")
+            logger.error("role_check_failed", user=user.discord_username, error=str(e))
             return None
     
     def _is_user_cache_valid(self, user_id: int) -> bool:
@@ -383,6 +428,12 @@ class RoleCheckerService:
         # Кеш действует 2 минуты
         self.user_cache_expiry[user_id] = datetime.now(timezone.utc) + timedelta(minutes=2)
     
+    def remember_user_roles(self, user_id: int, data: Dict[str, Any]):
+        """
+        Сохранить результат проверки, выполненной вне сервиса (например, /auth/refresh)
+        """
+        self._update_user_cache(user_id, data)
+
     def _clear_expired_cache(self):
         """
         Очищает устаревшие записи из кеша
@@ -461,7 +512,7 @@ class RoleCheckerService:
                 return "police"
 
         # Если нет admin/police ролей, назначаем роль citizen
-        logger.info(f"User has no admin/police roles, assigning citizen role. User roles: {user_role_ids}")
+        logger.info("citizen_role_assigned", discord_roles=user_role_ids)
         return "citizen"
 
     async def check_user_by_id(self, user_id: int, force: bool = False) -> Optional[Dict[str, Any]]:
@@ -481,7 +532,7 @@ class RoleCheckerService:
         # Проверяем кеш только если не принудительная проверка
         if not force and self._is_user_cache_valid(user_id):
             cached_data = self.user_roles_cache[user_id]
-            logger.info(f"Using cached role data for user ID {user_id}")
+            logger.info("role_cache_used", user_id=user_id)
             return {
                 "user_id": user_id,
                 "old_role": cached_data.get("role"),
@@ -493,7 +544,7 @@ class RoleCheckerService:
         
         # Если принудительная проверка, сбрасываем кеш для этого пользователя
         if force and user_id in self.user_roles_cache:
-            logger.info(f"Forcing role check for user ID {user_id}, clearing cache")
+            logger.info("role_check_cache_cleared", user_id=user_id)
             del self.user_roles_cache[user_id]
             if user_id in self.user_cache_expiry:
                 del self.user_cache_expiry[user_id]
@@ -0,0 +1,197 @@
+import asyncio
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set
+
+from app.core.config import settings
+from app.core.metrics import SSE_EVENTS
+
+ROLE_UPDATE_EVENT = "role_update"
+
+_QUEUED = SSE_EVENTS.labels(outcome="queued")
+_COALESCED = SSE_EVENTS.labels(outcome="coalesced")
+_DROPPED = SSE_EVENTS.labels(outcome="dropped")
+
+
+def _supersedes(queued: dict, event: dict) -> bool:
+    """
+    Новое событие заменяет ожидающее: обновления роли одного и того же пользователя
+    """
+    return (
+        queued["event"] == ROLE_UPDATE_EVENT
+        and event["event"] == ROLE_UPDATE_EVENT
+        and queued["data"].get("user_id") == event["data"].get("user_id")
+    )
+
+
+class SSEConnection:
+    """
+    SSE поток одного клиента
+
+    Очередь — кольцевой буфер на SSE_QUEUE_SIZE событий: у зависшего клиента
+    отбрасываются самые старые, а ожидающее обновление роли пользователя заменяется
+    новым. Буфер и future ожидания создаются только на время, когда они нужны,
+    поэтому простаивающее соединение занимает несколько десятков байт.
+    """
+
+    __slots__ = ("user_id", "role", "connected", "_buffer", "_waiter")
+
+    def __init__(self, user_id: int, role: str):
+        self.user_id = user_id
+        self.role = role
+        self.connected = True
+        self._buffer: Optional[Deque[dict]] = None
+        self._waiter: Optional[asyncio.Future] = None
+
+    def push(self, event: dict) -> None:
+        """
+        Поставить событие в очередь (не блокирует)
+        """
+        if not self.connected:
+            return
+
+        buffer = self._buffer
+        if buffer is None:
+            buffer = self._buffer = deque(maxlen=settings.SSE_QUEUE_SIZE)
+
+        for index, queued in enumerate(buffer):
+            if _supersedes(queued, event):
+                # Клиент еще не видел прежнюю роль: сохраняем ее как исходную
+                del buffer[index]
+                event = {**event, "data": {**event["data"], "old_role": queued["data"].get("old_role")}}
+                _COALESCED.inc()
+                break
+        else:
+            if len(buffer) == buffer.maxlen:
+                _DROPPED.inc()
+            _QUEUED.inc()
+
+        buffer.append(event)
+        self._wake()
+
+    async def next_event(self, timeout: float) -> Optional[dict]:
+        """
+        Следующее событие; None, если соединение закрыто.
+        Через timeout секунд без событий поднимает asyncio.TimeoutError (для heartbeat).
+        """
+        if not self._buffer and self.connected:
+            waiter = self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.wait_for(waiter, timeout)
+            finally:
+                self._waiter = None
+
+        if not self.connected:
+            return None
+
+        event = self._buffer.popleft()
+        if not self._buffer:
+            # Пустой буфер не держим: простаивающие соединения не тратят на него память
+            self._buffer = None
+        return event
+
+    def disconnect(self) -> None:
+        """
+        Закрыть соединение: генератор потока завершится
+        """
+        self.connected = False
+        self._buffer = None
+        self._wake()
+
+    def _wake(self) -> None:
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+
+class SSERegistry:
+    """
+    Реестр SSE соединений с индексами по пользователю и по роли
+
+    Регистрация, удаление и смена роли — O(1); рассылка по роли обходит только
+    соединения этой роли. У пользователя может быть несколько соединений (вкладок).
+    """
+
+    def __init__(self):
+        self._by_user: Dict[int, Set[SSEConnection]] = {}
+        self._by_role: Dict[str, Set[SSEConnection]] = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def register(self, user_id: int, role: str) -> SSEConnection:
+        """
+        Зарегистрировать новое соединение пользователя
+        """
+        connection = SSEConnection(user_id, role)
+        self._by_user.setdefault(user_id, set()).add(connection)
+        self._by_role.setdefault(role, set()).add(connection)
+        self._count += 1
+        return connection
+
+    def unregister(self, connection: SSEConnection) -> None:
+        """
+        Удалить соединение (повторный вызов ничего не делает)
+        """
+        connections = self._by_user.get(connection.user_id)
+        if connections is None or connection not in connections:
+            return
+        self._discard(self._by_user, connection.user_id, connection)
+        self._discard(self._by_role, connection.role, connection)
+        self._count -= 1
+        connection.disconnect()
+
+    def update_role(self, user_id: int, role: str) -> None:
+        """
+        Перенести соединения пользователя в индекс новой роли
+        """
+        for connection in self._by_user.get(user_id, ()):
+            if connection.role != role:
+                self._discard(self._by_role, connection.role, connection)
+                self._by_role.setdefault(role, set()).add(connection)
+                connection.role = role
+
+    def send_to_user(self, user_id: int, event: dict) -> int:
+        """
+        Отправить событие всем соединениям пользователя; возвращает число соединений
+        """
+        return self._send(self._by_user.get(user_id, ()), event)
+
+    def send_to_role(self, role: str, event: dict, exclude_user_id: Optional[int] = None) -> int:
+        """
+        Отправить событие всем соединениям с ролью role; возвращает число соединений
+        """
+        connections = self._by_role.get(role, ())
+        if exclude_user_id is not None:
+            connections = [connection for connection in connections if connection.user_id != exclude_user_id]
+        return self._send(connections, event)
+
+    def user_ids(self) -> List[int]:
+        return list(self._by_user)
+
+    def status(self) -> dict:
+        return {
+            "connections": self._count,
+            "users": len(self._by_user),
+            "by_role": {role: len(connections) for role, connections in self._by_role.items()}
+        }
+
+    @staticmethod
+    def _send(connections: Iterable[SSEConnection], event: dict) -> int:
+        sent = 0
+        for connection in connections:
+            connection.push(event)
+            sent += 1
+        return sent
+
+    @staticmethod
+    def _discard(index: Dict, key, connection: SSEConnection) -> None:
+        connections = index.get(key)
+        if connections is not None:
+            connections.discard(connection)
+            if not connections:
+                del index[key]
+
+
+# Глобальный экземпляр реестра
+sse_registry = SSERegistry()
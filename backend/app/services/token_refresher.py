@@ -0,0 +1,225 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Any, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.core.config import settings
+from app.core.execution import run_db
+from app.core.logging_config import get_logger
+from app.crud.user import user_crud
+from app.clients.discord import discord_client
+from app.services.leader_election import TOKEN_REFRESH_LOCK_NAMESPACE, leader_elector
+
+logger = get_logger(__name__)
+
+# Сколько ждать обновления токена тем же пользователем в другом воркере
+TOKEN_REFRESH_LOCK_TIMEOUT_MS = 30_000
+
+
+class TokenRefreshService:
+    """
+    Сервис упреждающего обновления Discord OAuth токенов
+
+    Периодически (только в воркере-лидере) обновляет токены, срок действия которых
+    истекает в ближайшее окно TOKEN_REFRESH_AHEAD, небольшими пачками.
+    Обновление для одного пользователя выполняется в единственном экземпляре:
+    параллельные вызовы (проверка ролей, /auth/refresh) ждут уже запущенное обновление.
+    Между воркерами обновление сериализует транзакционный advisory lock по user_id:
+    Discord выдает refresh token однократно, и второй обмен того же токена завершится ошибкой.
+    После неудачного обновления пользователь пропускается с экспоненциальной паузой,
+    чтобы отозванные токены не вытесняли из прохода те, что действительно скоро истекут.
+    """
+
+    def __init__(self):
+        self.is_running = False
+        self.last_run_at: Optional[datetime] = None
+        self.last_run_refreshed = 0
+        self.last_run_failed = 0
+        # Обновления, выполняющиеся прямо сейчас (user_id -> задача)
+        self._inflight: Dict[int, asyncio.Task] = {}
+        # Неудачные обновления: user_id -> (число неудач подряд, время следующей попытки)
+        self._failures: Dict[int, Tuple[int, datetime]] = {}
+
+    @staticmethod
+    def needs_refresh(expires_at: Optional[datetime], ahead_seconds: int = 0) -> bool:
+        """
+        Истекает ли токен в ближайшие ahead_seconds секунд
+        """
+        if not expires_at:
+            return False
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return expires_at < datetime.now(timezone.utc) + timedelta(seconds=ahead_seconds)
+
+    async def start(self):
+        """
+        Запуск планировщика обновления токенов
+        """
+        self.is_running = True
+        logger.info("token_refresh_started")
+
+        while self.is_running:
+            if leader_elector.is_leader:
+                try:
+                    await self.refresh_expiring_tokens()
+                except Exception as e:
+                    logger.error("token_refresh_error", error=str(e))
+            await asyncio.sleep(settings.TOKEN_REFRESH_INTERVAL)
+
+    async def stop(self):
+        """
+        Остановка планировщика
+        """
+        self.is_running = False
+        logger.info("token_refresh_stopped")
+
+    async def refresh_expiring_tokens(self) -> Dict[str, int]:
+        """
+        Обновить все токены, истекающие в окне TOKEN_REFRESH_AHEAD, пачками с паузой
+        """
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            user_ids = await run_db(
+                user_crud.get_user_ids_with_expiring_tokens,
+                db,
+                expiring_before=now + timedelta(seconds=settings.TOKEN_REFRESH_AHEAD),
+                expired_after=now - timedelta(days=settings.TOKEN_REFRESH_MAX_EXPIRED_DAYS)
+            )
+        finally:
+            db.close()
+        user_ids = self._due(user_ids, now)
+
+        refreshed = failed = 0
+        batch_size = max(settings.TOKEN_REFRESH_BATCH_SIZE, 1)
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            results = await asyncio.gather(
+                *(self.refresh_user_token(user_id) for user_id in batch),
+                return_exceptions=True
+            )
+            for user_id, result in zip(batch, results):
+                if isinstance(result, str):
+                    self._failures.pop(user_id, None)
+                    refreshed += 1
+                else:
+                    self._record_failure(user_id)
+                    failed += 1
+
+            # Пауза между пачками, чтобы не упираться в rate limit Discord
+            if start + batch_size < len(user_ids):
+                await asyncio.sleep(settings.TOKEN_REFRESH_BATCH_DELAY)
+
+        self.last_run_at = datetime.now(timezone.utc)
+        self.last_run_refreshed = refreshed
+        self.last_run_failed = failed
+        if user_ids:
+            logger.info("token_refresh_pass", refreshed=refreshed, failed=failed)
+
+        return {"total": len(user_ids), "refreshed": refreshed, "failed": failed}
+
+    def _due(self, user_ids: List[int], now: datetime) -> List[int]:
+        """
+        Пользователи, для которых истекла пауза после неудачного обновления
+        """
+        # Записи о пользователях, выпавших из выборки, больше не нужны
+        selected = set(user_ids)
+        for user_id in [user_id for user_id in self._failures if user_id not in selected]:
+            del self._failures[user_id]
+        return [
+            user_id for user_id in user_ids
+            if user_id not in self._failures or self._failures[user_id][1] <= now
+        ]
+
+    def _record_failure(self, user_id: int) -> None:
+        failures = self._failures.get(user_id, (0, None))[0] + 1
+        delay = min(settings.TOKEN_REFRESH_INTERVAL * 2 ** (failures - 1), settings.TOKEN_REFRESH_MAX_BACKOFF)
+        self._failures[user_id] = (failures, datetime.now(timezone.utc) + timedelta(seconds=delay))
+
+    async def refresh_user_token(self, user_id: int) -> Optional[str]:
+        """
+        Обновить токен пользователя (single-flight)
+
+        Если обновление для пользователя уже выполняется, вызов дожидается его результата.
+
+        Returns:
+            Актуальный access token или None, если обновить не удалось
+        """
+        task = self._inflight.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self._refresh(user_id))
+            self._inflight[user_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(user_id, None))
+
+        # shield: отмена одного ожидающего не отменяет обновление для остальных
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _lock_user(db: Session, user_id: int) -> None:
+        """
+        Дождаться транзакционного advisory lock пользователя (снимается при commit/rollback)
+        """
+        db.execute(text(f"SET LOCAL lock_timeout = '{TOKEN_REFRESH_LOCK_TIMEOUT_MS}ms'"))
+        db.execute(
+            text("SELECT pg_advisory_xact_lock(:namespace, :user_id)"),
+            {"namespace": TOKEN_REFRESH_LOCK_NAMESPACE, "user_id": user_id}
+        )
+
+    async def _refresh(self, user_id: int) -> Optional[str]:
+        """
+        Фактическое обновление токена в собственной сессии
+        """
+        db = SessionLocal()
+        try:
+            # Лок берется до чтения пользователя: после ожидания видны токены,
+            # сохраненные воркером, который обновлял их первым
+            if db.get_bind().dialect.name == "postgresql":
+                await run_db(self._lock_user, db, user_id)
+
+            user = await run_db(user_crud.get, db, id=user_id)
+            if not user or not user.discord_refresh_token:
+                return None
+
+            # Токен мог уже обновить другой воркер — используем свежий refresh token из БД
+            if not self.needs_refresh(user.discord_expires_at, settings.TOKEN_REFRESH_AHEAD):
+                return user.discord_access_token
+
+            token_data = await discord_client.refresh_token(user.discord_refresh_token)
+            if not token_data:
+                logger.warning("discord_token_refresh_failed", user=user.discord_username)
+                return None
+
+            expires_at = datetime.now(timezone.utc) + timedelta(seconds=token_data["expires_in"])
+            # commit сохраняет новые токены и снимает лок
+            await run_db(
+                user_crud.update_discord_tokens,
+                db,
+                user=user,
+                discord_access_token=token_data["access_token"],
+                discord_refresh_token=token_data["refresh_token"],
+                discord_expires_at=expires_at
+            )
+            return token_data["access_token"]
+        finally:
+            db.close()
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Состояние планировщика для эндпоинтов статуса
+        """
+        return {
+            "running": self.is_running,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_run_refreshed": self.last_run_refreshed,
+            "last_run_failed": self.last_run_failed,
+            "refreshes_in_flight": len(self._inflight),
+            "users_backing_off": len(self._failures),
+            "refresh_ahead_seconds": settings.TOKEN_REFRESH_AHEAD
+        }
+
+
+# Глобальный экземпляр сервиса
+token_refresh_service = TokenRefreshService()
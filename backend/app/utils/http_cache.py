@@ -0,0 +1,63 @@
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+# Политики Cache-Control для ответов с ETag
+# private: ответ зависит от пользователя; no-cache: браузер обязан ревалидировать через If-None-Match
+CACHE_PRIVATE_REVALIDATE = "private, no-cache"
+CACHE_PRIVATE_SHORT = "private, max-age=60"
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Слабый ETag из версии ресурса (id, updated_at, ...)
+    """
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Совпадает ли ETag с заголовком If-None-Match (слабое сравнение)
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque_tag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque_tag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified_response(etag: str, cache_control: str) -> Response:
+    """
+    Ответ 304 Not Modified без тела
+    """
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def conditional_response(
+        request: Request,
+        response: Response,
+        *etag_parts: Any,
+        cache_control: str = CACHE_PRIVATE_REVALIDATE
+) -> Optional[Response]:
+    """
+    Проверить условный GET и проставить заголовки кеширования
+
+    Returns:
+        Ответ 304, если версия у клиента актуальна (эндпоинт должен сразу вернуть его),
+        иначе None — заголовки ETag и Cache-Control уже установлены на response
+    """
+    etag = make_etag(*etag_parts)
+    if etag_matches(request, etag):
+        return not_modified_response(etag, cache_control)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    return None
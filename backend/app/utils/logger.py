@@ -2,9 +2,12 @@ from typing import Optional, Any, Dict
 from sqlalchemy.orm import Session
 from fastapi import Request
 
+from app.core.logging_config import get_logger
 from app.crud.log import log_crud
 from app.models.user import User
 
+logger = get_logger(__name__)
+
 
 class ActionLogger:
     """
@@ -441,8 +444,8 @@ class ActionLogger:
         # Создаем лог без пользователя - для анонимных событий
         # Используем user_id = None для анонимных событий
         try:
-            from app.models.log import Log
-            log_entry = Log(
+            log_crud.create_log(
+                db=db,
                 user_id=None,  # NULL для анонимных событий
                 action="SECURITY_EVENT",
                 entity_type="security",
@@ -453,9 +456,7 @@ class ActionLogger:
                 },
                 ip_address=ip_address
             )
-            db.add(log_entry)
-            db.commit()
         except Exception as e:
             # В случае ошибки логирования, не падаем
-            print(f"Ошибка при логировании анонимного события: {e}")
+            logger.error("anonymous_event_log_failed", event_type=event_type, error=str(e))
             db.rollback()
\ No newline at end of file
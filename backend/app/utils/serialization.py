@@ -0,0 +1,58 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# Опции совпадают с выводом response_model (pydantic): int-ключи словарей допускаются,
+# datetime/date/UUID/Enum сериализуются orjson нативно в тот же ISO формат, UTC — с суффиксом "Z"
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def _default(obj: Any) -> Any:
+    """
+    Типы, которые orjson не сериализует сам
+    """
+    if isinstance(obj, Decimal):
+        # Как decimal_encoder в FastAPI: целые остаются int, дробные - float
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Сериализация в JSON (bytes) через orjson
+    """
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class AppJSONResponse(JSONResponse):
+    """
+    JSON ответ по умолчанию для всего приложения (orjson вместо stdlib json)
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_json_response(content: Any, status_code: int = 200) -> AppJSONResponse:
+    """
+    Готовый JSON ответ через orjson для списочных эндпоинтов
+
+    Обходит повторную валидацию через response_model и jsonable_encoder;
+    response_model эндпоинта при этом остается для документации,
+    поэтому содержимое должно уже соответствовать схеме ответа.
+    """
+    return AppJSONResponse(content=content, status_code=status_code)
+
+
+def sse_frame(payload: Any) -> bytes:
+    """
+    Кадр Server-Sent Events с JSON данными
+    """
+    return b"data: " + dumps(payload) + b"\n\n"
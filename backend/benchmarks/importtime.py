@@ -0,0 +1,106 @@
+"""
+Профиль времени импорта приложения
+
+Запускает `python -X importtime -c "import app.main"` в новом интерпретаторе
+и сводит вывод в таблицу самых дорогих модулей (по собственному и
+накопленному времени). Помогает найти тяжелые зависимости, которые стоит
+загружать лениво.
+
+Запуск из каталога backend:
+    python -m benchmarks.importtime --top 25
+    python -m benchmarks.importtime --module app.api.v1 --json
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# import time:       self [us] |  cumulative | imported package
+LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def collect(module: str = "app.main") -> List[Dict[str, object]]:
+    """
+    Строки -X importtime для импорта модуля в новом интерпретаторе
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=os.environ.copy(), capture_output=True, text=True
+    ).stderr
+
+    entries = []
+    for line in stderr.splitlines():
+        match = LINE_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        entries.append({
+            "module": name,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            # Отступ в выводе importtime — уровень вложенности (по 2 пробела)
+            "depth": (len(indent) - 1) // 2,
+        })
+
+    if not entries:
+        raise RuntimeError(f"import {module} failed:\n{stderr}")
+    return entries
+
+
+def top_level_packages(entries: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    """
+    Собственное время, сгруппированное по пакету верхнего уровня
+    """
+    totals: Dict[str, float] = {}
+    for entry in entries:
+        package = str(entry["module"]).split(".")[0]
+        totals[package] = totals.get(package, 0.0) + float(entry["self_ms"])
+    return [
+        {"package": package, "self_ms": round(total, 1)}
+        for package, total in sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    ]
+
+
+def build_report(entries: List[Dict[str, object]], top: int) -> Dict[str, object]:
+    root = max(entries, key=lambda entry: entry["cumulative_ms"])
+    return {
+        "module": root["module"],
+        "total_ms": round(float(root["cumulative_ms"]), 1),
+        "modules_imported": len(entries),
+        "by_cumulative": sorted(entries, key=lambda entry: entry["cumulative_ms"], reverse=True)[:top],
+        "by_self": sorted(entries, key=lambda entry: entry["self_ms"], reverse=True)[:top],
+        "by_package": top_level_packages(entries)[:top],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Профиль времени импорта приложения")
+    parser.add_argument("--module", default="app.main", help="Импортируемый модуль")
+    parser.add_argument("--top", type=int, default=20, help="Количество строк в каждой таблице")
+    parser.add_argument("--json", action="store_true", help="Вывести результат в JSON")
+    args = parser.parse_args()
+
+    report = build_report(collect(args.module), args.top)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"import {report['module']}: {report['total_ms']:.1f}ms, {report['modules_imported']} modules")
+    for title, key in (("cumulative", "by_cumulative"), ("self", "by_self")):
+        print(f"\nTop by {title} time:")
+        for entry in report[key]:
+            print(f"  {entry['cumulative_ms']:>9.1f}ms {entry['self_ms']:>8.1f}ms  {entry['module']}")
+    print("\nTop packages by self time:")
+    for entry in report["by_package"]:
+        print(f"  {entry['self_ms']:>9.1f}ms  {entry['package']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,482 @@
+"""
+Нагрузочный бенчмарк горячих путей API
+
+Сценарии:
+  * passports, fines, fines_overview, logs — списки с фильтрами (HTTP);
+  * payments_webhook — подписанные вебхуки SP-Worlds по неоплаченным платежам;
+  * login — Discord OAuth callback (обмен кода и запросы к Discord/SP-Worlds идут в заглушки);
+  * sse — одновременные подключения к /events/role-updates, время до первого кадра;
+  * role_check — проверка ролей пользователей (в процессе, внешние API — заглушки
+    из benchmarks.stubs; без паузы между пользователями, которую делает фоновый проход).
+
+Для каждого сценария выводятся p50/p95/p99, пропускная способность и доля ошибок.
+Результаты можно сохранить как baseline (benchmarks/baselines/<name>.json) и
+сравнивать с ним следующие прогоны: при ухудшении p95 или пропускной способности
+сверх --tolerance процесс завершается с кодом 1.
+
+Внешние API (Discord, SP-Worlds, BT, Mojang) по умолчанию заменяются заглушками
+benchmarks.stubs: запускаются отдельным процессом, а приложение получает их адреса
+через DISCORD_API_URL/SPWORLDS_API_URL/BT_API_URL/MOJANG_API_URL. Задержки, доля
+ошибок и 429 заглушек задаются опциями --stub-*.
+
+Перед запуском база наполняется: python -m benchmarks.seed --reset
+
+Запуск из каталога backend:
+    python -m benchmarks.load --duration 30 --save-baseline main
+    python -m benchmarks.load --compare main
+    python -m benchmarks.load --only role_check --stub-latency lognormal:80:0.6 --stub-rate-limit discord=50/1
+    python -m benchmarks.load --only logs fines --base-url http://127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.security import create_access_token
+from app.models.payment import Payment
+from app.models.user import User
+from app.services.role_checker import role_checker_service
+from benchmarks.seed import ADMIN_DISCORD_ID, ARTICLES, CITIES, LOG_ACTIONS
+from benchmarks.startup import BACKEND_DIR, free_port
+from benchmarks.stubs import build_stack, install_stub_clients, stub_environment
+
+BASELINES_DIR = Path(__file__).resolve().parent / "baselines"
+
+HTTP_SCENARIOS = ("passports", "fines", "fines_overview", "logs", "payments_webhook", "login")
+ALL_SCENARIOS = HTTP_SCENARIOS + ("sse", "role_check")
+
+# Запрос сценария: (метод, путь, дополнительные аргументы httpx)
+RequestSpec = Tuple[str, str, dict]
+
+
+def percentile(samples: List[float], quantile: float) -> float:
+    """
+    Перцентиль по отсортированной выборке (nearest-rank)
+    """
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, max(0, int(round(quantile * len(samples))) - 1))
+    return samples[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    samples = sorted(latencies)
+    total = len(samples) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 2),
+        "max_ms": round(samples[-1] * 1000, 2) if samples else 0.0,
+    }
+
+
+def _token(discord_id: int) -> str:
+    return create_access_token({"sub": str(discord_id)}, expires_delta=timedelta(hours=6))
+
+
+def _date(days_ago: int) -> str:
+    return (datetime.now(timezone.utc) - timedelta(days=days_ago)).strftime("%Y-%m-%d")
+
+
+def passports_requests(rng: random.Random) -> Iterator[RequestSpec]:
+    while True:
+        params = {"skip": rng.randint(0, 2000), "limit": 50}
+        variant = rng.random()
+        if variant < 0.3:
+            params["search"] = rng.choice(["player_1", "Иван", "Петров", "player_42"])
+        elif variant < 0.6:
+            params["city"] = rng.choice(CITIES)
+        elif variant < 0.7:
+            params["emergency_only"] = True
+        yield "GET", "/api/v1/passports/", {"params": params}
+
+
+def fines_requests(rng: random.Random) -> Iterator[RequestSpec]:
+    while True:
+        params = {"skip": rng.randint(0, 2000), "limit": 50}
+        variant = rng.random()
+        if variant < 0.3:
+            params["article"] = rng.choice(ARTICLES)
+        elif variant < 0.5:
+            params["is_paid"] = rng.random() < 0.5
+        elif variant < 0.7:
+            params["date_from"] = _date(rng.randint(7, 60))
+        yield "GET", "/api/v1/fines/", {"params": params}
+
+
+def fines_overview_requests(rng: random.Random) -> Iterator[RequestSpec]:
+    while True:
+        params = {}
+        if rng.random() < 0.5:
+            params = {"date_from": _date(rng.randint(30, 120)), "date_to": _date(0)}
+        yield "GET", "/api/v1/fines/statistics/overview", {"params": params}
+
+
+def logs_requests(rng: random.Random) -> Iterator[RequestSpec]:
+    while True:
+        params = {"page": rng.randint(0, 50), "page_size": 50, "days": rng.choice([7, 30, 90])}
+        variant = rng.random()
+        if variant < 0.3:
+            params["action"], params["entity_type"] = rng.choice(LOG_ACTIONS)
+        elif variant < 0.5:
+            params["user_id"] = rng.randint(1, 200)
+        elif variant < 0.6:
+            params["search"] = rng.choice(["bench_police_1", "10.0.1.", "passport"])
+        yield "GET", "/api/v1/logs/", {"params": params}
+
+
+def payments_webhook_requests(payment_ids: List[int]) -> Iterator[RequestSpec]:
+    """
+    Подписанные вебхуки: каждый закрывает свой неоплаченный платеж
+    """
+    for payment_id in payment_ids:
+        body = json.dumps({"payer": "bench_payer", "amount": 10, "data": str(payment_id)}).encode()
+        signature = base64.b64encode(
+            hmac.new(settings.SPWORLDS_MAP_TOKEN.encode(), body, hashlib.sha256).digest()
+        ).decode()
+        yield "POST", "/api/v1/payments/webhook", {
+            "content": body,
+            "headers": {"X-Body-Hash": signature, "Content-Type": "application/json"},
+        }
+
+
+def login_requests() -> Iterator[RequestSpec]:
+    while True:
+        yield "GET", "/api/v1/auth/discord/callback", {"params": {"code": "bench"}}
+
+
+async def run_http(
+        client: httpx.AsyncClient,
+        requests: Iterator[RequestSpec],
+        concurrency: int,
+        duration: float
+) -> Dict[str, float]:
+    """
+    Гонять запросы сценария в concurrency потоков в течение duration секунд
+    """
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            try:
+                method, path, kwargs = next(requests)
+            except StopIteration:
+                return
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_sse(base_url: str, tokens: List[str], hold: float) -> Dict[str, float]:
+    """
+    Открыть по одному SSE потоку на пользователя и замерить время до кадра connected
+    """
+    latencies: List[float] = []
+    errors = 0
+    all_connected = asyncio.Event()
+    pending = len(tokens)
+
+    def arrived():
+        nonlocal pending
+        pending -= 1
+        if pending == 0:
+            all_connected.set()
+
+    async def stream(client: httpx.AsyncClient, token: str):
+        nonlocal errors
+        started = time.perf_counter()
+        counted = False
+        try:
+            async with client.stream("GET", "/api/v1/events/role-updates", params={"token": token}) as response:
+                if response.status_code != 200:
+                    raise httpx.HTTPStatusError("bad status", request=response.request, response=response)
+                async for line in response.aiter_lines():
+                    if line.startswith("data:"):
+                        latencies.append(time.perf_counter() - started)
+                        break
+                arrived()
+                counted = True
+                # Держим соединения открытыми одновременно
+                await all_connected.wait()
+                await asyncio.sleep(hold)
+        except httpx.HTTPError:
+            if not counted:
+                arrived()
+            errors += 1
+
+    limits = httpx.Limits(max_connections=len(tokens) + 10)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(stream(client, token) for token in tokens))
+        elapsed = time.perf_counter() - started - hold
+    return summarize(latencies, errors, max(elapsed, 1e-9))
+
+
+async def run_role_check(args) -> Dict[str, float]:
+    """
+    Проверка ролей пользователей в процессе бенчмарка с заглушками внешних API
+    """
+    install_stub_clients(build_stack(args.stub_latency, args.stub_error_rate, args.stub_rate_limit, seed=args.seed))
+    latencies: List[float] = []
+    errors = 0
+
+    db = SessionLocal()
+    try:
+        users = db.execute(
+            select(User).where(User.is_active == True).order_by(User.id).limit(args.role_check_users)
+        ).scalars().all()
+        started = time.perf_counter()
+        for user in users:
+            user_started = time.perf_counter()
+            result = await role_checker_service.check_user_roles(db, user, force=True)
+            if result is None:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - user_started)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+
+    return summarize(latencies, errors, elapsed)
+
+
+def _load_ids() -> Tuple[List[int], List[int]]:
+    db = SessionLocal()
+    try:
+        payment_ids = list(db.execute(
+            select(Payment.id).where(Payment.status == "pending").order_by(Payment.id)
+        ).scalars())
+        police_discord_ids = list(db.execute(
+            select(User.discord_id).where(User.role == "police", User.is_active == True).order_by(User.id)
+        ).scalars())
+    finally:
+        db.close()
+    return payment_ids, police_discord_ids
+
+
+@contextmanager
+def _spawn(command: List[str], env: Dict[str, str], ready_url: str, ready_status: Optional[int] = 200) -> Iterator[None]:
+    """
+    Запустить процесс и дождаться ответа на ready_url (любого, если ready_status=None)
+    """
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+    try:
+        deadline = time.perf_counter() + 60
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{' '.join(command)} exited during startup")
+            try:
+                status_code = httpx.get(ready_url, timeout=1).status_code
+                if ready_status is None or status_code == ready_status:
+                    break
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+        else:
+            raise TimeoutError(f"{ready_url} did not become ready within 60s")
+        yield
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+@contextmanager
+def server(args) -> Iterator[str]:
+    """
+    Запустить заглушки внешних API и uvicorn с приложением, направленным в них
+    (или использовать уже запущенный сервер по --base-url)
+    """
+    if args.base_url:
+        yield args.base_url
+        return
+
+    env = os.environ.copy()
+    # Фоновая проверка ролей не должна конкурировать с нагрузкой
+    env.setdefault("ROLE_CHECK_INTERVAL", "0")
+
+    with ExitStack() as stack:
+        if not args.real_upstreams:
+            stub_port = free_port()
+            env.update(stub_environment("127.0.0.1", stub_port))
+            stack.enter_context(_spawn(
+                [sys.executable, "-m", "benchmarks.stubs", "--port", str(stub_port), "--seed", str(args.seed)]
+                + stub_options(args),
+                env, f"{env['DISCORD_API_URL']}/gateway", ready_status=None
+            ))
+
+        port = free_port()
+        stack.enter_context(_spawn(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--log-level", "warning"],
+            env, f"http://127.0.0.1:{port}/readyz"
+        ))
+        yield f"http://127.0.0.1:{port}"
+
+
+def stub_options(args) -> List[str]:
+    options = []
+    for flag, values in (
+            ("--latency", args.stub_latency),
+            ("--error-rate", args.stub_error_rate),
+            ("--rate-limit", args.stub_rate_limit)
+    ):
+        for value in values:
+            options += [flag, value]
+    return options
+
+
+async def run_suite(args, base_url: str) -> Dict[str, Dict[str, float]]:
+    rng = random.Random(args.seed)
+    payment_ids, police_discord_ids = _load_ids()
+    admin_headers = {"Authorization": f"Bearer {_token(ADMIN_DISCORD_ID)}"}
+
+    factories: Dict[str, Callable[[], Iterator[RequestSpec]]] = {
+        "passports": lambda: passports_requests(rng),
+        "fines": lambda: fines_requests(rng),
+        "fines_overview": lambda: fines_overview_requests(rng),
+        "logs": lambda: logs_requests(rng),
+        "payments_webhook": lambda: payments_webhook_requests(payment_ids),
+        "login": login_requests,
+    }
+
+    report = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=admin_headers, limits=limits, timeout=60.0) as client:
+        for name in args.only:
+            if name not in factories:
+                continue
+            if name == "payments_webhook" and not settings.SPWORLDS_MAP_TOKEN:
+                print("payments_webhook skipped: SPWORLDS_MAP_TOKEN is not set")
+                continue
+            if name == "login" and args.real_upstreams:
+                print("login skipped: needs the Discord stub")
+                continue
+            print(f"Running {name}...")
+            report[name] = await run_http(client, factories[name](), args.concurrency, args.duration)
+
+    if "sse" in args.only:
+        print("Running sse...")
+        tokens = [_token(discord_id) for discord_id in police_discord_ids[:args.sse_streams]]
+        report["sse"] = await run_sse(base_url, tokens, hold=args.sse_hold)
+
+    if "role_check" in args.only:
+        print("Running role_check...")
+        report["role_check"] = await run_role_check(args)
+
+    return report
+
+
+def compare(report: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """
+    Регрессии относительно baseline: рост p95 или падение пропускной способности сверх tolerance
+    """
+    regressions = []
+    for name, current in report.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if previous["throughput_rps"] and current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} rps"
+            )
+        if current["error_rate"] > previous["error_rate"] + 0.01:
+            regressions.append(f"{name}: error rate {previous['error_rate']} -> {current['error_rate']}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочный бенчмарк горячих путей API")
+    parser.add_argument("--only", nargs="+", choices=ALL_SCENARIOS, default=list(ALL_SCENARIOS),
+                        help="Выполнить только указанные сценарии")
+    parser.add_argument("--base-url", help="Адрес уже запущенного сервера (иначе запускается uvicorn)")
+    parser.add_argument("--duration", type=float, default=20.0, help="Длительность HTTP сценария (секунды)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Одновременных запросов в HTTP сценарии")
+    parser.add_argument("--sse-streams", type=int, default=100, help="Одновременных SSE подключений")
+    parser.add_argument("--sse-hold", type=float, default=5.0, help="Сколько держать SSE подключения (секунды)")
+    parser.add_argument("--role-check-users", type=int, default=100, help="Пользователей в проверке ролей")
+    parser.add_argument("--real-upstreams", action="store_true",
+                        help="Не запускать заглушки: сервер ходит во внешние API из настроек")
+    parser.add_argument("--stub-latency", action="append", default=[],
+                        help="Задержка заглушек: [service=]spec (см. benchmarks.stubs)")
+    parser.add_argument("--stub-error-rate", action="append", default=[],
+                        help="Доля ответов 503 заглушек: [service=]rate")
+    parser.add_argument("--stub-rate-limit", action="append", default=[],
+                        help="Лимит частоты заглушек (429): [service=]REQUESTS/SECONDS")
+    parser.add_argument("--seed", type=int, default=42, help="Seed генератора запросов")
+    parser.add_argument("--save-baseline", metavar="NAME", help="Сохранить результат как baseline")
+    parser.add_argument("--compare", metavar="NAME", help="Сравнить результат с сохраненным baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Допустимое ухудшение (доля)")
+    parser.add_argument("--json", action="store_true", help="Вывести результат в JSON")
+    args = parser.parse_args()
+
+    with server(args) as base_url:
+        report = asyncio.run(run_suite(args, base_url))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for name, stats in report.items():
+            print(
+                f"{name:<17} n={stats['requests']:<7} err={stats['error_rate']:<6} "
+                f"rps={stats['throughput_rps']:>8.1f} p50={stats['p50_ms']:>8.2f}ms "
+                f"p95={stats['p95_ms']:>8.2f}ms p99={stats['p99_ms']:>8.2f}ms"
+            )
+
+    if args.save_baseline:
+        BASELINES_DIR.mkdir(exist_ok=True)
+        path = BASELINES_DIR / f"{args.save_baseline}.json"
+        path.write_text(json.dumps(report, indent=2, sort_keys=True))
+        print(f"Baseline saved to {path}")
+
+    if args.compare:
+        baseline = json.loads((BASELINES_DIR / f"{args.compare}.json").read_text())
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("Regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions against baseline {args.compare} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
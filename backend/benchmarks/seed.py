@@ -0,0 +1,255 @@
+"""
+Наполнение базы данными для нагрузочных тестов
+
+Объемы по умолчанию (--scale 1.0): 50k паспортов, 500k штрафов, 5M логов.
+Пишет пакетами через SQLAlchemy Core в базу из DATABASE_URL (PostgreSQL или SQLite).
+
+Запуск из каталога backend:
+    python -m benchmarks.seed --reset
+    python -m benchmarks.seed --reset --scale 0.1
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterator, List
+
+from sqlalchemy import delete, func, insert, select, text
+
+from app.core.database import engine
+from app.core.schema import create_schema
+from app.models.fine import Fine
+from app.models.job import Job
+from app.models.log import Log
+from app.models.log_catalog import LogCatalog
+from app.models.passport import Passport
+from app.models.payment import Payment
+from app.models.user import User
+from app.services.log_partitions import partition_name
+
+BASE_VOLUMES = {
+    "passports": 50_000,
+    "fines": 500_000,
+    "logs": 5_000_000,
+    "payments": 20_000,
+    "police": 200,
+}
+
+# Discord ID первого администратора; токен для нагрузки выписывается на него
+ADMIN_DISCORD_ID = 100_000_000_000_000_000
+POLICE_DISCORD_ID_START = ADMIN_DISCORD_ID + 1
+CITIZEN_DISCORD_ID_START = 200_000_000_000_000_000
+
+CITIES = ["Спавн", "Северный", "Южный", "Портовый", "Лесной", "Горный", "Речной", "Пустынный"]
+FIRST_NAMES = ["Иван", "Петр", "Анна", "Мария", "Алексей", "Ольга", "Дмитрий", "Елена", "Сергей", "Юлия"]
+LAST_NAMES = ["Иванов", "Петров", "Смирнов", "Кузнецов", "Попов", "Соколов", "Лебедев", "Новиков"]
+ARTICLES = [f"Статья {number}.{part}" for number in range(1, 21) for part in range(1, 4)]
+LOG_ACTIONS = [
+    ("CREATE", "passport"), ("UPDATE", "passport"), ("CREATE", "fine"), ("UPDATE", "fine"),
+    ("DELETE", "fine"), ("VIEW", "passport"), ("LOGIN", "user"), ("LOGOUT", "user"),
+    ("TOKEN_CHECK", "user"), ("ROLE_CHANGED", "user"), ("PAYMENT", "payment"),
+]
+
+BATCH_SIZE = 10_000
+
+
+def _batches(rows: Iterator[dict], size: int = BATCH_SIZE) -> Iterator[List[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(connection, model, rows: Iterator[dict], total: int) -> None:
+    started = time.perf_counter()
+    done = 0
+    for batch in _batches(rows):
+        connection.execute(insert(model), batch)
+        done += len(batch)
+        if done % (BATCH_SIZE * 10) == 0 or done == total:
+            print(f"  {model.__tablename__}: {done}/{total} ({time.perf_counter() - started:.1f}s)")
+
+
+def _ids(connection, model) -> List[int]:
+    return list(connection.execute(select(model.id).order_by(model.id)).scalars())
+
+
+def reset(connection) -> None:
+    """
+    Очистить таблицы с данными (пользователи, паспорта, штрафы, платежи, логи,
+    справочник действий и очередь задач)
+    """
+    if engine.dialect.name == "postgresql":
+        connection.execute(text(
+            "TRUNCATE jobs, log_catalog, logs, payments, fines, passports, users RESTART IDENTITY CASCADE"
+        ))
+        return
+    for model in (Job, LogCatalog, Log, Payment, Fine, Passport, User):
+        connection.execute(delete(model))
+
+
+def backfill_log_catalog(connection) -> None:
+    """
+    Справочник действий по вставленным логам (тот же запрос, что в миграции c2d8a4e6f013)
+
+    Логи пишутся пакетами в обход log_crud.create_log, поэтому справочник сам не пополняется.
+    """
+    connection.execute(text("""
+        INSERT INTO log_catalog (action, entity_type, first_seen)
+        SELECT action, entity_type, min(created_at)
+        FROM logs
+        GROUP BY action, entity_type
+        ON CONFLICT (action, entity_type) DO NOTHING
+    """))
+
+
+def ensure_log_partitions(connection, months: int) -> None:
+    """
+    Месячные партиции логов за прошедший период (сервис партиций создает только будущие)
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    today = datetime.now(timezone.utc).date()
+    for offset in range(months + 1):
+        month_index = today.year * 12 + today.month - 1 - offset
+        month = date(month_index // 12, month_index % 12 + 1, 1)
+        next_index = month_index + 1
+        next_month = date(next_index // 12, next_index % 12 + 1, 1)
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF logs "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+        ))
+
+
+def seed(volumes: Dict[str, int], log_months: int, rng: random.Random) -> None:
+    now = datetime.now(timezone.utc)
+    token_expires_at = now + timedelta(days=7)
+
+    def random_moment(days: int) -> datetime:
+        return now - timedelta(seconds=rng.randint(0, days * 86400))
+
+    with engine.begin() as connection:
+        # Пользователи: один администратор и полицейские
+        users = [{
+            "discord_id": ADMIN_DISCORD_ID,
+            "discord_username": "bench_admin",
+            "minecraft_username": "bench_admin",
+            "role": "admin",
+            "is_active": True,
+            "discord_roles": [],
+            "last_role_check": now,
+            "discord_access_token": "bench-token-admin",
+            "discord_refresh_token": "bench-refresh-admin",
+            "discord_expires_at": token_expires_at,
+        }]
+        for index in range(volumes["police"]):
+            users.append({
+                "discord_id": POLICE_DISCORD_ID_START + index,
+                "discord_username": f"bench_police_{index}",
+                "minecraft_username": f"police_{index}",
+                "role": "police",
+                "is_active": True,
+                "discord_roles": [],
+                "last_role_check": now,
+                "discord_access_token": f"bench-token-{index}",
+                "discord_refresh_token": f"bench-refresh-{index}",
+                "discord_expires_at": token_expires_at,
+            })
+        _insert(connection, User, iter(users), len(users))
+        user_ids = _ids(connection, User)
+
+        _insert(connection, Passport, ({
+            "first_name": rng.choice(FIRST_NAMES),
+            "last_name": rng.choice(LAST_NAMES),
+            "discord_id": str(CITIZEN_DISCORD_ID_START + index),
+            "nickname": f"player_{index}",
+            "uuid": f"{index:032x}",
+            "age": rng.randint(16, 70),
+            "gender": rng.choice(("male", "female")),
+            "city": rng.choice(CITIES),
+            "violations_count": 0,
+            "entry_date": random_moment(365),
+            "is_emergency": rng.random() < 0.02,
+            "created_at": random_moment(365),
+        } for index in range(volumes["passports"])), volumes["passports"])
+        passport_ids = _ids(connection, Passport)
+
+        _insert(connection, Fine, ({
+            "passport_id": rng.choice(passport_ids),
+            "article": rng.choice(ARTICLES),
+            "amount": rng.randint(1, 200) * 10,
+            "description": "Нагрузочные данные",
+            "created_by_user_id": rng.choice(user_ids),
+            "is_paid": rng.random() < 0.6,
+            "created_at": random_moment(365),
+        } for _ in range(volumes["fines"])), volumes["fines"])
+
+        # Количество нарушений в паспортах — как если бы штрафы выписывались через API
+        connection.execute(text(
+            "UPDATE passports SET violations_count = "
+            "(SELECT COUNT(*) FROM fines WHERE fines.passport_id = passports.id)"
+        ))
+
+        # Неоплаченные платежи: каждый вызов вебхука в нагрузке закрывает один из них
+        _insert(connection, Payment, ({
+            "passport_id": rng.choice(passport_ids),
+            "fine_ids": json.dumps([]),
+            "total_amount": float(rng.randint(1, 100)),
+            "status": "pending",
+            "expires_at": now + timedelta(days=1),
+        } for _ in range(volumes["payments"])), volumes["payments"])
+
+        ensure_log_partitions(connection, log_months)
+
+        def log_rows() -> Iterator[dict]:
+            for _ in range(volumes["logs"]):
+                action, entity_type = rng.choice(LOG_ACTIONS)
+                yield {
+                    "user_id": rng.choice(user_ids),
+                    "action": action,
+                    "entity_type": entity_type,
+                    "entity_id": rng.choice(passport_ids),
+                    "details": {"source": "benchmark"},
+                    "ip_address": f"10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+                    "created_at": random_moment(log_months * 30),
+                }
+
+        _insert(connection, Log, log_rows(), volumes["logs"])
+        backfill_log_catalog(connection)
+
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("ANALYZE"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Наполнение базы данными для нагрузочных тестов")
+    parser.add_argument("--scale", type=float, default=1.0, help="Множитель объемов (1.0 = 50k/500k/5M)")
+    parser.add_argument("--log-months", type=int, default=3, help="За сколько месяцев генерировать логи")
+    parser.add_argument("--reset", action="store_true", help="Очистить таблицы перед наполнением")
+    parser.add_argument("--seed", type=int, default=42, help="Seed генератора случайных чисел")
+    args = parser.parse_args()
+
+    volumes = {name: max(1, int(count * args.scale)) for name, count in BASE_VOLUMES.items()}
+    volumes["police"] = BASE_VOLUMES["police"]
+
+    create_schema()
+    with engine.begin() as connection:
+        if args.reset:
+            reset(connection)
+        elif connection.execute(select(func.count()).select_from(User)).scalar():
+            raise SystemExit("Database is not empty, use --reset to overwrite benchmark data")
+
+    started = time.perf_counter()
+    print(f"Seeding {engine.url.render_as_string(hide_password=True)}: {volumes}")
+    seed(volumes, args.log_months, random.Random(args.seed))
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
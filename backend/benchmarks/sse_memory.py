@@ -0,0 +1,158 @@
+"""
+Память на простаивающие SSE соединения
+
+Регистрирует N соединений в реестре (app.services.sse_registry) и для каждого
+запускает задачу, ожидающую события так же, как генератор потока /events/role-updates.
+Через tracemalloc измеряет прирост памяти на одно соединение:
+  * registry    — только соединения в реестре;
+  * idle_stream — плюс ожидающая задача потока;
+  * after_burst — после рассылки обновления роли всем и вычитывания очередей;
+  * legacy      — прежняя схема (словарь + asyncio.Queue на соединение) для сравнения.
+
+Запуск из каталога backend:
+    python -m benchmarks.sse_memory
+    python -m benchmarks.sse_memory --connections 10000 --json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import tracemalloc
+from typing import Callable, Dict, List
+
+from app.services.sse_registry import SSERegistry
+
+HEARTBEAT_INTERVAL = 30.0
+ROLES = ("citizen", "police", "admin")
+
+
+class LegacyConnection:
+    """
+    Соединение в прежней схеме: неограниченная asyncio.Queue на клиента
+    """
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.queue = asyncio.Queue()
+        self.connected = True
+
+
+async def _stream(connection) -> None:
+    while True:
+        try:
+            if await connection.next_event(HEARTBEAT_INTERVAL) is None:
+                return
+        except asyncio.TimeoutError:
+            continue
+
+
+async def _legacy_stream(connection: LegacyConnection) -> None:
+    while connection.connected:
+        try:
+            if await asyncio.wait_for(connection.queue.get(), timeout=HEARTBEAT_INTERVAL) is None:
+                return
+        except asyncio.TimeoutError:
+            continue
+
+
+async def _settle() -> None:
+    # Даем задачам дойти до ожидания события
+    for _ in range(3):
+        await asyncio.sleep(0)
+    gc.collect()
+
+
+def _measure(connections: int, baseline: int) -> Dict[str, float]:
+    current = tracemalloc.get_traced_memory()[0]
+    return {
+        "total_kib": round((current - baseline) / 1024, 1),
+        "bytes_per_connection": round((current - baseline) / connections, 1),
+    }
+
+
+async def measure_registry(connections: int) -> Dict[str, Dict[str, float]]:
+    """
+    Прирост памяти на соединение в реестре на разных стадиях
+    """
+    results = {}
+    registry = SSERegistry()
+    await _settle()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    registered = [registry.register(user_id, ROLES[user_id % len(ROLES)]) for user_id in range(connections)]
+    await _settle()
+    results["registry"] = _measure(connections, baseline)
+
+    tasks = [asyncio.create_task(_stream(connection)) for connection in registered]
+    await _settle()
+    results["idle_stream"] = _measure(connections, baseline)
+
+    # Обновление роли каждому пользователю и всем администраторам, затем вычитывание очередей
+    for user_id in range(connections):
+        event = {"event": "role_update", "data": {"user_id": user_id, "old_role": "citizen", "new_role": "police"}}
+        registry.update_role(user_id, "police")
+        registry.send_to_user(user_id, event)
+    await _settle()
+    results["after_burst"] = _measure(connections, baseline)
+
+    for connection in registered:
+        registry.unregister(connection)
+    await asyncio.gather(*tasks)
+    return results
+
+
+async def measure_legacy(connections: int) -> Dict[str, Dict[str, float]]:
+    """
+    Прирост памяти на соединение в прежней схеме
+    """
+    clients = {}
+    await _settle()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    for user_id in range(connections):
+        clients[user_id] = LegacyConnection(user_id)
+    tasks = [asyncio.create_task(_legacy_stream(connection)) for connection in clients.values()]
+    await _settle()
+    result = _measure(connections, baseline)
+
+    for connection in clients.values():
+        connection.connected = False
+        connection.queue.put_nowait(None)
+    await asyncio.gather(*tasks)
+    return {"legacy": result}
+
+
+def run(connections: int, stages: List[Callable]) -> Dict[str, object]:
+    report: Dict[str, object] = {"connections": connections}
+    tracemalloc.start()
+    try:
+        for stage in stages:
+            report.update(asyncio.run(stage(connections)))
+    finally:
+        tracemalloc.stop()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Память на простаивающие SSE соединения")
+    parser.add_argument("--connections", type=int, default=10_000, help="Количество одновременных потоков")
+    parser.add_argument("--no-legacy", action="store_true", help="Не измерять прежнюю схему")
+    parser.add_argument("--json", action="store_true", help="Вывести результат в JSON")
+    args = parser.parse_args()
+
+    stages = [measure_registry] if args.no_legacy else [measure_registry, measure_legacy]
+    report = run(args.connections, stages)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['connections']} idle SSE connections:")
+    for stage in ("registry", "idle_stream", "after_burst", "legacy"):
+        if stage in report:
+            result = report[stage]
+            print(f"  {stage:<12} {result['bytes_per_connection']:>8.1f} B/connection  {result['total_kib']:>10.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
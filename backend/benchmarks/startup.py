@@ -0,0 +1,117 @@
+"""
+Бенчмарк старта приложения
+
+Меряет в отдельных процессах (холодный старт, как у нового воркера):
+  * import   — время `import app.main`;
+  * boot     — от запуска uvicorn до первого ответа 200 на /livez.
+
+Запуск из каталога backend:
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --only import --json
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import() -> float:
+    """
+    Время `import app.main` в новом интерпретаторе (секунды)
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=BACKEND_DIR, env=os.environ.copy(), capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_boot(timeout: float = 60.0) -> float:
+    """
+    Время от запуска uvicorn до ответа 200 на /livez (секунды)
+    """
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=os.environ.copy(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    try:
+        url = f"http://127.0.0.1:{port}/livez"
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited: {process.stderr.read().decode(errors='replace')}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.02)
+        raise TimeoutError(f"/livez did not respond within {timeout}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "runs": len(samples),
+        "min_ms": round(min(samples) * 1000, 1),
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк старта приложения")
+    parser.add_argument("--runs", type=int, default=5, help="Количество прогонов каждого замера")
+    parser.add_argument("--only", choices=["import", "boot"], help="Выполнить только один замер")
+    parser.add_argument("--json", action="store_true", help="Вывести результат в JSON")
+    args = parser.parse_args()
+
+    measurements = {"import": measure_import, "boot": measure_boot}
+    if args.only:
+        measurements = {args.only: measurements[args.only]}
+
+    report = {
+        name: summarize([measure() for _ in range(args.runs)])
+        for name, measure in measurements.items()
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    for name, stats in report.items():
+        print(
+            f"{name:<8} runs={stats['runs']:<3} min={stats['min_ms']:>8.1f}ms "
+            f"median={stats['median_ms']:>8.1f}ms max={stats['max_ms']:>8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
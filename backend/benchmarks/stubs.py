@@ -0,0 +1,367 @@
+"""
+Заглушки внешних API (Discord, SP-Worlds, BT, Mojang) для нагрузочных тестов
+
+ASGI-приложения отвечают правдоподобными данными на те эндпоинты, которые
+используют клиенты из app/clients. Поверх каждого приложения работает
+FaultInjectionMiddleware: задержка по заданному распределению, доля ошибок 5xx
+и ограничение частоты с ответом 429 (как у Discord: retry_after в теле и
+заголовок Retry-After).
+
+Отдельный процесс (каждый сервис на своем порту, начиная с --port):
+    python -m benchmarks.stubs --port 9100 --latency lognormal:40:0.5 \\
+        --latency spworlds=fixed:800 --error-rate 0.01 --rate-limit discord=50/1
+
+Спецификации задержки: fixed:MS, uniform:MIN_MS:MAX_MS, exp:MEAN_MS,
+lognormal:MEDIAN_MS:SIGMA. Любую опцию можно ограничить сервисом: service=value.
+После старта печатаются переменные окружения для приложения (DISCORD_API_URL и т.д.).
+
+В процессе бенчмарка заглушки подключаются через httpx.ASGITransport (install_stub_clients).
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from app.clients.discord import discord_client
+from app.clients.resilience import upstream_transport
+from app.clients.spworlds import spworlds_client
+from app.core.config import settings
+
+SERVICES = ("discord", "spworlds", "bt", "mojang")
+
+# Настройка, задающая базовый URL клиента, и путь API внутри заглушки
+SERVICE_URL_SETTINGS = {
+    "discord": ("DISCORD_API_URL", "/api/v10"),
+    "spworlds": ("SPWORLDS_API_URL", "/api/public"),
+    "bt": ("BT_API_URL", "/api/users"),
+    "mojang": ("MOJANG_API_URL", ""),
+}
+
+GUILD_ROLES = [
+    {"id": settings.DISCORD_ADMIN_ROLE_ID, "name": settings.DISCORD_ADMIN_ROLE_NAME},
+    {"id": settings.DISCORD_POLICE_ROLE_ID, "name": settings.DISCORD_POLICE_ROLE_NAME},
+]
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Распределение задержки из строки спецификации; возвращает генератор секунд
+    """
+    kind, *params = spec.split(":")
+    values = [float(value) for value in params]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0] / 1000
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == "exp" and len(values) == 1:
+        return lambda rng: rng.expovariate(1 / values[0]) / 1000 if values[0] else 0.0
+    if kind == "lognormal" and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1]) / 1000
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+def parse_rate_limit(spec: str) -> Tuple[int, float]:
+    """
+    Лимит вида REQUESTS/SECONDS, например 50/1
+    """
+    requests, seconds = spec.split("/")
+    return int(requests), float(seconds)
+
+
+class FaultInjectionMiddleware:
+    """
+    ASGI middleware заглушки: задержка, ошибки 5xx и 429 по лимиту частоты
+    """
+
+    def __init__(
+            self,
+            app,
+            latency: str = "fixed:0",
+            error_rate: float = 0.0,
+            rate_limit: Optional[str] = None,
+            seed: Optional[int] = None
+    ):
+        self.app = app
+        self.latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "rate_limited": 0, "errors": 0}
+
+        # Фиксированное окно: не больше limit запросов за window секунд
+        self.limit, self.window = parse_rate_limit(rate_limit) if rate_limit else (0, 0.0)
+        self._window_started = time.monotonic()
+        self._window_count = 0
+
+    def _retry_after(self) -> Optional[float]:
+        if not self.limit:
+            return None
+        now = time.monotonic()
+        if now - self._window_started >= self.window:
+            self._window_started = now
+            self._window_count = 0
+        self._window_count += 1
+        if self._window_count <= self.limit:
+            return None
+        return round(self._window_started + self.window - now, 3)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self.stats["requests"] += 1
+        retry_after = self._retry_after()
+        if retry_after is not None:
+            self.stats["rate_limited"] += 1
+            response = JSONResponse(
+                {"message": "You are being rate limited.", "retry_after": retry_after, "global": False},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+            await response(scope, receive, send)
+            return
+
+        delay = self.latency(self.rng)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.stats["errors"] += 1
+            await JSONResponse({"message": "Injected failure"}, status_code=503)(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+
+def _user_id(request: Request) -> str:
+    """
+    Идентификатор пользователя из пути или из bench-токена (bench-token-<n>)
+    """
+    if "user_id" in request.path_params:
+        return request.path_params["user_id"]
+    token = request.headers.get("authorization", "").rsplit("-", 1)[-1]
+    return token if token.isdigit() else "0"
+
+
+def _member(request: Request) -> dict:
+    user_id = _user_id(request)
+    return {
+        "user": {"id": user_id, "username": f"bench_{user_id}"},
+        "nick": None,
+        "roles": [settings.DISCORD_POLICE_ROLE_ID],
+        "joined_at": "2024-01-01T00:00:00+00:00",
+    }
+
+
+async def discord_token(request: Request) -> JSONResponse:
+    return JSONResponse({
+        "access_token": "bench-token-0",
+        "refresh_token": "bench-refresh-0",
+        "expires_in": 604800,
+        "token_type": "Bearer",
+        "scope": "identify guilds guilds.members.read",
+    })
+
+
+async def discord_me(request: Request) -> JSONResponse:
+    user_id = _user_id(request)
+    return JSONResponse({"id": user_id, "username": f"bench_{user_id}", "discriminator": "0", "avatar": None})
+
+
+async def discord_guilds(request: Request) -> JSONResponse:
+    return JSONResponse([{"id": settings.DISCORD_GUILD_ID, "name": "Bench guild"}])
+
+
+async def discord_member(request: Request) -> JSONResponse:
+    return JSONResponse(_member(request))
+
+
+async def discord_roles(request: Request) -> JSONResponse:
+    return JSONResponse(GUILD_ROLES)
+
+
+async def discord_gateway(request: Request) -> JSONResponse:
+    return JSONResponse({"url": "wss://gateway.discord.gg"})
+
+
+async def spworlds_user(request: Request) -> JSONResponse:
+    discord_id = request.path_params["discord_id"]
+    if not discord_id.isdigit():
+        return JSONResponse({"username": None, "uuid": None})
+    return JSONResponse({"username": f"player_{discord_id[-6:]}", "uuid": f"{int(discord_id):032x}"[-32:]})
+
+
+async def spworlds_payment(request: Request) -> JSONResponse:
+    return JSONResponse({"url": "https://spworlds.ru/pay/bench", "code": "bench"}, status_code=201)
+
+
+async def bt_users(request: Request) -> Response:
+    if request.method == "HEAD":
+        return Response()
+    if request.method == "POST":
+        return JSONResponse({"success": True})
+    return JSONResponse([{"user_id": str(index), "bt": 100} for index in range(100)])
+
+
+async def bt_user(request: Request) -> JSONResponse:
+    return JSONResponse({"success": True})
+
+
+async def mojang_profile(request: Request) -> JSONResponse:
+    nickname = request.path_params["nickname"]
+    return JSONResponse({"id": f"{abs(hash(nickname)):032x}"[-32:], "name": nickname})
+
+
+def build_apps(prefixes: Optional[Dict[str, str]] = None) -> Dict[str, Starlette]:
+    """
+    ASGI-приложения заглушек; prefixes — путь API внутри сервиса (как у настоящего URL)
+    """
+    prefixes = prefixes or {service: "" for service in SERVICES}
+    discord, spworlds, bt, mojang = (prefixes[service] for service in SERVICES)
+    return {
+        "discord": Starlette(routes=[
+            Route(f"{discord}/oauth2/token", discord_token, methods=["POST"]),
+            Route(f"{discord}/users/@me", discord_me),
+            Route(f"{discord}/users/@me/guilds", discord_guilds),
+            Route(f"{discord}/users/@me/guilds/{{guild_id}}/member", discord_member),
+            Route(f"{discord}/guilds/{{guild_id}}/roles", discord_roles),
+            Route(f"{discord}/guilds/{{guild_id}}/members/{{user_id}}", discord_member),
+            Route(f"{discord}/gateway", discord_gateway),
+        ]),
+        "spworlds": Starlette(routes=[
+            Route(f"{spworlds}/users/{{discord_id}}", spworlds_user),
+            Route(f"{spworlds}/payments", spworlds_payment, methods=["POST"]),
+        ]),
+        "bt": Starlette(routes=[
+            Route(bt or "/", bt_users, methods=["GET", "HEAD", "POST"]),
+            Route(f"{bt}/{{user_id}}", bt_user, methods=["PUT"]),
+            Route(f"{bt}/{{user_id}}/add", bt_user, methods=["POST"]),
+        ]),
+        "mojang": Starlette(routes=[
+            Route(f"{mojang}/users/profiles/minecraft/{{nickname}}", mojang_profile),
+        ]),
+    }
+
+
+def per_service(values: List[str], default: str) -> Dict[str, str]:
+    """
+    Разобрать повторяемую опцию [service=]value в значения по сервисам
+    """
+    result = {service: default for service in SERVICES}
+    overrides = []
+    for value in values:
+        service, sep, rest = value.partition("=")
+        if sep and service in SERVICES:
+            overrides.append((service, rest))
+        else:
+            result = {name: value for name in SERVICES}
+    # Значения для конкретного сервиса важнее общих, независимо от порядка опций
+    for service, value in overrides:
+        result[service] = value
+    return result
+
+
+def build_stack(
+        latency: List[str],
+        error_rate: List[str],
+        rate_limit: List[str],
+        prefixes: Optional[Dict[str, str]] = None,
+        seed: Optional[int] = None
+) -> Dict[str, FaultInjectionMiddleware]:
+    """
+    Заглушки всех сервисов с внедрением задержек и отказов
+    """
+    latencies = per_service(latency, "fixed:0")
+    error_rates = per_service(error_rate, "0")
+    rate_limits = per_service(rate_limit, "")
+    return {
+        service: FaultInjectionMiddleware(
+            app,
+            latency=latencies[service],
+            error_rate=float(error_rates[service]),
+            rate_limit=rate_limits[service] or None,
+            seed=seed
+        )
+        for service, app in build_apps(prefixes).items()
+    }
+
+
+def install_stub_clients(stack: Optional[Dict[str, FaultInjectionMiddleware]] = None) -> None:
+    """
+    Направить клиентов Discord и SP-Worlds текущего процесса в заглушки
+
+    Заглушки подключаются под тем же слоем устойчивости (предохранитель, таймауты),
+    что и настоящие внешние API.
+    """
+    stack = stack or build_stack([], [], [])
+    discord_client._client = httpx.AsyncClient(
+        base_url="http://discord.stub",
+        transport=upstream_transport("discord", httpx.ASGITransport(app=stack["discord"]))
+    )
+    spworlds_client.map_id = spworlds_client.map_id or "bench"
+    spworlds_client.map_token = spworlds_client.map_token or "bench"
+    spworlds_client._client = httpx.AsyncClient(
+        base_url="http://spworlds.stub", auth=(spworlds_client.map_id, spworlds_client.map_token),
+        transport=upstream_transport("spworlds", httpx.ASGITransport(app=stack["spworlds"]))
+    )
+
+
+def stub_environment(host: str, port: int) -> Dict[str, str]:
+    """
+    Переменные окружения, направляющие приложение в заглушки на host:port..port+3
+    """
+    environment = {
+        setting: f"http://{host}:{port + index}{prefix}"
+        for index, (setting, prefix) in enumerate(SERVICE_URL_SETTINGS[service] for service in SERVICES)
+    }
+    if not settings.BT_API_TOKEN:
+        # Без токена клиент BT не отправляет запросы
+        environment["BT_API_TOKEN"] = "bench"
+    return environment
+
+
+async def serve(args) -> None:
+    import uvicorn
+
+    prefixes = {service: SERVICE_URL_SETTINGS[service][1] for service in SERVICES}
+    stack = build_stack(args.latency, args.error_rate, args.rate_limit, prefixes, args.seed)
+    servers = [
+        uvicorn.Server(uvicorn.Config(
+            stack[service], host=args.host, port=args.port + index, log_level="warning", access_log=False
+        ))
+        for index, service in enumerate(SERVICES)
+    ]
+
+    for setting, url in stub_environment(args.host, args.port).items():
+        print(f"{setting}={url}", flush=True)
+
+    try:
+        await asyncio.gather(*(server.serve() for server in servers))
+    finally:
+        print(json.dumps({service: middleware.stats for service, middleware in stack.items()}), flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Заглушки внешних API для нагрузочных тестов")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100, help="Порт первого сервиса (далее по порядку)")
+    parser.add_argument("--latency", action="append", default=[], help="[service=]spec задержки")
+    parser.add_argument("--error-rate", action="append", default=[], help="[service=]доля ответов 503")
+    parser.add_argument("--rate-limit", action="append", default=[], help="[service=]REQUESTS/SECONDS")
+    parser.add_argument("--seed", type=int, help="Seed генератора задержек и ошибок")
+    args = parser.parse_args()
+
+    asyncio.run(serve(args))
+
+
+if __name__ == "__main__":
+    main()
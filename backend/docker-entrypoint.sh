@@ -130,9 +130,9 @@ run_migrations() {
         ls -la alembic/versions/ | grep "\.py$" | grep -v "__init__"
     fi
 
-    # Выполняем миграции
+    # Выполняем миграции (пустая база создается по моделям и помечается как head)
     echo "⬆️  Applying migrations..."
-    python -m alembic upgrade head
+    python -m app.core.schema
 
     echo "✅ Migrations completed successfully!"
 }
@@ -0,0 +1,37 @@
+"""
+Тесты проверки свежести данных для POST /auth/refresh
+"""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.api.v1.auth import _is_recently_refreshed
+from app.core.config import settings
+
+
+def _user(**fields):
+    defaults = {"id": 1, "last_role_check": None, "last_refreshed_at": None}
+    return SimpleNamespace(**{**defaults, **fields})
+
+
+def test_login_and_role_check_do_not_count_as_fresh():
+    """Вход и фоновая проверка ролей не отменяют первый /auth/refresh"""
+    user = _user(last_role_check=datetime.now(timezone.utc))
+    assert not _is_recently_refreshed(user)
+
+
+def test_recent_refresh_is_fresh():
+    user = _user(last_refreshed_at=datetime.now(timezone.utc) - timedelta(seconds=10))
+    assert _is_recently_refreshed(user)
+
+
+def test_old_or_naive_refresh_timestamps():
+    """Старая отметка не свежая; наивное время трактуется как UTC"""
+    old = datetime.now(timezone.utc) - timedelta(seconds=settings.AUTH_REFRESH_FRESHNESS + 1)
+    assert not _is_recently_refreshed(_user(last_refreshed_at=old))
+    naive = datetime.now(timezone.utc).replace(tzinfo=None)
+    assert _is_recently_refreshed(_user(last_refreshed_at=naive))
+
+
+def test_freshness_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_REFRESH_FRESHNESS", 0)
+    assert not _is_recently_refreshed(_user(last_refreshed_at=datetime.now(timezone.utc)))
@@ -0,0 +1,54 @@
+"""
+Тесты клиента API баллов труда (app/clients/bt_api.py)
+"""
+import asyncio
+
+import pytest
+
+from app.clients.bt_api import BTAPIClient
+from app.core.config import settings
+
+
+@pytest.fixture
+def bt(monkeypatch):
+    monkeypatch.setattr(settings, "BT_API_URL", "https://bt.test/api/users")
+    monkeypatch.setattr(settings, "BT_API_TOKEN", "token")
+    monkeypatch.setattr(settings, "BT_BALANCE_CACHE_TTL", 60)
+    client = BTAPIClient()
+    client.lookups = []
+
+    async def get_user_bt(user_id):
+        client.lookups.append(user_id)
+        return 100
+
+    monkeypatch.setattr(client, "get_user_bt", get_user_bt)
+    return client
+
+
+def test_cached_balance_skips_repeated_lookups(bt):
+    async def scenario():
+        return [await bt.get_cached_user_bt("1") for _ in range(3)]
+
+    assert asyncio.run(scenario()) == [100, 100, 100]
+    assert bt.lookups == ["1"]
+
+
+def test_forget_balance_forces_new_lookup(bt):
+    asyncio.run(bt.get_cached_user_bt("1"))
+    asyncio.run(bt.get_cached_user_bt("12"))
+
+    bt.forget_balance("1")
+    asyncio.run(bt.get_cached_user_bt("1"))
+    asyncio.run(bt.get_cached_user_bt("12"))
+
+    assert bt.lookups == ["1", "12", "1"]
+
+
+def test_unconfigured_client_does_not_send_requests(monkeypatch):
+    monkeypatch.setattr(settings, "BT_API_URL", "")
+    monkeypatch.setattr(settings, "BT_API_TOKEN", "")
+    client = BTAPIClient()
+
+    assert not client.is_configured
+    assert asyncio.run(client.get_user_bt("1")) is None
+    assert asyncio.run(client.add_bt("1", 5)) is False
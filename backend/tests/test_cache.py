@@ -0,0 +1,122 @@
+"""
+Тесты кеша ответов (app/core/cache.py)
+"""
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+
+from app.core import cache
+from app.core.cache import MemoryCacheBackend, RedisCacheBackend, ResponseCache
+from app.core.config import settings
+
+
+class FakeRedis:
+    """Минимальный клиент Redis в памяти: get/setex/scan_iter/delete"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def scan_iter(self, match, count):
+        prefix = match.rstrip("*")
+        return [key for key in self.data if key.startswith(prefix)]
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_BACKEND", "memory")
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_MAX_ENTRIES", 2)
+    return ResponseCache()
+
+
+@pytest.fixture
+def redis_backend():
+    backend = RedisCacheBackend("redis://localhost:6379/0")
+    backend._client = FakeRedis()
+    return backend
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set("a", 1, ttl=60)
+    backend.set("b", 2, ttl=60)
+    assert backend.get("a") == 1  # "a" становится самым свежим
+
+    backend.set("c", 3, ttl=60)
+
+    assert backend.get("b") is cache.MISS
+    assert backend.get("a") == 1
+    assert backend.get("c") == 3
+
+
+def test_memory_backend_expires_entries(monkeypatch):
+    backend = MemoryCacheBackend(max_entries=10)
+    now = time.monotonic()
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now)
+    backend.set("key", "value", ttl=30)
+    assert backend.get("key") == "value"
+
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now + 31)
+    assert backend.get("key") is cache.MISS
+    assert backend.size() == 0
+
+
+def test_invalidate_drops_only_given_namespace(memory_cache):
+    memory_cache.get_or_set("fines_stats:/a?", lambda: 1)
+    memory_cache.get_or_set("users_stats:/b?", lambda: 2)
+
+    memory_cache.invalidate("fines_stats")
+
+    assert memory_cache.get_or_set("fines_stats:/a?", lambda: 10) == 10
+    assert memory_cache.get_or_set("users_stats:/b?", lambda: 20) == 2
+
+
+def test_concurrent_misses_call_loader_once(memory_cache):
+    """Одновременные промахи по одному ключу вычисляются один раз"""
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    def worker(results):
+        barrier.wait()
+        results.append(memory_cache.get_or_set("fines_stats:/overview?", loader))
+
+    results = []
+    threads = [threading.Thread(target=worker, args=(results,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["value"] * 8
+    assert memory_cache.misses == 1
+    assert memory_cache.hits == 7
+
+
+def test_redis_backend_serializes_decimal(redis_backend):
+    redis_backend.set("stats", {"total": Decimal("12"), "average": Decimal("2.5")}, ttl=30)
+    assert redis_backend.get("stats") == {"total": 12, "average": 2.5}
+
+
+def test_redis_backend_treats_serialization_errors_as_miss(redis_backend):
+    redis_backend.set("stats", {"value": object()}, ttl=30)
+    assert redis_backend.get("stats") is cache.MISS
+
+    redis_backend._client.data[RedisCacheBackend.KEY_PREFIX + "broken"] = b"{not json"
+    assert redis_backend.get("broken") is cache.MISS
@@ -0,0 +1,49 @@
+"""
+Тесты общей статистики по штрафам (app/crud/fine.py)
+"""
+from datetime import datetime, timezone
+
+from app.crud.fine import fine_crud
+from app.models.fine import Fine
+from app.models.passport import Passport
+from app.models.user import User
+
+
+def _seed(db):
+    officer = User(discord_id=1, discord_username="officer", minecraft_username="Steve", role="police")
+    unnamed = User(discord_id=2, discord_username="rookie", minecraft_username=None, role="police")
+    passport = Passport(
+        first_name="Иван", last_name="Иванов", discord_id="10", age=30, gender="male",
+        city="Город", entry_date=datetime(2024, 1, 1, tzinfo=timezone.utc)
+    )
+    db.add_all([officer, unnamed, passport])
+    db.flush()
+    db.add_all([
+        Fine(passport_id=passport.id, article="1.1", amount=100, created_by_user_id=officer.id, is_paid=True),
+        Fine(passport_id=passport.id, article="1.1", amount=200, created_by_user_id=officer.id),
+        Fine(passport_id=passport.id, article="2.3", amount=50, created_by_user_id=unnamed.id),
+    ])
+    db.commit()
+    return officer, unnamed
+
+
+def test_overview_statistics_without_grouping_sets(db):
+    """Вне PostgreSQL статистика собирается обычными GROUP BY"""
+    officer, unnamed = _seed(db)
+
+    stats = fine_crud.get_overview_statistics(db)
+
+    assert stats["total_fines"] == 3
+    assert stats["total_amount"] == 350
+    assert stats["paid"]["count"] == 1
+    assert stats["unpaid"]["total_amount"] == 250
+
+    assert [(item["article"], item["count"], item["unpaid_amount"]) for item in stats["top_articles"]] == [
+        ("1.1", 2, 200), ("2.3", 1, 50)
+    ]
+
+    officers = {item["user_id"]: item for item in stats["officers"]}
+    assert officers[officer.id]["username"] == "Steve"
+    assert officers[officer.id]["paid_count"] == 1
+    # Сотрудник без ника Minecraft не подменяется на "Unknown"
+    assert officers[unnamed.id]["username"] is None
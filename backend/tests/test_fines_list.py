@@ -0,0 +1,24 @@
+"""
+Тесты быстрого ответа списка штрафов (GET /fines)
+"""
+from datetime import datetime, timezone
+
+from app.api.v1.fines import FINE_LIST_FIELDS, fine_with_details
+from app.schemas.fine import FineWithDetails
+from app.utils.serialization import dumps
+
+
+def test_fast_path_matches_response_model_bytes():
+    row = (
+        3, "1.1 КоАП", 500, None,
+        7, 2, False,
+        datetime(2026, 1, 1, tzinfo=timezone.utc),
+        datetime(2026, 1, 2, 12, 30, 15, 250000, tzinfo=timezone.utc),
+        "officer", None
+    )
+    assert len(row) == len(FINE_LIST_FIELDS) + 2
+
+    fine = fine_with_details(row)
+
+    assert dumps(fine) == FineWithDetails.model_validate(fine).model_dump_json().encode()
+    assert b'"created_at":"2026-01-01T00:00:00Z"' in dumps(fine)
@@ -0,0 +1,44 @@
+"""
+Тесты фоновой проверки зависимостей (app/services/health.py)
+"""
+import asyncio
+
+import pytest
+
+from app.services import health
+from app.services.health import HealthProbeService
+
+
+@pytest.fixture
+def service():
+    service = HealthProbeService()
+    service.calls = []
+
+    def probe(name):
+        async def run():
+            service.calls.append(name)
+            return True
+        return run
+
+    service._probes = {name: probe(name) for name in ("database", "spworlds", "discord", "bt_api")}
+    return service
+
+
+def test_follower_probes_only_the_database(service, monkeypatch):
+    monkeypatch.setattr(health.leader_elector, "is_leader", False)
+
+    asyncio.run(service.probe_all())
+
+    assert service.calls == ["database"]
+    assert service.is_ready
+    assert service.readiness()["upstreams_probed"] is False
+
+
+def test_leader_probes_upstreams_and_follower_drops_stale_results(service, monkeypatch):
+    monkeypatch.setattr(health.leader_elector, "is_leader", True)
+    asyncio.run(service.probe_all())
+    assert sorted(service.calls) == ["bt_api", "database", "discord", "spworlds"]
+
+    monkeypatch.setattr(health.leader_elector, "is_leader", False)
+    asyncio.run(service.probe_all())
+    assert list(service.results) == ["database"]
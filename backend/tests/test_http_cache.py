@@ -0,0 +1,65 @@
+"""
+Тесты условных GET (app/utils/http_cache.py)
+"""
+from fastapi import Request, Response
+
+from app.api.v1.users import read_user_me
+from app.models.log import Log
+from app.models.user import User
+from app.utils.http_cache import (
+    CACHE_PRIVATE_REVALIDATE, CACHE_PRIVATE_SHORT, conditional_response, make_etag
+)
+
+
+def _request(if_none_match: str = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": b""})
+
+
+def test_first_request_gets_etag_headers():
+    response = Response()
+
+    assert conditional_response(_request(), response, "users/me", 1, "2024-01-01") is None
+    assert response.headers["ETag"] == make_etag("users/me", 1, "2024-01-01")
+    assert response.headers["Cache-Control"] == CACHE_PRIVATE_REVALIDATE
+
+
+def test_matching_etag_returns_not_modified():
+    etag = make_etag("users/me", 1, "2024-01-01")
+
+    not_modified = conditional_response(
+        _request(f'"other", {etag}'), Response(), "users/me", 1, "2024-01-01", cache_control=CACHE_PRIVATE_SHORT
+    )
+
+    assert not_modified.status_code == 304
+    assert not_modified.body == b""
+    assert not_modified.headers["ETag"] == etag
+    assert not_modified.headers["Cache-Control"] == CACHE_PRIVATE_SHORT
+
+
+def test_weak_comparison_and_wildcard():
+    etag = make_etag("passports", 5)
+    strong = etag.removeprefix("W/")
+
+    assert conditional_response(_request(strong), Response(), "passports", 5).status_code == 304
+    assert conditional_response(_request("*"), Response(), "passports", 5).status_code == 304
+
+
+def test_changed_version_returns_full_response():
+    stale = make_etag("users/me", 1, "2024-01-01")
+    response = Response()
+
+    assert conditional_response(_request(stale), response, "users/me", 1, "2024-02-01") is None
+    assert response.headers["ETag"] != stale
+
+
+def test_revalidated_profile_view_is_still_audited(db):
+    user = User(discord_id=1, discord_username="officer", role="police")
+    db.add(user)
+    db.commit()
+    etag = make_etag("users/me", user.id, user.updated_at)
+
+    not_modified = read_user_me(request=_request(etag), response=Response(), db=db, current_user=user)
+
+    assert not_modified.status_code == 304
+    assert [log.action for log in db.query(Log)] == ["VIEW_PROFILE"]
@@ -0,0 +1,83 @@
+"""
+Тесты очереди фоновых задач (app/crud/job.py)
+"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects import postgresql
+
+from app.crud.job import job_crud
+from app.models.job import Job
+
+
+def test_claim_query_skips_locked_rows(db):
+    """Захват идет через SELECT ... FOR UPDATE SKIP LOCKED"""
+    sql = str(job_crud._claimable(db).statement.compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE SKIP LOCKED" in sql
+
+
+def test_claim_next_takes_oldest_pending_once(db):
+    """Задачи захватываются по порядку и не выдаются повторно"""
+    first, _ = job_crud.enqueue(db, job_type="violations_recount")
+    second, _ = job_crud.enqueue(db, job_type="violations_recount")
+
+    claimed = job_crud.claim_next(db, worker_id="worker-a")
+    assert claimed.id == first.id
+    assert claimed.status == "running"
+    assert claimed.worker_id == "worker-a"
+    assert claimed.heartbeat_at is not None
+
+    assert job_crud.claim_next(db, worker_id="worker-b").id == second.id
+    assert job_crud.claim_next(db, worker_id="worker-c") is None
+
+
+def test_enqueue_deduplicates_active_jobs(db):
+    """Пока задача с ключом активна, новая не создается"""
+    job, created = job_crud.enqueue(db, job_type="mass_role_check", dedup_key="mass_role_check")
+    same, created_again = job_crud.enqueue(db, job_type="mass_role_check", dedup_key="mass_role_check")
+    assert created and not created_again
+    assert same.id == job.id
+
+
+def test_requeue_stale_returns_abandoned_jobs(db):
+    """Задача без heartbeat дольше таймаута возвращается в очередь, живая — нет"""
+    stale, _ = job_crud.enqueue(db, job_type="violations_recount")
+    alive, _ = job_crud.enqueue(db, job_type="violations_recount")
+    job_crud.claim_next(db, worker_id="crashed")
+    job_crud.claim_next(db, worker_id="alive")
+
+    stale.heartbeat_at = datetime.now(timezone.utc) - timedelta(seconds=600)
+    db.commit()
+
+    assert job_crud.requeue_stale(db, stale_after_seconds=300) == 1
+    db.expire_all()
+    assert stale.status == "pending" and stale.worker_id is None
+    assert alive.status == "running"
+
+    reclaimed = job_crud.claim_next(db, worker_id="worker-b")
+    assert reclaimed.id == stale.id
+
+
+def test_progress_and_cancel_request(db):
+    """Прогресс сохраняется, а запрос отмены виден выполняющему воркеру"""
+    job, _ = job_crud.enqueue(db, job_type="violations_recount")
+    job = job_crud.claim_next(db, worker_id="worker-a")
+
+    assert job_crud.update_progress(db, job=job, current=5, total=10) is False
+    assert (job.progress_current, job.progress_total) == (5, 10)
+
+    job_crud.request_cancel(db, job=db.get(Job, job.id))
+    assert job_crud.update_progress(db, job=job, current=6) is True
+
+
+def test_finish_stores_result(db):
+    """Завершение сохраняет статус и результат"""
+    job, _ = job_crud.enqueue(db, job_type="violations_recount")
+    job = job_crud.claim_next(db, worker_id="worker-a")
+
+    job_crud.finish(db, job=job, status="completed", result={"passports_recounted": 3})
+    db.expire_all()
+    stored = db.get(Job, job.id)
+    assert stored.status == "completed"
+    assert stored.result == {"passports_recounted": 3}
+    assert stored.finished_at is not None
+    assert job_crud.get_active_by_dedup_key(db, dedup_key="any") is None
@@ -0,0 +1,47 @@
+"""
+Тесты выбора лидера (app/services/leader_election.py)
+"""
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.leader_election import LeaderElector
+
+
+@pytest.fixture
+def postgres_elector(monkeypatch):
+    """Выборы как на PostgreSQL, но без соединений с базой"""
+    monkeypatch.setattr(settings, "DATABASE_URL", "postgresql://user@localhost/db")
+    monkeypatch.setattr(settings, "LEADER_ELECTION_ENABLED", True)
+    elector = LeaderElector()
+    elector.attempts = 0
+
+    def try_acquire():
+        elector.attempts += 1
+        return False, "other-host:42"
+
+    monkeypatch.setattr(elector, "_try_acquire", try_acquire)
+    monkeypatch.setattr(elector, "_get_engine", lambda: pytest.fail("status must not touch the database"))
+    return elector
+
+
+def test_follower_status_uses_leader_seen_on_last_attempt(postgres_elector):
+    assert asyncio.run(postgres_elector.tick()) is False
+
+    status = postgres_elector.status()
+    postgres_elector.status()
+
+    assert status["is_leader"] is False
+    assert status["leader_id"] == "other-host:42"
+    assert postgres_elector.attempts == 1
+    # Между попытками у не-лидера нет открытого соединения
+    assert postgres_elector._connection is None
+
+
+def test_single_worker_reports_itself_as_leader(monkeypatch):
+    monkeypatch.setattr(settings, "LEADER_ELECTION_ENABLED", False)
+    elector = LeaderElector()
+
+    assert asyncio.run(elector.tick()) is True
+    assert elector.status()["leader_id"] == elector.worker_id
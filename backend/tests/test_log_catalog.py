@@ -0,0 +1,71 @@
+"""
+Тесты справочника действий в логах (app/crud/log_catalog.py)
+"""
+from sqlalchemy import event
+
+from app.crud.log import log_crud
+from app.crud.log_catalog import CRUDLogCatalog, log_catalog_crud
+from app.models.log_catalog import LogCatalog
+
+
+def _catalog_statements(db) -> list:
+    statements = []
+
+    @event.listens_for(db.get_bind(), "before_cursor_execute")
+    def _record(conn, cursor, statement, *args):
+        if "log_catalog" in statement:
+            statements.append(statement)
+
+    return statements
+
+
+def test_known_pairs_do_not_touch_the_database(db):
+    catalog = CRUDLogCatalog(LogCatalog)
+    statements = _catalog_statements(db)
+
+    assert catalog.record(db, action="LOGIN", entity_type="user") is True
+    db.commit()
+    catalog.mark_known(action="LOGIN", entity_type="user")
+
+    assert catalog.record(db, action="LOGIN", entity_type="user") is False
+    assert len(statements) == 1
+    assert "ON CONFLICT" in statements[0] and "DO NOTHING" in statements[0]
+
+
+def test_pair_inserted_by_another_worker_is_ignored(db):
+    """Вставка уже существующей пары не падает и не дублирует строку"""
+    for _ in range(2):
+        # Каждый экземпляр — отдельный процесс со своим набором известных пар
+        assert CRUDLogCatalog(LogCatalog).record(db, action="CREATE", entity_type="fine") is True
+    db.commit()
+
+    assert db.query(LogCatalog).count() == 1
+
+
+def test_rolled_back_pair_is_recorded_again(db):
+    catalog = CRUDLogCatalog(LogCatalog)
+    catalog.record(db, action="DELETE", entity_type="fine")
+    db.rollback()
+
+    assert catalog.record(db, action="DELETE", entity_type="fine") is True
+
+
+def test_create_log_updates_catalog(db, monkeypatch):
+    monkeypatch.setattr(log_catalog_crud, "_known_pairs", set())
+    log_crud.create_log(db, user_id=None, action="LOGIN_FAILED", entity_type="security")
+    log_crud.create_log(db, user_id=None, action="LOGIN_FAILED", entity_type="security")
+
+    assert [(row.action, row.entity_type) for row in db.query(LogCatalog)] == [("LOGIN_FAILED", "security")]
+    assert ("LOGIN_FAILED", "security") in log_catalog_crud._known_pairs
+
+
+def test_get_catalog_lists_sorted_unique_values(db):
+    catalog = CRUDLogCatalog(LogCatalog)
+    for action, entity_type in [("VIEW", "passport"), ("CREATE", "passport"), ("CREATE", "fine")]:
+        catalog.record(db, action=action, entity_type=entity_type)
+    db.commit()
+
+    assert catalog.get_catalog(db) == {
+        "actions": ["CREATE", "VIEW"],
+        "entity_types": ["fine", "passport"]
+    }
@@ -0,0 +1,66 @@
+"""
+Тесты фильтров логов (CRUDLog.build_filters / get_filtered)
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.crud.log import log_crud
+from app.models.log import Log
+from app.models.user import User
+
+NOW = datetime.now(timezone.utc)
+
+
+@pytest.fixture
+def logs(db):
+    admin = User(discord_id=1, discord_username="chief", minecraft_username="Chief", role="admin")
+    officer = User(discord_id=2, discord_username="officer", minecraft_username="Steve", role="police")
+    db.add_all([admin, officer])
+    db.flush()
+    db.add_all([
+        Log(user_id=admin.id, action="LOGIN", entity_type="user", entity_id=admin.id,
+            ip_address="10.0.0.1", created_at=NOW - timedelta(days=1)),
+        Log(user_id=officer.id, action="CREATE", entity_type="fine", entity_id=7,
+            ip_address="10.0.0.2", created_at=NOW - timedelta(hours=1)),
+        Log(user_id=officer.id, action="VIEW_STATISTICS", entity_type="statistics",
+            ip_address="192.168.1.5", created_at=NOW - timedelta(days=10)),
+    ])
+    db.commit()
+    return admin, officer
+
+
+def _actions(db, **filters):
+    return sorted(log.action for log in log_crud.get_filtered(db, **filters))
+
+
+def test_no_filters_returns_no_conditions():
+    assert log_crud.build_filters() == []
+
+
+def test_index_equalities_come_before_range_and_unindexed_conditions():
+    """Порядок условий: равенства по столбцам индексов, диапазон created_at, остальное"""
+    filters = log_crud.build_filters(
+        search="x", ip_address="10.", exclude_actions=["VIEW"], date_from=NOW, action="LOGIN", user_id=1
+    )
+    columns = [str(condition.left) if hasattr(condition, "left") else None for condition in filters]
+    assert columns[:3] == ["logs.user_id", "logs.action", "logs.created_at"]
+    assert len(filters) == 6
+
+
+def test_equality_and_date_filters(db, logs):
+    _, officer = logs
+    assert _actions(db, user_id=officer.id) == ["CREATE", "VIEW_STATISTICS"]
+    assert _actions(db, entity_type="fine", entity_id=7) == ["CREATE"]
+    assert _actions(db, date_from=NOW - timedelta(days=2), date_to=NOW) == ["CREATE", "LOGIN"]
+
+
+def test_exclude_actions_and_ip_filter(db, logs):
+    assert _actions(db, exclude_actions=["VIEW_STATISTICS"]) == ["CREATE", "LOGIN"]
+    assert _actions(db, ip_address="10.0.0") == ["CREATE", "LOGIN"]
+
+
+def test_user_fields_join_users(db, logs):
+    assert _actions(db, user_role="admin") == ["LOGIN"]
+    assert _actions(db, search="steve") == ["CREATE", "VIEW_STATISTICS"]
+    assert log_crud.count_filtered(db, search="login") == 1
@@ -0,0 +1,59 @@
+"""
+Тесты сбора данных для входа через Discord (_fetch_login_profile)
+"""
+import asyncio
+
+import pytest
+
+from app.api.v1 import auth
+from app.core.config import settings
+
+
+@pytest.fixture
+def member_calls(monkeypatch):
+    calls = []
+
+    async def user_info(access_token):
+        return {"id": "42", "username": "player"}
+
+    async def member_by_bot(bot_token, guild_id, discord_id):
+        calls.append(discord_id)
+        return {"roles": []}
+
+    async def find_user(discord_id):
+        return None
+
+    monkeypatch.setattr(settings, "DISCORD_BOT_TOKEN", "bot-token")
+    monkeypatch.setattr(auth.discord_client, "get_user_info", user_info)
+    monkeypatch.setattr(auth.discord_client, "get_guild_member_by_bot", member_by_bot)
+    monkeypatch.setattr(auth.spworlds_client, "find_user", find_user)
+    return calls
+
+
+def _use_guilds(monkeypatch, guilds):
+    async def user_guilds(access_token):
+        return guilds
+
+    monkeypatch.setattr(auth.discord_client, "get_user_guilds", user_guilds)
+
+
+def test_member_is_not_looked_up_outside_guild(monkeypatch, member_calls):
+    """Bot API не вызывается для пользователей не из нужного сервера"""
+    _use_guilds(monkeypatch, [{"id": "other"}])
+
+    profile = asyncio.run(auth._fetch_login_profile("token", {}))
+
+    assert member_calls == []
+    assert profile["member_info"] is None and profile["member_error"] is None
+    assert profile["guilds"] == [{"id": "other"}]
+
+
+def test_member_is_looked_up_for_guild_members(monkeypatch, member_calls):
+    _use_guilds(monkeypatch, [{"id": settings.DISCORD_GUILD_ID}])
+    timings = {}
+
+    profile = asyncio.run(auth._fetch_login_profile("token", timings))
+
+    assert member_calls == [42]
+    assert profile["member_info"] == {"roles": []}
+    assert {"user_info", "guilds", "guild_member", "spworlds"} <= set(timings)
@@ -0,0 +1,220 @@
+"""
+Тесты устойчивости клиентов внешних API (app/clients/resilience.py)
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.clients import resilience
+from app.clients.resilience import (
+    CircuitBreaker, CircuitOpenError, DeadlineExceededError, ResilientTransport, upstream_transport
+)
+from app.clients.spworlds import SPWorldsClient
+from app.core.config import settings
+from app.core.execution import request_deadline
+
+
+@pytest.fixture(autouse=True)
+def isolated_upstreams(monkeypatch):
+    """Свой реестр внешних API и предсказуемые пороги в каждом тесте"""
+    monkeypatch.setattr(resilience, "upstreams", {})
+    monkeypatch.setattr(settings, "CIRCUIT_FAILURE_THRESHOLD", 3)
+    monkeypatch.setattr(settings, "CIRCUIT_RECOVERY_TIMEOUT", 30.0)
+    monkeypatch.setattr(settings, "UPSTREAM_TIMEOUT_FACTOR", 3.0)
+    monkeypatch.setattr(settings, "UPSTREAM_TIMEOUT_MIN", 1.0)
+
+
+def _client(handler, service: str = "test") -> httpx.AsyncClient:
+    transport = ResilientTransport(service, httpx.MockTransport(handler))
+    return httpx.AsyncClient(base_url="https://upstream.test", transport=transport, timeout=10.0)
+
+
+def _open_breaker(breaker: CircuitBreaker) -> None:
+    for _ in range(settings.CIRCUIT_FAILURE_THRESHOLD):
+        breaker.record_failure()
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test")
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.rejected_total == 1
+
+
+def test_breaker_half_open_allows_single_trial():
+    breaker = CircuitBreaker("test")
+    _open_breaker(breaker)
+    breaker.opened_at = time.monotonic() - settings.CIRCUIT_RECOVERY_TIMEOUT - 1
+
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_breaker_failed_trial_reopens():
+    breaker = CircuitBreaker("test")
+    _open_breaker(breaker)
+    breaker.opened_at = time.monotonic() - settings.CIRCUIT_RECOVERY_TIMEOUT - 1
+
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_transport_rejects_when_circuit_open():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    async def scenario():
+        async with _client(handler) as client:
+            for _ in range(settings.CIRCUIT_FAILURE_THRESHOLD):
+                assert (await client.get("/users/1")).status_code == 503
+            with pytest.raises(CircuitOpenError):
+                await client.get("/users/1")
+
+    asyncio.run(scenario())
+    assert len(calls) == settings.CIRCUIT_FAILURE_THRESHOLD
+
+
+def test_expired_deadline_releases_trial():
+    def handler(request):
+        return httpx.Response(200)
+
+    async def scenario():
+        async with _client(handler) as client:
+            breaker = resilience.get_upstream("test").breaker
+            _open_breaker(breaker)
+            breaker.opened_at = time.monotonic() - settings.CIRCUIT_RECOVERY_TIMEOUT - 1
+
+            token = request_deadline.set(time.monotonic() - 1)
+            try:
+                with pytest.raises(DeadlineExceededError):
+                    await client.get("/users/1")
+            finally:
+                request_deadline.reset(token)
+
+            # Пробный вызов не израсходован: следующий запрос проходит и замыкает предохранитель
+            assert (await client.get("/users/1")).status_code == 200
+            assert breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_timeout_caused_by_deadline_is_not_a_failure():
+    def handler(request):
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    async def scenario():
+        async with _client(handler) as client:
+            breaker = resilience.get_upstream("test").breaker
+
+            token = request_deadline.set(time.monotonic() + 0.5)
+            try:
+                with pytest.raises(httpx.ReadTimeout):
+                    await client.get("/users/1")
+            finally:
+                request_deadline.reset(token)
+            assert breaker.consecutive_failures == 0
+
+            with pytest.raises(httpx.ReadTimeout):
+                await client.get("/users/1")
+            assert breaker.consecutive_failures == 1
+
+    asyncio.run(scenario())
+
+
+def test_adaptive_timeout_is_per_endpoint_and_spares_connect():
+    seen = {}
+
+    def handler(request):
+        seen[request.url.path] = request.extensions["timeout"]
+        return httpx.Response(200)
+
+    async def scenario():
+        async with _client(handler) as client:
+            for _ in range(resilience.MIN_LATENCY_SAMPLES):
+                await client.get("/guilds/123/members/456")
+            await client.get("/guilds/123/members/789")
+            await client.post("/oauth2/token")
+
+    asyncio.run(scenario())
+
+    upstream = resilience.get_upstream("test")
+    assert set(upstream.endpoints) == {"GET /guilds/{id}/members/{id}", "POST /oauth2/token"}
+
+    member_timeout = seen["/guilds/123/members/789"]
+    assert member_timeout["read"] == settings.UPSTREAM_TIMEOUT_MIN
+    assert member_timeout["connect"] == 10.0
+    assert member_timeout["pool"] == 10.0
+    # У обмена токена своих замеров нет: полный таймаут клиента
+    assert seen["/oauth2/token"]["read"] == 10.0
+
+
+def test_probe_requests_do_not_feed_latency():
+    def handler(request):
+        return httpx.Response(200)
+
+    async def scenario():
+        async with _client(handler) as client:
+            for _ in range(resilience.MIN_LATENCY_SAMPLES):
+                await client.get("/gateway", extensions={"probe": True})
+
+    asyncio.run(scenario())
+    assert resilience.get_upstream("test").endpoints == {}
+
+
+def test_endpoint_trackers_are_bounded():
+    upstream = resilience.get_upstream("test")
+    for index in range(resilience.MAX_TRACKED_ENDPOINTS + 5):
+        upstream.latency(f"GET /users/profiles/minecraft/player{index}")
+    assert len(upstream.endpoints) == resilience.MAX_TRACKED_ENDPOINTS + 1
+    assert resilience.OTHER_ENDPOINT in upstream.endpoints
+
+
+def test_spworlds_falls_back_to_last_known_user(monkeypatch):
+    monkeypatch.setattr(settings, "SPWORLDS_MAP_ID", "map")
+    monkeypatch.setattr(settings, "SPWORLDS_MAP_TOKEN", "token")
+    available = {"value": True}
+
+    def handler(request):
+        if available["value"]:
+            return httpx.Response(200, json={"username": "player", "uuid": "uuid-1"})
+        return httpx.Response(503)
+
+    async def scenario():
+        client = SPWorldsClient()
+        client._client = httpx.AsyncClient(
+            base_url="https://spworlds.test",
+            transport=upstream_transport("spworlds", httpx.MockTransport(handler))
+        )
+        try:
+            assert await client.find_user("42") == {"username": "player", "uuid": "uuid-1"}
+
+            available["value"] = False
+            assert await client.find_user("42") == {"username": "player", "uuid": "uuid-1"}
+            assert await client.find_user("43") is None
+
+            # Разомкнутый предохранитель: запросы не уходят, данные из запаса
+            _open_breaker(resilience.get_upstream("spworlds").breaker)
+            assert await client.find_user("42") == {"username": "player", "uuid": "uuid-1"}
+        finally:
+            await client.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,66 @@
+"""
+Тесты ленты событий безопасности (GET /logs/security)
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.logs import get_security_logs
+from app.crud.log import log_crud
+from app.models.log import Log
+from app.models.user import User
+
+
+def _security_logs(db, count: int, created_at: datetime):
+    user = db.query(User).first()
+    if user is None:
+        user = User(discord_id=1, discord_username="admin", role="admin")
+        db.add(user)
+        db.flush()
+    db.add_all([
+        Log(user_id=user.id, action="LOGIN", entity_type="user", created_at=created_at)
+        for _ in range(count)
+    ])
+    db.commit()
+
+
+def _page(db, cursor=None, limit=3):
+    return get_security_logs(db=db, skip=0, limit=limit, days=30, cursor=cursor, current_user=None)
+
+
+def test_cursor_pagination_with_equal_timestamps(db):
+    """Записи с одинаковым created_at не теряются и не повторяются между страницами"""
+    created_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    _security_logs(db, 7, created_at)
+    _security_logs(db, 2, created_at - timedelta(minutes=5))
+
+    seen = []
+    cursor = None
+    while True:
+        page = _page(db, cursor)
+        seen.extend(log.id for log in page["logs"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    expected = [log.id for log in db.query(Log).order_by(Log.created_at.desc(), Log.id.desc())]
+    assert seen == expected
+    assert len(set(seen)) == 9
+
+
+def test_cursor_is_urlsafe_and_round_trips(db):
+    _security_logs(db, 1, datetime.now(timezone.utc) - timedelta(hours=1))
+    log = db.query(Log).one()
+
+    cursor = log_crud.encode_cursor(log)
+
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+    assert log_crud.decode_cursor(cursor) == (log.created_at, log.id)
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "!!!", "MjAyNA", "2024-01-01T00:00:00+00:00_5"])
+def test_malformed_cursor_is_rejected(db, cursor):
+    with pytest.raises(HTTPException) as error:
+        _page(db, cursor)
+    assert error.value.status_code == 400
@@ -0,0 +1,35 @@
+"""
+Тесты сериализации ответов через orjson (app/utils/serialization.py)
+"""
+import json
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.utils.serialization import dumps
+
+
+@pytest.mark.parametrize("value", [
+    datetime(2026, 1, 1, tzinfo=timezone.utc),
+    datetime(2026, 1, 1, 12, 30, 5, 123456, tzinfo=timezone.utc),
+    datetime(2026, 1, 1, 12, 30, tzinfo=timezone(timedelta(hours=3))),
+    datetime(2026, 1, 1, 12, 30),
+    date(2026, 1, 1),
+])
+def test_datetimes_match_pydantic_output(value):
+    """Те же байты, что выдает response_model: UTC с суффиксом "Z" """
+    assert dumps(value) == TypeAdapter(type(value)).dump_json(value)
+
+
+@pytest.mark.parametrize("value", [Decimal("12"), Decimal("12.50"), Decimal("-0.1")])
+def test_decimal_matches_jsonable_encoder(value):
+    assert json.loads(dumps({"amount": value})) == jsonable_encoder({"amount": value})
+
+
+def test_uuid_matches_pydantic_output():
+    value = uuid.UUID("12345678-1234-5678-1234-567812345678")
+    assert dumps(value) == TypeAdapter(uuid.UUID).dump_json(value)
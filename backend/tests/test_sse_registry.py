@@ -0,0 +1,86 @@
+"""
+Тесты реестра SSE соединений (app/services/sse_registry.py)
+"""
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.sse_registry import ROLE_UPDATE_EVENT, SSERegistry
+
+
+def _role_update(user_id: int, old_role: str, new_role: str) -> dict:
+    return {"event": ROLE_UPDATE_EVENT, "data": {"user_id": user_id, "old_role": old_role, "new_role": new_role}}
+
+
+def _drain(connection) -> list:
+    async def drain():
+        events = []
+        while connection._buffer:
+            events.append(await connection.next_event(timeout=0.1))
+        return events
+
+    return asyncio.run(drain())
+
+
+def test_pending_role_updates_are_coalesced():
+    """Клиент получает одно обновление: исходная роль из первого, новая из последнего"""
+    registry = SSERegistry()
+    connection = registry.register(1, "citizen")
+
+    connection.push(_role_update(1, "citizen", "police"))
+    connection.push({"event": "notice", "data": {"text": "hi"}})
+    connection.push(_role_update(1, "police", "admin"))
+
+    events = _drain(connection)
+    assert [event["event"] for event in events] == ["notice", ROLE_UPDATE_EVENT]
+    assert events[1]["data"] == {"user_id": 1, "old_role": "citizen", "new_role": "admin"}
+
+
+def test_full_buffer_drops_oldest_events(monkeypatch):
+    monkeypatch.setattr(settings, "SSE_QUEUE_SIZE", 3)
+    connection = SSERegistry().register(1, "admin")
+
+    for number in range(5):
+        connection.push({"event": "notice", "data": {"number": number}})
+
+    assert [event["data"]["number"] for event in _drain(connection)] == [2, 3, 4]
+    # Пустой буфер освобождается
+    assert connection._buffer is None
+
+
+def test_role_index_follows_role_changes():
+    registry = SSERegistry()
+    first_tab = registry.register(1, "police")
+    second_tab = registry.register(1, "police")
+    admin = registry.register(2, "admin")
+
+    registry.update_role(1, "admin")
+
+    assert registry.send_to_role("police", {"event": "notice", "data": {}}) == 0
+    assert registry.send_to_role("admin", {"event": "notice", "data": {}}, exclude_user_id=2) == 2
+    assert registry.status() == {"connections": 3, "users": 2, "by_role": {"admin": 3}}
+    assert first_tab._buffer and second_tab._buffer and not admin._buffer
+
+
+def test_unregister_wakes_waiting_stream_and_is_idempotent():
+    registry = SSERegistry()
+    connection = registry.register(1, "citizen")
+
+    async def scenario():
+        waiting = asyncio.create_task(connection.next_event(timeout=5))
+        await asyncio.sleep(0)
+        registry.unregister(connection)
+        registry.unregister(connection)
+        return await waiting
+
+    assert asyncio.run(scenario()) is None
+    assert len(registry) == 0
+    assert registry.send_to_user(1, _role_update(1, "citizen", "police")) == 0
+
+
+def test_idle_stream_times_out_for_heartbeat():
+    connection = SSERegistry().register(1, "citizen")
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(connection.next_event(timeout=0.01))
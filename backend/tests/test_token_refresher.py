@@ -0,0 +1,113 @@
+"""
+Тесты обновления Discord токенов (app/services/token_refresher.py)
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.crud.user import user_crud
+from app.models.user import User
+from app.services import token_refresher
+from app.services.leader_election import TOKEN_REFRESH_LOCK_NAMESPACE
+from app.services.token_refresher import TokenRefreshService
+
+
+@pytest.fixture
+def expiring_user(db, monkeypatch):
+    monkeypatch.setattr(token_refresher, "SessionLocal", lambda: db)
+    user = User(
+        discord_id=1, discord_username="officer", role="police",
+        discord_access_token="old-access", discord_refresh_token="old-refresh",
+        discord_expires_at=datetime.now(timezone.utc) - timedelta(minutes=1)
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_refresh_exchanges_token_once_and_reuses_stored_result(db, expiring_user, monkeypatch):
+    exchanged = []
+
+    async def refresh_token(refresh_token):
+        exchanged.append(refresh_token)
+        await asyncio.sleep(0.01)
+        return {"access_token": "new-access", "refresh_token": "new-refresh", "expires_in": 604800}
+
+    monkeypatch.setattr(token_refresher.discord_client, "refresh_token", refresh_token)
+    service = TokenRefreshService()
+    user_id = expiring_user.id
+
+    async def scenario():
+        concurrent = await asyncio.gather(*(service.refresh_user_token(user_id) for _ in range(3)))
+        # Повторный вызов видит сохраненный токен и не обращается к Discord
+        return concurrent, await service.refresh_user_token(user_id)
+
+    concurrent, repeated = asyncio.run(scenario())
+
+    assert concurrent == ["new-access"] * 3
+    assert repeated == "new-access"
+    assert exchanged == ["old-refresh"]
+    assert db.get(User, user_id).discord_refresh_token == "new-refresh"
+
+
+def test_lock_user_takes_transaction_lock_per_user():
+    class RecordingSession:
+        def __init__(self):
+            self.statements = []
+
+        def execute(self, statement, params=None):
+            self.statements.append((str(statement), params))
+
+    session = RecordingSession()
+    TokenRefreshService._lock_user(session, 42)
+
+    sql, params = session.statements[-1]
+    assert "pg_advisory_xact_lock" in sql
+    assert params == {"namespace": TOKEN_REFRESH_LOCK_NAMESPACE, "user_id": 42}
+    assert "lock_timeout" in session.statements[0][0]
+
+
+def test_pass_skips_long_expired_and_backs_off_failed_users(db, monkeypatch):
+    # Параллельные обновления работают в собственных сессиях, как в приложении
+    monkeypatch.setattr(token_refresher, "SessionLocal", sessionmaker(bind=db.get_bind()))
+    monkeypatch.setattr(token_refresher.settings, "TOKEN_REFRESH_BATCH_DELAY", 0)
+    now = datetime.now(timezone.utc)
+    users = {
+        name: User(
+            discord_id=index, discord_username=name, role="police",
+            discord_access_token=f"{name}-access", discord_refresh_token=f"{name}-refresh",
+            discord_expires_at=now + expires_in
+        )
+        for index, (name, expires_in) in enumerate([
+            ("dead", -timedelta(days=60)), ("revoked", -timedelta(hours=1)), ("expiring", timedelta(hours=1))
+        ], start=1)
+    }
+    db.add_all(users.values())
+    db.commit()
+
+    exchanged = []
+
+    async def refresh_token(refresh_token):
+        exchanged.append(refresh_token)
+        if refresh_token.startswith("revoked"):
+            return None
+        return {"access_token": "new-access", "refresh_token": "new-refresh", "expires_in": 604800}
+
+    monkeypatch.setattr(token_refresher.discord_client, "refresh_token", refresh_token)
+    service = TokenRefreshService()
+    # Еще действующий токен идет первым, давно истекший не выбирается
+    assert user_crud.get_user_ids_with_expiring_tokens(
+        db, expiring_before=now + timedelta(days=1), expired_after=now - timedelta(days=30)
+    ) == [users["expiring"].id, users["revoked"].id]
+
+    first = asyncio.run(service.refresh_expiring_tokens())
+    second = asyncio.run(service.refresh_expiring_tokens())
+
+    # Пакет обновляется параллельно, порядок обменов не фиксирован
+    assert sorted(exchanged) == ["expiring-refresh", "revoked-refresh"]
+    assert first == {"total": 2, "refreshed": 1, "failed": 1}
+    # Неудачный пользователь ждет паузу и не повторяется в следующем проходе
+    assert second == {"total": 0, "refreshed": 0, "failed": 0}
+    assert service.status()["users_backing_off"] == 1
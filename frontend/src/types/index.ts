@@ -104,6 +104,7 @@ export interface SecurityLogResponse {
   logs: Log[];
   total_security_events: number;
   period_days: number;
+  next_cursor?: string | null;
 }
 
 export interface UserCreate {